@@ -1,53 +1,54 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import json
 import os
-import glob
 import numpy as np
 from scipy import stats
 
+from app.logging.columnar import load_audit_frame
+from app.logging.reader import STAGES
+from app.logging.rotation import find_log_files
+
 # --- KONFIGURATION ---
 LOG_DIR = "raw_logs"
 OUTPUT_DIR = "evaluation_results"
 
+# Optionale Filter (werden im spaltenorientierten Store auf Partitionsebene angewendet)
+DATE_FROM = None  # z.B. "2025-01-01"
+DATE_TO = None    # z.B. "2025-01-31"
+ROLES = None      # z.B. ["Mitarbeiter", "Vorgesetzter"]
+# True: neue Segmente vor der Auswertung in den Spalten-Store übernehmen (schreibt LOG_DIR/columnar/).
+# Alternativ als eigener Schritt: python -m app.logging.columnar raw_logs
+COMPACT_LOGS = False
+
 # Style für wissenschaftliche Diagramme
 sns.set_theme(style="whitegrid")
 plt.rcParams.update({'figure.figsize': (14, 6), 'font.size': 12})
 
-def parse_log_entry(entry):
-    """Liest die relevanten Zahlen für die Korrelationsanalyse aus."""
-    metrics = entry.get('metrics', {})
-    
-    return {
-        'n_allowed': metrics.get('allowed_docs_count', 0),
-        'n_blocked': metrics.get('blocked_docs_count', 0),
-        # Latenz in Sekunden
-        'latency_sec': metrics.get('latency_seconds', 0.0)
-    }
-
 def load_data(directory):
     if not os.path.exists(directory):
         print(f"❌ Fehler: Ordner '{directory}' fehlt.")
         return None
 
-    all_data = []
-    files = glob.glob(os.path.join(directory, "*.jsonl")) + glob.glob(os.path.join(directory, "*.json"))
+    files = find_log_files(directory)  # inkl. rotierter, komprimierter Segmente
     print(f"📂 Lade {len(files)} Dateien für Latenz-Analyse...")
 
-    for filepath in files:
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        try:
-                            raw = json.loads(line)
-                            all_data.append(parse_log_entry(raw))
-                        except: continue
-        except: continue
-    
-    if not all_data: return None
-    return pd.DataFrame(all_data)
+    # Nur die für die Korrelationsanalyse relevanten Spalten laden
+    stage_cols = [f'stage_{stage}' for stage in STAGES]
+    token_cols = ['prompt_tokens', 'prompt_tokens_local']
+    df = load_audit_frame(directory, ['allowed_docs_count', 'blocked_docs_count', 'latency_seconds'] + stage_cols + token_cols,
+                          date_from=DATE_FROM, date_to=DATE_TO, roles=ROLES, compact=COMPACT_LOGS)
+    if df.empty: return None
+
+    # Prompt-Größe in Tokens: abgerechnete Tokens laut API, sonst lokal gezählte (z. B. Streaming ohne Usage)
+    df['n_prompt_tokens'] = df['prompt_tokens'].fillna(df['prompt_tokens_local'])
+
+    # Latenz in Sekunden; Stufen und Token-Zahlen fehlen in älteren Logs -> NaN
+    return df.drop(columns=token_cols).rename(columns={
+        'allowed_docs_count': 'n_allowed',
+        'blocked_docs_count': 'n_blocked',
+        'latency_seconds': 'latency_sec'
+    })
 
 def calculate_correlations(df):
     """Berechnet den Korrelationskoeffizienten (Pearson)."""
@@ -55,6 +56,8 @@ def calculate_correlations(df):
     
     corr_blocked = df['n_blocked'].corr(df['latency_sec'])
     corr_allowed = df['n_allowed'].corr(df['latency_sec'])
+    # Nur Anfragen mit Token-Angabe (Cache-Treffer und ältere Logs haben keine)
+    corr_tokens = df['n_prompt_tokens'].corr(df['latency_sec'])
     
     print("\n" + "="*60)
     print("📊 KORRELATIONS-ANALYSE (Pearson-Koeffizient r)")
@@ -74,14 +77,61 @@ def calculate_correlations(df):
         print("   -> Interpretation: DEUTLICHER Einfluss (Mehr Kontext = Mehr Rechenzeit für LLM).")
     else:
         print("   -> Interpretation: Geringer Einfluss.")
+    print("-" * 60)
+
+    n_tokens = df['n_prompt_tokens'].notna().sum()
+    if n_tokens > 1:
+        print(f"3. Prompt-Tokens vs. Latenz:   r = {corr_tokens:.3f}  ({n_tokens} Anfragen)")
+        if abs(corr_tokens) > abs(corr_allowed):
+            print("   -> Interpretation: Die Token-Zahl erklärt die Latenz besser als die Dokumentanzahl.")
+        else:
+            print("   -> Interpretation: Kein Zusatznutzen gegenüber der Dokumentanzahl.")
+    else:
+        print("3. Prompt-Tokens vs. Latenz:   keine Token-Angaben in den Logs (ältere Log-Version).")
     print("="*60)
     
-    return corr_blocked, corr_allowed
+    return corr_blocked, corr_allowed, corr_tokens
 
-def plot_correlation(df, r_blocked, r_allowed):
-    """Erstellt zwei Scatterplots nebeneinander."""
-    
-    fig, axes = plt.subplots(1, 2, sharey=True) # sharey=True damit man die Y-Achse vergleichen kann
+def print_stage_breakdown(df):
+    """Zerlegt die Gesamtlatenz in die einzelnen Pipeline-Stufen."""
+    stage_cols = [f'stage_{stage}' for stage in STAGES]
+    staged = df.dropna(subset=stage_cols, how='all')
+    if staged.empty:
+        print("\nℹ️ Keine Stufen-Messwerte in den Logs (ältere Log-Version).")
+        return None
+
+    total = staged['latency_sec'].sum()
+    print("\n" + "="*60)
+    print(f"⏱️ LATENZ NACH PIPELINE-STUFE ({len(staged)} Anfragen)")
+    print("="*60)
+    print(f"{'Stufe':<15} | {'Ø (ms)':>9} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'Anteil':>7}")
+    print("-" * 60)
+    for stage, col in zip(STAGES, stage_cols):
+        values = staged[col].dropna() * 1000.0
+        if values.empty: continue
+        share = staged[col].sum() / total * 100 if total > 0 else 0.0
+        print(f"{stage:<15} | {values.mean():>9.1f} | {values.median():>9.1f} | {values.quantile(0.95):>9.1f} | {share:>6.1f}%")
+    print("="*60)
+    return staged
+
+def plot_stage_breakdown(staged):
+    """Gestapeltes Balkendiagramm der mittleren Latenz je Stufe."""
+    means = pd.DataFrame({
+        stage: [staged[f'stage_{stage}'].mean() * 1000.0] for stage in STAGES
+    }, index=['Ø Anfrage'])
+    ax = means.plot(kind='barh', stacked=True, figsize=(12, 3), colormap='tab10')
+    ax.set_xlabel('Latenz (ms)')
+    ax.set_title('Zusammensetzung der Systemlatenz nach Pipeline-Stufe')
+    plt.tight_layout()
+    filename = os.path.join(OUTPUT_DIR, "fig_latency_stages.png")
+    plt.savefig(filename, dpi=300)
+    print(f"✅ Diagramm gespeichert: {filename}")
+    plt.close()
+
+def plot_correlation(df, r_blocked, r_allowed, r_tokens):
+    """Erstellt Scatterplots nebeneinander (Prompt-Tokens nur, falls in den Logs vorhanden)."""
+    has_tokens = df['n_prompt_tokens'].notna().sum() > 1
+    fig, axes = plt.subplots(1, 3 if has_tokens else 2, sharey=True) # sharey=True damit man die Y-Achse vergleichen kann
     
     # Plot 1: Blockierte Docs vs Latenz
     sns.regplot(
@@ -100,6 +150,16 @@ def plot_correlation(df, r_blocked, r_allowed):
     axes[1].set_title(f'Einfluss Kontext-Größe\n(Korrelation r={r_allowed:.2f})')
     axes[1].set_xlabel('Anzahl erlaubter Dokumente (an LLM)')
     axes[1].set_ylabel('') # Y-Label sparen wir uns hier, da sharey
+
+    if has_tokens:
+        # Plot 3: Prompt-Tokens vs Latenz
+        sns.regplot(
+            data=df.dropna(subset=['n_prompt_tokens']), x='n_prompt_tokens', y='latency_sec',
+            ax=axes[2], color='#3498db', scatter_kws={'alpha':0.5}, line_kws={'color': 'darkblue'}
+        )
+        axes[2].set_title(f'Einfluss Prompt-Größe\n(Korrelation r={r_tokens:.2f})')
+        axes[2].set_xlabel('Prompt-Tokens')
+        axes[2].set_ylabel('')
     
     plt.tight_layout()
     filename = os.path.join(OUTPUT_DIR, "fig_correlation_latency.png")
@@ -113,9 +173,13 @@ def main():
     df = load_data(LOG_DIR)
     if df is not None and not df.empty:
         # Metriken berechnen
-        r_blocked, r_allowed = calculate_correlations(df)
+        r_blocked, r_allowed, r_tokens = calculate_correlations(df)
         # Plotten
-        plot_correlation(df, r_blocked, r_allowed)
+        plot_correlation(df, r_blocked, r_allowed, r_tokens)
+        # Aufschlüsselung nach Pipeline-Stufen
+        staged = print_stage_breakdown(df)
+        if staged is not None:
+            plot_stage_breakdown(staged)
     else:
         print("Keine Daten gefunden.")
 
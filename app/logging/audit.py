@@ -1,22 +1,433 @@
 import json
 import os
+import time
+import queue
+import atexit
+import asyncio
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Union, Dict, Any
+from typing import List, Union, Dict, Any, Optional
 import dotenv
 
+from app.logging.rotation import rotate_segment, read_first_timestamp, resolve_compression
+
+# Prozessübergreifende Dateisperre (nur POSIX); ohne 'fcntl' (Windows) bleibt die Inode-Prüfung.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # Laden der Umgebungsvariablen für Konfigurationsparameter
 dotenv.load_dotenv()
 
 # Definition des Pfades zur Log-Datei. Standardwert ist 'audit_log.jsonl'.
 LOG_FILE = os.getenv("LOG_FILE", "audit_log.jsonl")
 
+# Parameter des gepufferten Audit-Writers
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))          # Max. wartende Einträge
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))            # Einträge pro Schreibvorgang
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))  # Max. Wartezeit bis zum Schreiben (s)
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "0.5"))  # Wartezeit bei voller Queue, danach Verwurf (s)
+# Dauerhaftigkeit: fsync nach jedem Batch (sicher, aber langsamer) oder nur Flush in den OS-Puffer.
+AUDIT_FSYNC = os.getenv("AUDIT_FSYNC", "false").lower() in ("1", "true", "yes")
+
+# Rotation: Die aktive Datei wird bei Erreichen der Größe bzw. beim Tageswechsel
+# als zeitgestempeltes Segment abgeschlossen und komprimiert (gzip oder zstd).
+AUDIT_ROTATE_BYTES = int(os.getenv("AUDIT_ROTATE_BYTES", str(50 * 1024 * 1024)))  # 0 = keine Größenrotation
+AUDIT_ROTATE_DAILY = os.getenv("AUDIT_ROTATE_DAILY", "true").lower() in ("1", "true", "yes")
+AUDIT_COMPRESSION = os.getenv("AUDIT_COMPRESSION", "gzip")
+
+
+class AuditWriter:
+    """
+    Gepufferter Audit-Writer mit begrenzter Queue und einem einzelnen Hintergrund-Thread.
+
+    Anfragen serialisieren ihren Eintrag selbst zu einer vollständigen JSON-Zeile und
+    legen ihn nur in die Queue. Der Writer-Thread hält die Log-Datei geöffnet und
+    schreibt gesammelte Zeilen in einem Schreibvorgang, sobald `batch_size` Einträge
+    vorliegen oder `flush_interval` Sekunden vergangen sind. Da nur dieser Thread
+    schreibt, werden Zeilen nie verschachtelt oder abgeschnitten.
+
+    Ist die Queue voll, wartet der Aufrufer bis zu `enqueue_timeout` Sekunden
+    (Backpressure); danach wird der Eintrag verworfen und gezählt.
+
+    Vor jedem Schreibvorgang prüft der Writer, ob die aktive Datei `rotate_bytes`
+    überschreitet oder (bei `rotate_daily`) ein neuer Tag begonnen hat, und
+    rotiert sie in ein komprimiertes Segment (siehe `app/logging/rotation.py`).
+
+    Mehrere Prozesse dürfen dieselbe LOG_FILE nutzen: Prüfung, Rotation und
+    Schreiben eines Batches laufen unter einer exklusiven Sperre auf
+    '<LOG_FILE>.lock'. Hat ein anderer Prozess die aktive Datei inzwischen
+    rotiert (andere Inode), wird sie vor dem Schreiben neu geöffnet.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        path: str = LOG_FILE,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        enqueue_timeout: float = AUDIT_ENQUEUE_TIMEOUT,
+        fsync: bool = AUDIT_FSYNC,
+        rotate_bytes: int = AUDIT_ROTATE_BYTES,
+        rotate_daily: bool = AUDIT_ROTATE_DAILY,
+        compression: str = AUDIT_COMPRESSION
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.rotate_daily = rotate_daily
+        self.compression = resolve_compression(compression)
+
+        # Zustand der aktiven Datei (nur vom Writer-Thread verändert)
+        self._file = None
+        self._lock_file = None
+        self._size = 0
+        self._segment_start: Optional[datetime] = None
+        self._segment_end: Optional[datetime] = None
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,      # Angenommene Einträge
+            "written": 0,       # Geschriebene Einträge
+            "dropped": 0,       # Verworfene Einträge (Queue voll oder Schreibfehler)
+            "backpressure": 0,  # Aufrufe, die auf freien Platz in der Queue warten mussten
+            "batches": 0,       # Anzahl Schreibvorgänge
+            "rotations": 0      # Abgeschlossene Segmente
+        }
+        self._closed = False
+        self._failed = False  # Log-Datei konnte nicht geöffnet werden
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def submit(self, line: str) -> bool:
+        """
+        Übergibt eine vollständige JSON-Zeile (inkl. Zeilenumbruch) an den Writer.
+
+        Returns:
+            bool: False, wenn der Eintrag wegen voller Queue verworfen wurde.
+        """
+        if self._closed:
+            self._count("dropped")
+            return False
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self._count("backpressure")
+            try:
+                self._queue.put(line, timeout=self.enqueue_timeout)
+            except queue.Full:
+                self._count("dropped")
+                print("⚠️ Warnung: Audit-Queue voll, Eintrag verworfen.")
+                return False
+        self._count("enqueued")
+        return True
+
+    def submit_many(self, lines: List[str]) -> bool:
+        """
+        Übergibt mehrere JSON-Zeilen als ein Element der Queue (z. B. aus `ask_batch`).
+
+        Die Zeilen werden gemeinsam geschrieben und belegen nur einen Platz in der Queue.
+
+        Returns:
+            bool: False, wenn die Einträge wegen voller Queue verworfen wurden.
+        """
+        if not lines:
+            return True
+        if self._closed:
+            self._count("dropped", len(lines))
+            return False
+        try:
+            self._queue.put_nowait(list(lines))
+        except queue.Full:
+            self._count("backpressure")
+            try:
+                self._queue.put(list(lines), timeout=self.enqueue_timeout)
+            except queue.Full:
+                self._count("dropped", len(lines))
+                print(f"⚠️ Warnung: Audit-Queue voll, {len(lines)} Einträge verworfen.")
+                return False
+        self._count("enqueued", len(lines))
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wartet, bis alle bis jetzt übergebenen Einträge geschrieben wurden.
+
+        Returns:
+            bool: False bei Zeitüberschreitung oder wenn der Writer-Thread nicht (mehr) läuft,
+                z. B. weil die Log-Datei nicht geöffnet werden konnte.
+        """
+        if self._failed or not self._thread.is_alive():
+            return False
+        marker = threading.Event()
+        self._queue.put(marker)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # In kurzen Schritten warten, damit ein beendeter Writer-Thread nicht endlos blockiert
+        while not marker.wait(0.1 if deadline is None else max(0.0, min(0.1, deadline - time.monotonic()))):
+            if not self._thread.is_alive():
+                return marker.is_set() and not self._failed
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return not self._failed
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Schreibt alle ausstehenden Einträge und beendet den Writer-Thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Zähler des Writers inkl. aktueller Queue-Tiefe."""
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot["queue_depth"] = self._queue.qsize()
+        return snapshot
+
+    def _open_active(self) -> None:
+        """Öffnet die aktive Log-Datei und übernimmt Größe und Startzeit eines bestehenden Segments."""
+        # Scheitert das Öffnen, bleibt None gesetzt und `_sync_active` versucht es beim nächsten Batch erneut
+        self._file = None
+        self._file = open(self.path, "ab")
+        self._size = os.path.getsize(self.path)
+        self._segment_start = read_first_timestamp(self.path) if self._size else None
+        self._segment_end = None
+
+    @contextmanager
+    def _file_lock(self):
+        """Exklusive Sperre auf '<LOG_FILE>.lock' über Prozessgrenzen hinweg (ohne 'fcntl' wirkungslos)."""
+        if self._lock_file is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _sync_active(self) -> None:
+        """Öffnet die aktive Datei neu, falls ein anderer Prozess sie rotiert hat, sonst übernimmt es ihre aktuelle Größe."""
+        if self._file is None or self._file.closed:
+            # Zuletzt fehlgeschlagenes Öffnen (z. B. nach einer Rotation) erneut versuchen
+            self._open_active()
+            return
+        try:
+            replaced = os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            replaced = True
+        if replaced:
+            self._file.close()
+            self._open_active()
+            return
+        # Andere Prozesse können seit dem letzten Batch angehängt haben
+        self._size = os.fstat(self._file.fileno()).st_size
+        if self._segment_start is None and self._size:
+            self._segment_start = read_first_timestamp(self.path)
+
+    def _maybe_rotate(self, now: datetime) -> None:
+        if not self._size:
+            return
+        too_large = self.rotate_bytes and self._size >= self.rotate_bytes
+        new_day = self.rotate_daily and self._segment_start is not None and self._segment_start.date() != now.date()
+        if not (too_large or new_day):
+            return
+        self._file.close()
+        start = self._segment_start or now
+        try:
+            segment = rotate_segment(self.path, start, self._segment_end or start, self.compression)
+            self._count("rotations")
+            print(f"🗜️ Audit-Log rotiert: {segment}")
+        except (IOError, OSError) as e:
+            # Scheitert bereits die Umbenennung, bleiben die Einträge in der aktiven Datei und die
+            # Rotation wird beim nächsten Batch erneut versucht. Scheitert erst die Kompression, bleibt
+            # das unkomprimierte Segment ('<Name>.<Start>.jsonl') liegen; es fehlt im Segment-Index,
+            # wird von den Auswertungen (`find_log_files`) aber weiterhin gelesen.
+            print(f"⚠️ Warnung: Rotation des Audit-Logs fehlgeschlagen: {e}")
+        finally:
+            self._open_active()
+
+    def _write(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        try:
+            now = datetime.now()
+            data = "".join(lines).encode("utf-8")
+            with self._file_lock():
+                self._sync_active()
+                self._maybe_rotate(now)
+                self._file.write(data)
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            self._size += len(data)
+            if self._segment_start is None:
+                self._segment_start = now
+            self._segment_end = now
+            self._count("written", len(lines))
+            self._count("batches")
+        except (IOError, OSError) as e:
+            self._count("dropped", len(lines))
+            print(f"❌ Fehler beim Schreiben des Audit-Logs: {e}")
+
+    def _discard_pending(self) -> None:
+        """Verwirft alle wartenden Einträge (als 'dropped' gezählt) und gibt wartende `flush`-Aufrufe frei."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+            elif isinstance(item, list):
+                self._count("dropped", len(item))
+            elif item is not self._STOP:
+                self._count("dropped")
+
+    def _run(self) -> None:
+        try:
+            if fcntl is not None:
+                self._lock_file = open(self.path + ".lock", "a")
+            self._open_active()
+        except (IOError, OSError) as e:
+            print(f"❌ Fehler beim Öffnen des Audit-Logs: {e}")
+            if self._lock_file is not None:
+                self._lock_file.close()
+            self._failed = True
+            self._closed = True
+            self._discard_pending()
+            return
+        batch, markers, unwritten = [], [], []
+        try:
+            while True:
+                item = self._queue.get()
+                batch, markers, stop = [], [], False
+                deadline = time.monotonic() + self.flush_interval
+
+                # Batch sammeln, bis Größe oder Zeitlimit erreicht ist
+                while True:
+                    if item is self._STOP:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        markers.append(item)
+                    elif isinstance(item, list):
+                        batch.extend(item)
+                    else:
+                        batch.append(item)
+                    if stop or markers or len(batch) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+
+                unwritten = batch
+                self._write(batch)
+                unwritten = []
+                for marker in markers:
+                    marker.set()
+                if stop:
+                    # Restliche Einträge (nach dem Stop-Signal eingereiht) ebenfalls schreiben
+                    rest = []
+                    while True:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if isinstance(item, threading.Event):
+                            item.set()
+                        elif isinstance(item, list):
+                            rest.extend(item)
+                        elif item is not self._STOP:
+                            rest.append(item)
+                    unwritten = rest
+                    self._write(rest)
+                    return
+        except Exception as e:
+            # Unerwarteter Fehler: Writer als ausgefallen markieren, statt unbemerkt zu enden.
+            # Neue Einträge werden danach sofort als verworfen gezählt, `flush` kehrt zurück.
+            print(f"❌ Audit-Writer beendet nach unerwartetem Fehler: {e!r}")
+            self._failed = True
+            self._closed = True
+            self._count("dropped", len(unwritten))
+            for marker in markers:
+                marker.set()
+            self._discard_pending()
+        finally:
+            if self._file is not None:
+                self._file.close()
+            if self._lock_file is not None:
+                self._lock_file.close()
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> AuditWriter:
+    """Liefert den prozessweiten Audit-Writer (wird beim ersten Zugriff gestartet)."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter()
+                # Beim Beenden des Prozesses werden alle ausstehenden Einträge geschrieben.
+                atexit.register(shutdown_audit_log)
+    return _writer
+
+
+def flush_audit_log(timeout: Optional[float] = None) -> bool:
+    """Blockiert, bis alle bisherigen Audit-Einträge auf die Platte geschrieben wurden."""
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
+
+
+def shutdown_audit_log() -> None:
+    """Leert die Queue, schließt die Log-Datei und gibt die Writer-Statistik aus."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is None:
+        return
+    writer.close()
+    stats = writer.stats()
+    if stats["dropped"] or stats["backpressure"]:
+        print(f"⚠️ Audit-Writer: {stats['dropped']} Einträge verworfen, {stats['backpressure']}x Backpressure.")
+
+
+def get_audit_stats() -> Dict[str, int]:
+    """Zähler des Audit-Writers (angenommen, geschrieben, verworfen, Backpressure, Queue-Tiefe)."""
+    return get_audit_writer().stats()
+
 def log_request(
     user_role: str, 
     query: str, 
     response_text: str, 
     allowed_docs: List[Union[Dict[str, Any], str]], 
     blocked_count: int, 
-    latency_seconds: float
+    latency_seconds: float,
+    ttft_seconds: Optional[float] = None,
+    stage_timings: Optional[Dict[str, float]] = None,
+    token_usage: Optional[Dict[str, int]] = None,
+    answer_cache: Optional[Dict[str, Any]] = None,
+    prompt: Optional[Dict[str, Any]] = None,
+    truncated: bool = False
 ) -> None:
     """
     Dokumentiert eine Benutzerinteraktion im Audit-Log für spätere Analysen.
@@ -28,8 +439,52 @@ def log_request(
         allowed_docs (List): Liste der Dokumente, die den RBAC-Filter passiert haben.
         blocked_count (int): Anzahl der Dokumente, die durch den Enforcer blockiert wurden.
         latency_seconds (float): Gemessene Verarbeitungszeit der Anfrage in Sekunden.
+        ttft_seconds (float, optional): Zeit bis zum ersten Token (nur bei Streaming-Antworten).
+        stage_timings (Dict[str, float], optional): Dauer der einzelnen Pipeline-Stufen in Sekunden.
+        token_usage (Dict[str, int], optional): Token-Verbrauch laut OpenAI-Antwort.
+        answer_cache (Dict[str, Any], optional): Status des Antwort-Caches ('exact', 'semantic'
+            oder 'miss') sowie dessen kumulierte Treffer-/Fehltreffer-Zähler.
+        prompt (Dict[str, Any], optional): Lokal gezählte Prompt-Tokens und Prompt-Budget
+            (siehe `RbacRagPipeline.build_prompt`).
+        truncated (bool): Die Antwort wurde nur teilweise ausgeliefert (Streaming vorzeitig beendet).
     """
-    
+    # Persistierung des Eintrags im JSONL-Format (JSON Lines).
+    # Die Zeile wird hier vollständig serialisiert und asynchron vom Audit-Writer
+    # an die Datei angehängt (Modus 'a'), ohne den Anfragepfad zu blockieren.
+    get_audit_writer().submit(_format_entry(
+        user_role, query, response_text, allowed_docs, blocked_count, latency_seconds,
+        ttft_seconds, stage_timings, token_usage, answer_cache, prompt, truncated
+    ))
+
+
+def log_requests(records: List[Dict[str, Any]]) -> bool:
+    """
+    Dokumentiert mehrere Benutzerinteraktionen mit einer Übergabe an den Audit-Writer.
+
+    Args:
+        records (List[Dict[str, Any]]): Je Eintrag die Parameter von `log_request`.
+
+    Returns:
+        bool: False, wenn die Einträge wegen voller Queue verworfen wurden.
+    """
+    return get_audit_writer().submit_many([_format_entry(**record) for record in records])
+
+
+def _format_entry(
+    user_role: str,
+    query: str,
+    response_text: str,
+    allowed_docs: List[Union[Dict[str, Any], str]],
+    blocked_count: int,
+    latency_seconds: float,
+    ttft_seconds: Optional[float] = None,
+    stage_timings: Optional[Dict[str, float]] = None,
+    token_usage: Optional[Dict[str, int]] = None,
+    answer_cache: Optional[Dict[str, Any]] = None,
+    prompt: Optional[Dict[str, Any]] = None,
+    truncated: bool = False
+) -> str:
+    """Serialisiert einen Audit-Eintrag zu einer JSON-Zeile (Parameter wie `log_request`)."""
     # Extraktion der Dokumenten-IDs für die Nachvollziehbarkeit, welche Informationen
     # in den Kontext eingeflossen sind. Es wird geprüft, ob es sich um Dokumenten-Objekte
     # oder reine ID-Strings handelt.
@@ -54,15 +509,27 @@ def log_request(
         },
         "allowed_doc_ids": allowed_doc_ids
     }
-    
-    # Persistierung des Eintrags im JSONL-Format (JSON Lines).
-    # Der Modus 'a' (append) stellt sicher, dass bestehende Logs nicht überschrieben werden.
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-        
-        # Ausgabe einer Bestätigung auf der Konsole (optional für Debugging)
-        print(f"📝 Audit-Log aktualisiert: {LOG_FILE}")
-        
-    except IOError as e:
-        print(f"❌ Fehler beim Schreiben des Audit-Logs: {e}")
\ No newline at end of file
+    if truncated:
+        entry["truncated"] = True
+    if ttft_seconds is not None:
+        entry["metrics"]["ttft_seconds"] = round(ttft_seconds, 3)
+    if stage_timings:
+        # Höhere Auflösung (0,1 ms), da einzelne Stufen (z. B. RBAC) im Sub-Millisekundenbereich liegen
+        entry["metrics"]["stages"] = {stage: round(seconds, 4) for stage, seconds in stage_timings.items()}
+    if token_usage:
+        entry["metrics"]["token_usage"] = token_usage
+    if answer_cache:
+        entry["metrics"]["answer_cache"] = answer_cache
+    if prompt:
+        entry["metrics"]["prompt"] = prompt
+    return json.dumps(entry, ensure_ascii=False) + "\n"
+
+async def alog_request(**kwargs: Any) -> None:
+    """
+    Asynchrone Variante von `log_request`.
+
+    Die Übergabe an den Audit-Writer wird in den Thread-Pool ausgelagert, damit
+    der Event-Loop auch bei Backpressure (volle Queue) nicht blockiert.
+    Die Parameter entsprechen `log_request`.
+    """
+    await asyncio.to_thread(log_request, **kwargs)
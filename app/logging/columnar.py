@@ -0,0 +1,311 @@
+import os
+import json
+from urllib.parse import quote, unquote
+from typing import Dict, Any, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from app.logging.reader import COLUMNS, load_dataframe
+from app.logging.rotation import find_log_files
+
+# Optionales Parquet-Backend (Paket 'pyarrow'); ohne das Paket wird NumPy (.npz) verwendet.
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+load_dotenv()
+
+# --- KONFIGURATION ---
+# 'auto' = Parquet, falls pyarrow installiert ist, sonst .npz
+COLUMNAR_FORMAT = os.getenv("AUDIT_COLUMNAR_FORMAT", "auto")
+COLUMNAR_SUBDIR = "columnar"
+COMPACTED_MANIFEST = "_compacted.json"
+
+# Abgeschlossene (rotierte) Segmente; die aktive .jsonl-Datei wird nicht verdichtet
+SEGMENT_SUFFIXES = (".jsonl.gz", ".jsonl.zst")
+
+# Partitionsspalten stehen im Verzeichnispfad (date=YYYY-MM-DD/role=<Rolle>), nicht in der Datei
+PARTITION_COLUMNS = ["date", "role"]
+# Partition für Einträge ohne lesbaren Zeitstempel; beim Lesen ist ihr Datum leer (None)
+# und sie fallen bei jedem Datumsfilter heraus.
+UNDATED_PARTITION = "unknown"
+STORE_COLUMNS = [column for column in COLUMNS if column != "role"]
+INT_COLUMNS = ["allowed_docs_count", "blocked_docs_count"]
+STRING_COLUMNS = ["query", "response_preview", "allowed_doc_ids"]
+
+
+def resolve_format(fmt: str = COLUMNAR_FORMAT) -> str:
+    """Wählt das Speicherformat; fällt ohne 'pyarrow' auf .npz zurück."""
+    if fmt == "auto":
+        return "parquet" if pq is not None else "npz"
+    if fmt == "parquet" and pq is None:
+        print("⚠️ Warnung: Paket 'pyarrow' nicht installiert, verwende .npz.")
+        return "npz"
+    if fmt not in ("parquet", "npz"):
+        raise ValueError(f"Unbekanntes Format: '{fmt}'. Erlaubt: 'auto', 'parquet', 'npz'")
+    return fmt
+
+
+def store_path(log_dir: str) -> str:
+    """Verzeichnis des spaltenorientierten Stores innerhalb des Log-Ordners."""
+    return os.path.join(log_dir, COLUMNAR_SUBDIR)
+
+
+def _load_compacted(store: str) -> Dict[str, Any]:
+    path = os.path.join(store, COMPACTED_MANIFEST)
+    if not os.path.exists(path):
+        return {"segments": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_compacted(store: str, manifest: Dict[str, Any]) -> None:
+    path = os.path.join(store, COMPACTED_MANIFEST)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Setzt feste Datentypen, damit alle Partitionen dasselbe Schema haben."""
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    for column in INT_COLUMNS:
+        df[column] = df[column].fillna(0).astype("int32")
+    for column in STRING_COLUMNS:
+        df[column] = df[column].fillna("").astype(str)
+    for column in STORE_COLUMNS:
+        if column not in INT_COLUMNS and column not in STRING_COLUMNS and column != "timestamp":
+            df[column] = df[column].astype("float64")
+    return df
+
+
+def _write_partition(part: pd.DataFrame, path: str, fmt: str) -> None:
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        pq.write_table(pa.Table.from_pandas(part[STORE_COLUMNS], preserve_index=False), tmp_path)
+    else:
+        # Texte als Unicode-Arrays statt Objekt-Arrays, damit beim Lesen kein Pickle nötig ist
+        arrays = {
+            column: part[column].to_numpy(dtype=str if column in STRING_COLUMNS else None)
+            for column in STORE_COLUMNS
+        }
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _read_partition(path: str, columns: Sequence[str]) -> pd.DataFrame:
+    # Spalten, die erst nach der Verdichtung eingeführt wurden (z. B. neue Stufen), fehlen in
+    # älteren Partitionen und werden mit NaN aufgefüllt.
+    if path.endswith(".parquet"):
+        present = set(pq.read_schema(path).names)
+        frame = pq.read_table(path, columns=[c for c in columns if c in present]).to_pandas()
+    else:
+        # NpzFile lädt Arrays erst beim Zugriff - nur angeforderte Spalten werden dekomprimiert
+        with np.load(path) as data:
+            frame = pd.DataFrame({column: data[column] for column in columns if column in data.files})
+    for column in columns:
+        if column not in frame:
+            frame[column] = np.nan
+    return frame[list(columns)]
+
+
+def compact_segments(log_dir: str, fmt: str = COLUMNAR_FORMAT) -> int:
+    """
+    Verdichtet alle noch nicht verarbeiteten, rotierten Segmente eines Log-Ordners
+    in partitionierte, spaltenorientierte Dateien (date=.../role=.../<segment>.parquet|.npz).
+
+    Die Rohsegmente bleiben als Audit-Trail unverändert erhalten. Der Vorgang ist
+    idempotent: bereits verdichtete Segmente werden übersprungen, ein abgebrochener
+    Lauf überschreibt beim nächsten Mal dieselben Partitionsdateien.
+
+    Args:
+        log_dir (str): Ordner mit den Audit-Logs.
+        fmt (str): 'auto', 'parquet' oder 'npz'.
+
+    Returns:
+        int: Anzahl neu verdichteter Segmente.
+    """
+    fmt = resolve_format(fmt)
+    extension = ".parquet" if fmt == "parquet" else ".npz"
+    store = store_path(log_dir)
+    os.makedirs(store, exist_ok=True)
+    manifest = _load_compacted(store)
+
+    segments = [path for path in find_log_files(log_dir) if path.endswith(SEGMENT_SUFFIXES)]
+    compacted = 0
+    for segment in segments:
+        name = os.path.basename(segment)
+        if name in manifest["segments"]:
+            continue
+
+        df = load_dataframe([segment], columns=COLUMNS, workers=1)
+        entries = len(df)
+        if entries:
+            df = _typed(df)
+            df["date"] = df["timestamp"].dt.strftime("%Y-%m-%d").fillna(UNDATED_PARTITION)
+            stem = name.split(".jsonl")[0]
+            for (date, role), part in df.groupby(PARTITION_COLUMNS, sort=False):
+                partition = os.path.join(store, f"date={date}", f"role={quote(role, safe='')}")
+                os.makedirs(partition, exist_ok=True)
+                _write_partition(part, os.path.join(partition, stem + extension), fmt)
+
+        manifest["segments"][name] = {"entries": entries, "format": fmt}
+        _save_compacted(store, manifest)
+        compacted += 1
+    return compacted
+
+
+def compacted_segments(log_dir: str) -> Dict[str, Any]:
+    """Bereits verdichtete Segmente (Dateiname -> Angaben), ohne den Store anzulegen."""
+    return _load_compacted(store_path(log_dir))["segments"]
+
+
+def _iter_partitions(
+    store: str,
+    date_from: Optional[str],
+    date_to: Optional[str],
+    roles: Optional[Sequence[str]],
+    stems: Optional[Set[str]] = None
+):
+    """
+    Liefert (date, role, Pfad) aller Partitionsdateien, die zu den Filtern passen (Partition Pruning).
+
+    Mit `stems` nur Dateien vollständig verdichteter Segmente (Reste eines abgebrochenen
+    Laufs werden übergangen, das Segment wird dann roh gelesen).
+    """
+    if not os.path.isdir(store):
+        return
+    for date_dir in sorted(os.listdir(store)):
+        if not date_dir.startswith("date="):
+            continue
+        date = date_dir[len("date="):]
+        if date == UNDATED_PARTITION:
+            if date_from or date_to:
+                continue
+            date = None
+        elif date_from and date < date_from or date_to and date > date_to:
+            continue
+        for role_dir in sorted(os.listdir(os.path.join(store, date_dir))):
+            role = unquote(role_dir[len("role="):])
+            if roles is not None and role not in roles:
+                continue
+            partition = os.path.join(store, date_dir, role_dir)
+            for name in sorted(os.listdir(partition)):
+                if not name.endswith((".parquet", ".npz")):
+                    continue
+                if stems is not None and os.path.splitext(name)[0] not in stems:
+                    continue
+                yield date, role, os.path.join(partition, name)
+
+
+def read_columnar(
+    log_dir: str,
+    columns: Optional[Sequence[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    roles: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """
+    Liest den spaltenorientierten Store mit Spaltenauswahl und Filtern auf Datum und Rolle.
+
+    Die Filter werden auf Verzeichnisebene ausgewertet: nicht passende Partitionen
+    werden gar nicht erst geöffnet, und aus den übrigen Dateien werden nur die
+    angeforderten Spalten gelesen. Einträge ohne lesbaren Zeitstempel haben das
+    Datum None und sind bei gesetztem `date_from`/`date_to` nicht enthalten.
+
+    Args:
+        log_dir (str): Ordner mit den Audit-Logs.
+        columns: Zu ladende Spalten (Standard: alle, siehe COLUMNS; 'role' und 'date' sind immer enthalten).
+        date_from (str): Erstes Datum (inklusive), Format 'YYYY-MM-DD'.
+        date_to (str): Letztes Datum (inklusive), Format 'YYYY-MM-DD'.
+        roles: Nur diese Rollen laden.
+
+    Returns:
+        pd.DataFrame: Gefilterte Einträge (leer, falls nichts passt).
+    """
+    columns = list(columns or COLUMNS)
+    # Mindestens eine Dateispalte lesen, sonst ginge bei reinen Partitionsspalten die Zeilenzahl verloren
+    file_columns = [column for column in columns if column in STORE_COLUMNS] or ["timestamp"]
+    stems = {name.split(".jsonl")[0] for name in compacted_segments(log_dir)}
+    frames = []
+    for date, role, path in _iter_partitions(store_path(log_dir), date_from, date_to, roles, stems):
+        part = _read_partition(path, file_columns)
+        part["date"] = date
+        part["role"] = role
+        frames.append(part)
+    result_columns = [column for column in columns if column not in PARTITION_COLUMNS] + PARTITION_COLUMNS
+    if not frames:
+        return pd.DataFrame(columns=result_columns)
+    return pd.concat(frames, ignore_index=True)[result_columns]
+
+
+def load_audit_frame(
+    log_dir: str,
+    columns: Optional[Sequence[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    roles: Optional[Sequence[str]] = None,
+    compact: bool = False
+) -> pd.DataFrame:
+    """
+    Einstiegspunkt für die Auswertungsskripte: liest den Store gefiltert und ergänzt
+    alle Log-Dateien, die (noch) nicht verdichtet sind - die aktiven Dateien sowie
+    rotierte Segmente, die `compact_segments` bisher nicht übernommen hat.
+
+    Das Lesen verändert den Log-Ordner nicht. Die Verdichtung ist ein eigener Schritt
+    (`python -m app.logging.columnar <Log-Ordner>`) oder wird mit `compact=True`
+    vorab ausgeführt (legt '<Log-Ordner>/columnar/' an).
+
+    Args:
+        compact (bool): Neue Segmente vor dem Lesen in den Store übernehmen.
+        Übrige Args und Rückgabe wie `read_columnar`.
+    """
+    columns = list(columns or COLUMNS)
+    if compact:
+        compacted = compact_segments(log_dir)
+        if compacted:
+            print(f"🗜️ {compacted} Segment(e) in den spaltenorientierten Store übernommen.")
+
+    stored = read_columnar(log_dir, columns, date_from, date_to, roles)
+
+    # Nicht verdichtete Dateien liegen nur als JSONL vor; Filter werden hier nachträglich angewendet
+    done = compacted_segments(log_dir)
+    pending = [path for path in find_log_files(log_dir) if os.path.basename(path) not in done]
+    raw_columns = list(dict.fromkeys([column for column in columns if column in COLUMNS] + ["timestamp", "role"]))
+    recent = load_dataframe(pending, columns=raw_columns) if pending else pd.DataFrame(columns=raw_columns)
+    if not recent.empty:
+        # Einträge ohne lesbaren Zeitstempel erhalten kein Datum und fallen bei Datumsfiltern heraus
+        recent["date"] = pd.to_datetime(recent["timestamp"], errors="coerce").dt.strftime("%Y-%m-%d")
+        mask = pd.Series(True, index=recent.index)
+        if date_from or date_to:
+            mask &= recent["date"].notna()
+        if date_from:
+            mask &= recent["date"] >= date_from
+        if date_to:
+            mask &= recent["date"] <= date_to
+        if roles is not None:
+            mask &= recent["role"].isin(roles)
+        recent = recent[mask]
+        if "timestamp" in columns:
+            recent["timestamp"] = pd.to_datetime(recent["timestamp"], errors="coerce")
+    recent = recent.reindex(columns=stored.columns)
+
+    frames = [frame for frame in (stored, recent) if not frame.empty]
+    if not frames:
+        return stored
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    log_dir = sys.argv[1] if len(sys.argv) > 1 else "raw_logs"
+    count = compact_segments(log_dir)
+    print(f"✅ {count} Segment(e) verdichtet ({resolve_format()}) -> {store_path(log_dir)}")
@@ -0,0 +1,192 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional, Sequence, Union
+
+from app.logging.rotation import find_log_files, open_log_file
+
+# Schneller JSON-Parser, falls installiert (orjson); sonst Standardbibliothek.
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Pipeline-Stufen in der Reihenfolge der Verarbeitung (siehe StageTimer in app/rag/pipeline.py)
+STAGES = ["lexical_search", "embedding", "vector_search", "rbac_filter", "prompt_build", "generation"]
+
+# Spalten des Bulk-Loaders (flach, eine Zeile je Audit-Eintrag)
+COLUMNS = [
+    "timestamp",
+    "role",
+    "query",
+    "response_preview",
+    "allowed_docs_count",
+    "blocked_docs_count",
+    "latency_seconds",
+    "ttft_seconds",
+    *[f"stage_{stage}" for stage in STAGES],
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "cached_tokens",
+    "prompt_tokens_local",
+    "prompt_token_budget",
+    "allowed_doc_ids",
+]
+
+NAN = float("nan")
+
+
+class AuditRecord(NamedTuple):
+    """Typisierte Sicht auf einen Eintrag des Audit-Logs."""
+    timestamp: str
+    role: str
+    query: str
+    response_preview: str
+    allowed_docs_count: int
+    blocked_docs_count: int
+    latency_seconds: float
+    ttft_seconds: Optional[float]
+    stages: Dict[str, float]
+    token_usage: Dict[str, int]
+    allowed_doc_ids: List[str]
+    prompt: Dict[str, Any]
+
+
+def parse_record(entry: Dict[str, Any]) -> AuditRecord:
+    """
+    Überführt einen rohen Log-Eintrag in einen `AuditRecord`.
+
+    Berücksichtigt ältere Log-Formate ('response_content' statt 'response_preview',
+    'allowed_docs' als Objektliste statt 'allowed_doc_ids').
+    """
+    metrics = entry.get("metrics", {})
+    doc_ids = entry.get("allowed_doc_ids", [])
+    if not doc_ids and "allowed_docs" in entry:
+        # Fallback für alte Logs
+        doc_ids = [d.get("id") for d in entry["allowed_docs"] if isinstance(d, dict) and "id" in d]
+    return AuditRecord(
+        timestamp=entry.get("timestamp", ""),
+        role=entry.get("role", "Unknown"),
+        query=entry.get("query", ""),
+        response_preview=entry.get("response_preview", entry.get("response_content", "")) or "",
+        allowed_docs_count=metrics.get("allowed_docs_count", 0),
+        blocked_docs_count=metrics.get("blocked_docs_count", 0),
+        latency_seconds=metrics.get("latency_seconds", 0.0),
+        ttft_seconds=metrics.get("ttft_seconds"),
+        stages=metrics.get("stages", {}),
+        token_usage=metrics.get("token_usage", {}),
+        allowed_doc_ids=doc_ids,
+        prompt=metrics.get("prompt", {}),
+    )
+
+
+def _iter_entries(path: str) -> Iterator[Dict[str, Any]]:
+    """Liest die JSON-Objekte einer Log-Datei zeilenweise; fehlerhafte Zeilen werden übersprungen."""
+    with open_log_file(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = _loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                yield entry
+
+
+def _resolve_files(source: Union[str, Sequence[str]]) -> List[str]:
+    """Akzeptiert einen Ordner, eine einzelne Datei oder eine Liste von Dateien."""
+    if isinstance(source, str):
+        return find_log_files(source) if os.path.isdir(source) else [source]
+    return list(source)
+
+
+def iter_records(source: Union[str, Sequence[str]]) -> Iterator[AuditRecord]:
+    """
+    Streamt alle Audit-Einträge eines Log-Ordners (inkl. komprimierter Segmente) als `AuditRecord`.
+
+    Der Speicherbedarf ist unabhängig von der Log-Größe, da immer nur eine Zeile
+    gleichzeitig verarbeitet wird.
+
+    Args:
+        source: Log-Ordner, einzelne Log-Datei oder Liste von Log-Dateien.
+    """
+    for path in _resolve_files(source):
+        for entry in _iter_entries(path):
+            yield parse_record(entry)
+
+
+def _parse_file_columns(path: str, columns: Sequence[str]) -> Dict[str, list]:
+    """Parst eine Log-Datei direkt in Spaltenlisten (läuft in einem Worker-Prozess)."""
+    data: Dict[str, list] = {column: [] for column in columns}
+    wanted = set(columns)
+    for entry in _iter_entries(path):
+        metrics = entry.get("metrics", {})
+        stages = metrics.get("stages", {})
+        usage = metrics.get("token_usage", {})
+        prompt = metrics.get("prompt", {})
+        row = {
+            "timestamp": entry.get("timestamp", ""),
+            "role": entry.get("role", "Unknown"),
+            "query": entry.get("query", ""),
+            "response_preview": entry.get("response_preview", entry.get("response_content", "")) or "",
+            "allowed_docs_count": metrics.get("allowed_docs_count", 0),
+            "blocked_docs_count": metrics.get("blocked_docs_count", 0),
+            "latency_seconds": metrics.get("latency_seconds", 0.0),
+            "ttft_seconds": metrics.get("ttft_seconds", NAN),
+            "prompt_tokens": usage.get("prompt_tokens", NAN),
+            "completion_tokens": usage.get("completion_tokens", NAN),
+            "total_tokens": usage.get("total_tokens", NAN),
+            "cached_tokens": usage.get("cached_tokens", NAN),
+            "prompt_tokens_local": prompt.get("tokens", NAN),
+            "prompt_token_budget": prompt.get("budget", NAN),
+        }
+        if "allowed_doc_ids" in wanted:
+            row["allowed_doc_ids"] = ", ".join(parse_record(entry).allowed_doc_ids)
+        for stage in STAGES:
+            row[f"stage_{stage}"] = stages.get(stage, NAN)
+        for column in columns:
+            data[column].append(row[column])
+    return data
+
+
+def load_dataframe(
+    source: Union[str, Sequence[str]],
+    columns: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None
+):
+    """
+    Lädt Audit-Logs spaltenweise in einen pandas DataFrame.
+
+    Jede Datei wird (bei mehreren Dateien) in einem eigenen Prozess geparst; die
+    Worker liefern bereits fertige Spaltenlisten, die ohne Zwischenschritt über
+    Python-Dicts pro Zeile zum DataFrame zusammengesetzt werden.
+
+    Args:
+        source: Log-Ordner, einzelne Log-Datei oder Liste von Log-Dateien.
+        columns: Zu ladende Spalten (Standard: alle, siehe COLUMNS).
+        workers: Anzahl Worker-Prozesse (Standard: Anzahl CPU-Kerne; 1 = ohne Pool).
+
+    Returns:
+        pandas.DataFrame: Eine Zeile je Audit-Eintrag (leer, wenn keine Einträge vorhanden).
+    """
+    import pandas as pd
+
+    columns = list(columns or COLUMNS)
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unbekannte Spalten: {sorted(unknown)}")
+
+    files = _resolve_files(source)
+    workers = workers or os.cpu_count() or 1
+
+    if len(files) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            parts = list(pool.map(_parse_file_columns, files, [columns] * len(files)))
+    else:
+        parts = [_parse_file_columns(path, columns) for path in files]
+
+    merged = {column: [value for part in parts for value in part[column]] for column in columns}
+    return pd.DataFrame(merged, columns=columns)
@@ -0,0 +1,145 @@
+import io
+import os
+import json
+import glob
+import gzip
+from datetime import datetime
+from typing import List, Dict, Any, Optional, IO
+
+# Optionale zstd-Kompression (Paket 'zstandard'); ohne das Paket wird gzip verwendet.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Endungen der Log-Dateien, die von den Auswertungsskripten gelesen werden
+LOG_PATTERNS = ["*.jsonl", "*.json", "*.jsonl.gz", "*.jsonl.zst"]
+INDEX_SUFFIX = ".segments.json"
+
+
+def segment_index_path(log_path: str) -> str:
+    """Pfad des Segment-Index zur aktiven Log-Datei (z. B. 'audit_log.segments.json')."""
+    stem = log_path[:-len(".jsonl")] if log_path.endswith(".jsonl") else log_path
+    return stem + INDEX_SUFFIX
+
+
+def load_segment_index(log_path: str) -> Dict[str, Any]:
+    """Lädt den Index der rotierten Segmente (leer, falls noch keine Rotation stattfand)."""
+    index_path = segment_index_path(log_path)
+    if not os.path.exists(index_path):
+        return {"segments": []}
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_segment_index(log_path: str, index: Dict[str, Any]) -> None:
+    index_path = segment_index_path(log_path)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
+
+
+def read_first_timestamp(path: str) -> Optional[datetime]:
+    """Liest den Zeitstempel des ersten Eintrags einer (unkomprimierten) Log-Datei."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            first_line = f.readline()
+        return datetime.fromisoformat(json.loads(first_line)["timestamp"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def resolve_compression(compression: str) -> str:
+    """Prüft die gewünschte Kompression und fällt ohne 'zstandard' auf gzip zurück."""
+    if compression == "zstd" and zstandard is None:
+        print("⚠️ Warnung: Paket 'zstandard' nicht installiert, verwende gzip.")
+        return "gzip"
+    if compression not in ("gzip", "zstd"):
+        raise ValueError(f"Unbekannte Kompression: '{compression}'. Erlaubt: 'gzip', 'zstd'")
+    return compression
+
+
+def rotate_segment(log_path: str, start: datetime, end: datetime, compression: str = "gzip") -> str:
+    """
+    Schließt die aktive Log-Datei als Segment ab, komprimiert es und trägt es in den Index ein.
+
+    Die Datei wird zunächst umbenannt (die aktive Datei ist damit sofort frei für neue
+    Einträge), anschließend komprimiert; die unkomprimierte Kopie wird entfernt.
+
+    Args:
+        log_path (str): Pfad der aktiven Log-Datei (z. B. 'audit_log.jsonl').
+        start (datetime): Zeitstempel des ersten Eintrags im Segment.
+        end (datetime): Zeitstempel des letzten Eintrags im Segment.
+        compression (str): 'gzip' oder 'zstd'.
+
+    Returns:
+        str: Pfad des komprimierten Segments.
+    """
+    stem = log_path[:-len(".jsonl")] if log_path.endswith(".jsonl") else log_path
+    base = f"{stem}.{start:%Y%m%dT%H%M%S}"
+    # Mehrere Rotationen innerhalb derselben Sekunde erhalten ein Suffix
+    candidate, suffix = base, 0
+    while glob.glob(candidate + ".jsonl*"):
+        suffix += 1
+        candidate = f"{base}-{suffix}"
+    base = candidate
+
+    closed_path = base + ".jsonl"
+    os.replace(log_path, closed_path)
+
+    extension = ".zst" if compression == "zstd" else ".gz"
+    segment_path = closed_path + extension
+    entries = 0
+    with open(closed_path, "rb") as src:
+        if compression == "zstd":
+            with open(segment_path, "wb") as raw, zstandard.ZstdCompressor().stream_writer(raw) as dst:
+                for line in src:
+                    entries += 1
+                    dst.write(line)
+        else:
+            with gzip.open(segment_path, "wb") as dst:
+                for line in src:
+                    entries += 1
+                    dst.write(line)
+    os.remove(closed_path)
+
+    index = load_segment_index(log_path)
+    index["segments"].append({
+        "file": os.path.basename(segment_path),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "entries": entries,
+        "bytes": os.path.getsize(segment_path),
+        "compression": compression
+    })
+    _save_segment_index(log_path, index)
+    return segment_path
+
+
+def open_log_file(path: str) -> IO[str]:
+    """
+    Öffnet eine Log-Datei zum zeilenweisen Lesen - unabhängig davon, ob sie
+    unkomprimiert (.jsonl/.json), gzip- (.gz) oder zstd-komprimiert (.zst) ist.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError(f"Für '{path}' wird das Paket 'zstandard' benötigt.")
+        raw = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def find_log_files(directory: str) -> List[str]:
+    """
+    Sammelt alle Log-Dateien eines Ordners (aktive Logs und komprimierte Segmente).
+
+    Segment-Indexdateien werden ausgelassen, da sie keine Audit-Einträge enthalten.
+    """
+    files = []
+    for pattern in LOG_PATTERNS:
+        files.extend(glob.glob(os.path.join(directory, pattern)))
+    return sorted(path for path in set(files) if not path.endswith(INDEX_SUFFIX))
+
@@ -0,0 +1,191 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Sequence, Tuple
+import dotenv
+import numpy as np
+
+from app.rag.embedding_cache import normalize_text
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))              # Max. Anzahl Antworten (LRU)
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))              # Lebensdauer in Sekunden (0 = unbegrenzt)
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # Kosinus-Schwelle für ähnliche Fragen
+
+# Kontext-Schlüssel: (Rolle, erlaubte Dokument-IDs, Index-Version, Policy-Version)
+ContextKey = Tuple[str, frozenset, Optional[str], Optional[str]]
+
+
+class AnswerCache:
+    """
+    Rollen- und policy-bewusster Cache für generierte Antworten.
+
+    Eine Antwort wird nur wiederverwendet, wenn Rolle, Menge der freigegebenen
+    Dokumente, Index-Version und Policy-Version exakt übereinstimmen. Damit kann
+    eine Antwort weder zwischen Rollen geteilt werden noch eine Neuklassifizierung
+    von Dokumenten oder eine Policy-Änderung überdauern.
+
+    Innerhalb desselben Kontexts trifft der Cache sowohl bei identischer
+    (normalisierter) Frage als auch bei inhaltlich nahezu gleichen Fragen
+    (Kosinus-Ähnlichkeit der Frage-Embeddings über `similarity_threshold`).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        ttl_seconds: float = ANSWER_CACHE_TTL,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY
+    ):
+        """
+        Args:
+            max_entries (int): Maximale Anzahl gespeicherter Antworten (LRU-Verdrängung).
+            ttl_seconds (float): Lebensdauer einer Antwort in Sekunden (0 = unbegrenzt).
+            similarity_threshold (float): Mindest-Kosinus-Ähnlichkeit für einen semantischen Treffer.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # (Kontext, normalisierte Frage) -> Eintrag; Reihenfolge = LRU
+        self._entries: "OrderedDict[Tuple[ContextKey, str], Dict[str, Any]]" = OrderedDict()
+        # Kontext -> normalisierte Fragen (für die Ähnlichkeitssuche)
+        self._by_context: Dict[ContextKey, Dict[str, None]] = {}
+        self._lock = threading.Lock()
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def context_key(
+        user_role: str,
+        allowed_doc_ids: Sequence[str],
+        index_version: Optional[str],
+        policy_version: Optional[str]
+    ) -> ContextKey:
+        """Bildet den Kontext-Schlüssel einer Anfrage."""
+        return (user_role, frozenset(allowed_doc_ids), index_version, policy_version)
+
+    def _drop(self, key: Tuple[ContextKey, str]) -> None:
+        """Entfernt einen Eintrag (Aufruf nur mit gehaltenem Lock)."""
+        self._entries.pop(key, None)
+        context, normalized = key
+        questions = self._by_context.get(context)
+        if questions is not None:
+            questions.pop(normalized, None)
+            if not questions:
+                del self._by_context[context]
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry["created"] > self.ttl_seconds
+
+    def lookup(self, context: ContextKey, query: str, query_vec: Optional[Sequence[float]]) -> Optional[Dict[str, Any]]:
+        """
+        Sucht eine gespeicherte Antwort für die Frage im gegebenen Kontext.
+
+        Args:
+            context (ContextKey): Ergebnis von `context_key`.
+            query (str): Die Frage des Benutzers.
+            query_vec (Sequence[float], optional): Embedding der Frage (None = nur exakte Treffer).
+
+        Returns:
+            Optional[Dict[str, Any]]: 'answer', 'token_usage', 'match' ('exact' oder
+                'semantic') und 'similarity' - oder None bei einem Fehltreffer.
+        """
+        normalized = normalize_text(query)
+        now = time.monotonic()
+        with self._lock:
+            key = (context, normalized)
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits_exact += 1
+                return {"answer": entry["answer"], "token_usage": entry["token_usage"], "match": "exact", "similarity": 1.0}
+
+            # Semantische Suche nur unter Fragen mit identischem Kontext
+            best_key, best_similarity = None, self.similarity_threshold
+            vector = _unit(query_vec) if query_vec is not None else None
+            for question in list(self._by_context.get(context, ()) if vector is not None else ()):
+                candidate_key = (context, question)
+                candidate = self._entries[candidate_key]
+                if self._expired(candidate, now):
+                    self._drop(candidate_key)
+                    continue
+                if candidate["vector"] is None:
+                    continue
+                similarity = float(np.dot(candidate["vector"], vector))
+                if similarity >= best_similarity:
+                    best_key, best_similarity = candidate_key, similarity
+
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits_semantic += 1
+            entry = self._entries[best_key]
+            return {"answer": entry["answer"], "token_usage": entry["token_usage"], "match": "semantic", "similarity": best_similarity}
+
+    def store(
+        self,
+        context: ContextKey,
+        query: str,
+        query_vec: Optional[Sequence[float]],
+        answer: str,
+        token_usage: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        Speichert eine generierte Antwort.
+
+        Args:
+            context (ContextKey): Ergebnis von `context_key`.
+            query (str): Die Frage des Benutzers.
+            query_vec (Sequence[float], optional): Embedding der Frage (None = nur exakt auffindbar).
+            answer (str): Die generierte Antwort.
+            token_usage (Dict[str, int], optional): Token-Verbrauch der ursprünglichen Generierung.
+        """
+        if self.max_entries <= 0 or not answer:
+            return
+        key = (context, normalize_text(query))
+        with self._lock:
+            self._entries[key] = {
+                "answer": answer,
+                "token_usage": token_usage,
+                "vector": _unit(query_vec) if query_vec is not None else None,
+                "created": time.monotonic()
+            }
+            self._entries.move_to_end(key)
+            self._by_context.setdefault(context, {})[key[1]] = None
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def clear(self, *_: Any) -> None:
+        """Leert den Cache (z. B. als Listener bei einer Policy-Änderung)."""
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Kumulierte Zähler des Caches (für Audit-Log und Benchmarks)."""
+        with self._lock:
+            return {
+                "hits_exact": self.hits_exact,
+                "hits_semantic": self.hits_semantic,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries)
+            }
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    """Normiert einen Vektor auf Länge 1 (Skalarprodukt = Kosinus-Ähnlichkeit)."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm > 0 else array
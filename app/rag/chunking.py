@@ -0,0 +1,156 @@
+import os
+import re
+from typing import List, Dict, Any, Iterable, Tuple
+import dotenv
+
+from app.rag.tokens import count_tokens, counter_name
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+# Zerlegung langer Dokumente beim Indexieren:
+# - 'sentences': Sätze werden bis CHUNK_SIZE Tokens zusammengefasst (überlange Sätze wortweise geteilt).
+# - 'tokens':    Fenster von CHUNK_SIZE Tokens an Wortgrenzen.
+# - 'none':      ein Vektor je Dokument (bisheriges Verhalten).
+# Dokumente, die in einen Chunk passen, behalten ihre ID und ihren Text unverändert
+# (außer IDs, die selbst wie eine Chunk-ID enden, siehe `chunk_document`).
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "sentences")
+CHUNK_STRATEGIES = ("sentences", "tokens", "none")
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "256"))        # Max. Tokens je Chunk
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "32"))   # Tokens, die der folgende Chunk wiederholt
+
+# Chunk-IDs: '<Dokument-ID>#c<Index>' (z. B. 'doc_03#c2')
+CHUNK_ID_SEPARATOR = "#c"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*")
+_WORD = re.compile(r"\S+\s*")
+
+
+def chunk_id(parent_id: str, index: int) -> str:
+    """Bildet die ID des `index`-ten Chunks eines Dokuments."""
+    return f"{parent_id}{CHUNK_ID_SEPARATOR}{index}"
+
+
+def parse_chunk_id(doc_id: str) -> Tuple[str, int]:
+    """Zerlegt eine Chunk-ID in (Dokument-ID, Chunk-Index); ungeteilte Dokumente liefern Index 0."""
+    parent_id, separator, index = doc_id.rpartition(CHUNK_ID_SEPARATOR)
+    if separator and index.isdigit():
+        return parent_id, int(index)
+    return doc_id, 0
+
+
+def chunking_signature(strategy: str = CHUNK_STRATEGY, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> str:
+    """Kennung der Chunking-Konfiguration (für Manifest und Index-Version).
+
+    Enthält das Zählverfahren, da tiktoken und die Näherung unterschiedliche Chunk-Grenzen liefern.
+    """
+    return "none" if strategy == "none" else f"{strategy}:{size}:{overlap}:{counter_name()}"
+
+
+def _sentence_units(text: str) -> List[Tuple[int, int]]:
+    """Satz-Spannen (Start, Ende) inkl. nachfolgender Leerzeichen."""
+    units, start = [], 0
+    for match in _SENTENCE_END.finditer(text):
+        if match.start() > start:
+            units.append((start, match.end()))
+            start = match.end()
+    if start < len(text):
+        units.append((start, len(text)))
+    return units
+
+
+def _word_units(text: str, offset: int = 0) -> List[Tuple[int, int]]:
+    """Wort-Spannen (Start, Ende) inkl. nachfolgender Leerzeichen."""
+    return [(offset + match.start(), offset + match.end()) for match in _WORD.finditer(text)]
+
+
+def _pack(text: str, units: List[Tuple[int, int]], size: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Fasst aufeinanderfolgende Einheiten zu Chunks von höchstens `size` Tokens zusammen.
+
+    Jeder Chunk beginnt mit den letzten Einheiten seines Vorgängers (bis zu `overlap`
+    Tokens), damit Aussagen an Chunk-Grenzen in beiden Vektoren enthalten sind.
+    """
+    tokens = [max(count_tokens(text[start:end]), 1) for start, end in units]
+    spans = []
+    first = 0
+    while first < len(units):
+        last, total = first, tokens[first]
+        while last + 1 < len(units) and total + tokens[last + 1] <= size:
+            last += 1
+            total += tokens[last]
+        spans.append((units[first][0], units[last][1]))
+        if last + 1 >= len(units):
+            break
+        next_first, carried = last + 1, 0
+        while next_first - 1 > first and carried + tokens[next_first - 1] <= overlap:
+            next_first -= 1
+            carried += tokens[next_first]
+        first = next_first
+    return spans
+
+
+def chunk_document(
+    doc: Dict[str, Any],
+    strategy: str = CHUNK_STRATEGY,
+    size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP
+) -> List[Dict[str, Any]]:
+    """
+    Zerlegt ein Dokument aus `documents.json` in Chunks.
+
+    Jeder Chunk erbt die Metadaten des Dokuments (insbesondere 'classification'
+    für den RBAC-Filter) und erhält zusätzlich 'parent_id', 'chunk_index' und
+    'chunk_count'.
+
+    Args:
+        doc: Dokument mit 'id', 'content' und 'metadata'.
+        strategy (str): 'sentences', 'tokens' oder 'none' (siehe CHUNK_STRATEGY).
+        size (int): Maximale Tokens je Chunk.
+        overlap (int): Tokens, die der folgende Chunk wiederholt.
+
+    Returns:
+        List[Dict[str, Any]]: Chunks im Format von `documents.json`.
+    """
+    if strategy not in CHUNK_STRATEGIES:
+        raise ValueError(f"Unbekannte Chunking-Strategie: '{strategy}'. Erlaubt: {CHUNK_STRATEGIES}")
+    if overlap >= size:
+        raise ValueError(f"CHUNK_OVERLAP ({overlap}) muss kleiner als CHUNK_SIZE ({size}) sein.")
+
+    text = doc["content"]
+    if strategy == "none" or count_tokens(text) <= size:
+        spans = None
+    else:
+        if strategy == "sentences":
+            units = []
+            for start, end in _sentence_units(text):
+                if count_tokens(text[start:end]) > size:
+                    units.extend(_word_units(text[start:end], start))
+                else:
+                    units.append((start, end))
+        else:
+            units = _word_units(text)
+        spans = _pack(text, units, size, overlap)
+
+    if not spans or len(spans) == 1:
+        # Eine ID wie 'doc#c3' würde `parse_chunk_id` als Chunk 3 von 'doc' lesen;
+        # mit explizitem Chunk-Suffix ('doc#c3#c0') bleibt die Zuordnung eindeutig.
+        single_id = doc["id"] if parse_chunk_id(doc["id"])[0] == doc["id"] else chunk_id(doc["id"], 0)
+        return [{
+            "id": single_id,
+            "content": text,
+            "metadata": {**doc["metadata"], "parent_id": doc["id"], "chunk_index": 0, "chunk_count": 1}
+        }]
+    return [
+        {
+            "id": chunk_id(doc["id"], index),
+            "content": text[start:end].strip(),
+            "metadata": {**doc["metadata"], "parent_id": doc["id"], "chunk_index": index, "chunk_count": len(spans)}
+        }
+        for index, (start, end) in enumerate(spans)
+    ]
+
+
+def chunk_documents(documents: Iterable[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+    """Zerlegt mehrere Dokumente (Parameter wie `chunk_document`) in eine flache Chunk-Liste."""
+    return [chunk for doc in documents for chunk in chunk_document(doc, **kwargs)]
@@ -0,0 +1,148 @@
+import os
+from typing import List, Dict, NamedTuple, Optional, Sequence, Tuple
+import dotenv
+
+from app.rag.chunking import parse_chunk_id
+from app.rag.tokens import count_tokens, truncate_to_tokens
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+# Maximale Größe des gesamten Prompts (System-Anweisungen, Kontext und Frage) in Tokens.
+# Der Kontext erhält das Budget, das nach den festen Bestandteilen übrig bleibt.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Kürzere Reste werden nicht mehr mit einem gekürzten Dokument aufgefüllt
+CONTEXT_MIN_TRUNCATION_TOKENS = int(os.getenv("CONTEXT_MIN_TRUNCATION_TOKENS", "64"))
+
+# Trenner zwischen den Dokumenten im Kontext bzw. zwischen nicht benachbarten Chunks
+CONTEXT_SEPARATOR = "\n\n"
+CHUNK_GAP_MARKER = " […] "
+
+
+class ContextDocument(NamedTuple):
+    """Ein Dokument im Prompt-Kontext, zusammengesetzt aus einem oder mehreren Chunks."""
+    doc_id: str
+    chunk_ids: List[str]
+    content: str
+    tokens: int
+    score: float
+    truncated: bool = False
+
+
+def _stitch(left: str, right: str) -> str:
+    """Hängt den Folge-Chunk an und entfernt dabei die Überlappung (an Wortgrenzen)."""
+    for size in range(min(len(left), len(right)), 0, -1):
+        at_boundary = size == len(right) or right[size].isspace() or right[size - 1].isspace()
+        if at_boundary and left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left} {right}"
+
+
+def _merge(parent_id: str, chunks: List[Tuple[int, str, str, float]]) -> ContextDocument:
+    """Setzt die Chunks eines Dokuments in Dokumentreihenfolge zusammen (Score = bester Chunk)."""
+    ordered = sorted(chunks)
+    text, previous = "", None
+    for index, _, content, _ in ordered:
+        if previous is None:
+            text = content
+        elif index == previous + 1:
+            text = _stitch(text, content)
+        else:
+            text += CHUNK_GAP_MARKER + content
+        previous = index
+    return ContextDocument(
+        parent_id,
+        [chunk_id for _, chunk_id, _, _ in ordered],
+        text,
+        count_tokens(text),
+        max(score for _, _, _, score in chunks)
+    )
+
+
+def _rank_scores(count: int) -> List[float]:
+    """Ersatz-Scores aus der Rangfolge, falls keine Ähnlichkeitswerte vorliegen."""
+    return [1.0 / (rank + 1) for rank in range(count)]
+
+
+def merge_chunks(
+    chunk_ids: List[str],
+    contents: List[str],
+    scores: Optional[Sequence[float]] = None
+) -> List[ContextDocument]:
+    """
+    Führt Chunks desselben Dokuments zusammen.
+
+    Die Dokumente werden absteigend nach dem besten Score ihrer Chunks sortiert;
+    innerhalb eines Dokuments werden die Chunks in Textreihenfolge verbunden.
+    """
+    scores = list(scores) if scores is not None else _rank_scores(len(chunk_ids))
+    groups: Dict[str, List[Tuple[int, str, str, float]]] = {}
+    for doc_id, content, score in zip(chunk_ids, contents, scores):
+        parent_id, index = parse_chunk_id(doc_id)
+        groups.setdefault(parent_id, []).append((index, doc_id, content, score))
+    documents = [_merge(parent_id, chunks) for parent_id, chunks in groups.items()]
+    return sorted(documents, key=lambda document: -document.score)
+
+
+def assemble_context(
+    chunk_ids: List[str],
+    contents: List[str],
+    budget: int,
+    scores: Optional[Sequence[float]] = None
+) -> List[ContextDocument]:
+    """
+    Stellt den Prompt-Kontext aus den (RBAC-geprüften) Chunks unter einem Token-Budget zusammen.
+
+    Dokumente werden nach Ähnlichkeit übernommen. Passt ein Dokument nicht mehr
+    vollständig ins Budget, werden zunächst nur seine besten Chunks übernommen,
+    die noch hineinpassen; passt keiner, wird das Dokument auf das Restbudget
+    gekürzt (sofern mindestens CONTEXT_MIN_TRUNCATION_TOKENS übrig sind).
+
+    Args:
+        chunk_ids (List[str]): IDs der erlaubten Chunks.
+        contents (List[str]): Texte der Chunks.
+        budget (int): Maximale Tokens des Kontexts (inkl. Trenner).
+        scores (Sequence[float], optional): Ähnlichkeit je Chunk (höher = relevanter);
+            ohne Angabe entscheidet die Reihenfolge.
+
+    Returns:
+        List[ContextDocument]: Kontext-Dokumente in absteigender Relevanz.
+    """
+    scores = list(scores) if scores is not None else _rank_scores(len(chunk_ids))
+    separator_tokens = count_tokens(CONTEXT_SEPARATOR)
+    selected, used = [], 0
+    for document in merge_chunks(chunk_ids, contents, scores):
+        cost = separator_tokens if selected else 0
+        if used + cost + document.tokens <= budget:
+            selected.append(document)
+            used += cost + document.tokens
+            continue
+
+        # Nur die besten Chunks dieses Dokuments, die noch ins Budget passen
+        chunks = sorted(
+            (score, doc_id, content) for doc_id, content, score in zip(chunk_ids, contents, scores)
+            if parse_chunk_id(doc_id)[0] == document.doc_id
+        )
+        fitting, fitting_tokens = [], 0
+        for score, doc_id, content in reversed(chunks):
+            tokens = count_tokens(content)
+            if used + cost + fitting_tokens + tokens <= budget:
+                fitting.append((parse_chunk_id(doc_id)[1], doc_id, content, score))
+                fitting_tokens += tokens
+        partial = _merge(document.doc_id, fitting) if fitting and len(fitting) < len(chunks) else None
+        # Lückenmarker zwischen nicht benachbarten Chunks kosten zusätzliche Tokens:
+        # notfalls den schwächsten Chunk wieder entfernen
+        while partial is not None and used + cost + partial.tokens > budget:
+            fitting.pop()
+            partial = _merge(document.doc_id, fitting) if fitting else None
+        if partial is not None:
+            selected.append(partial)
+            used += cost + partial.tokens
+            continue
+
+        remaining = budget - used - cost
+        if remaining >= CONTEXT_MIN_TRUNCATION_TOKENS:
+            content = truncate_to_tokens(document.content, remaining)
+            selected.append(document._replace(content=content, tokens=count_tokens(content), truncated=True))
+            used += cost + count_tokens(content)
+    return selected
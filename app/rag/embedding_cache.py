@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Callable, Optional, Sequence
+import dotenv
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+# Pfad zur persistenten Cache-Datenbank. Ein leerer Wert deaktiviert die Persistenz
+# (dann wird nur der In-Memory-Cache verwendet).
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite3")
+# Anzahl der Vektoren, die zusätzlich im Arbeitsspeicher gehalten werden (LRU).
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "1024"))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalisiert einen Text vor der Vektorisierung.
+
+    Zeilenumbrüche und mehrfache Leerzeichen werden zusammengefasst und die
+    Unicode-Darstellung vereinheitlicht (NFC). Derselbe normalisierte Text wird
+    sowohl an die Embedding-API gesendet als auch als Cache-Schlüssel verwendet.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> str:
+    """Berechnet den inhaltsadressierten Schlüssel (SHA-256) eines normalisierten Textes."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Inhaltsadressierter Cache für Embeddings mit SQLite-Persistenz und LRU-Speicher.
+
+    Der Schlüssel setzt sich aus dem Modellnamen und dem Hash des normalisierten
+    Textes zusammen, sodass wiederholte Anfragen und unveränderte Dokumente
+    keinen erneuten API-Aufruf auslösen. Die Vektoren werden als float32-BLOB
+    gespeichert.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, memory_size: int = EMBEDDING_CACHE_MEMORY_SIZE):
+        """
+        Args:
+            path (str): Pfad zur SQLite-Datei (leer = nur In-Memory).
+            memory_size (int): Maximale Anzahl Vektoren im LRU-Speicher.
+        """
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Zugriff aus mehreren Threads wird über self._lock serialisiert.
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+            self._db.commit()
+
+    def _remember(self, key: tuple, vector: List[float]) -> None:
+        """Legt einen Vektor im LRU-Speicher ab und verdrängt ggf. den ältesten Eintrag."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Liest die Vektoren mehrerer (bereits normalisierter) Texte aus dem Cache.
+
+        Returns:
+            List[Optional[List[float]]]: Vektor je Text oder None bei einem Cache-Miss.
+        """
+        keys = [(model, text_hash(text)) for text in texts]
+        found: List[Optional[List[float]]] = [None] * len(keys)
+
+        with self._lock:
+            missing = []
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                else:
+                    missing.append(i)
+
+            if missing and self._db is not None:
+                hashes = list({keys[i][1] for i in missing})
+                stored = {}
+                # SQLite begrenzt die Anzahl der Parameter pro Abfrage
+                for start in range(0, len(hashes), 500):
+                    chunk = hashes[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                        [model, *chunk]
+                    )
+                    for row_hash, blob in rows:
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        stored[row_hash] = vector.tolist()
+                for i in missing:
+                    vector = stored.get(keys[i][1])
+                    if vector is not None:
+                        found[i] = vector
+                        self._remember(keys[i], vector)
+
+            hit_count = sum(1 for vector in found if vector is not None)
+            self.hits += hit_count
+            self.misses += len(found) - hit_count
+        return found
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        """Speichert die Vektoren mehrerer (bereits normalisierter) Texte im Cache."""
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = (model, text_hash(text))
+                vector = list(vector)
+                self._remember(key, vector)
+                rows.append((model, key[1], len(vector), array("f", vector).tobytes()))
+            if self._db is not None and rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._db.commit()
+
+    def get_or_compute(
+        self,
+        model: str,
+        texts: Sequence[str],
+        compute: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """
+        Liefert die Vektoren für alle Texte und berechnet nur die fehlenden.
+
+        Die Texte werden normalisiert; Duplikate innerhalb eines Aufrufs werden
+        nur einmal an `compute` übergeben.
+
+        Args:
+            model (str): Name des Embedding-Modells (Teil des Cache-Schlüssels).
+            texts (Sequence[str]): Die zu vektorisierenden Texte.
+            compute (Callable): Erzeugt die Vektoren für eine Liste normalisierter Texte
+                (z. B. ein einzelner Batch-Aufruf der Embedding-API).
+
+        Returns:
+            List[List[float]]: Ein Vektor je Eingabetext, in derselben Reihenfolge.
+        """
+        normalized = [normalize_text(text) for text in texts]
+        vectors = self.get_many(model, normalized)
+
+        pending: Dict[str, List[int]] = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                pending.setdefault(normalized[i], []).append(i)
+
+        if pending:
+            missing_texts = list(pending)
+            computed = compute(missing_texts)
+            self.put_many(model, missing_texts, computed)
+            for text, vector in zip(missing_texts, computed):
+                for i in pending[text]:
+                    vectors[i] = list(vector)
+
+        return vectors
+
+    def close(self) -> None:
+        """Schließt die Verbindung zur Cache-Datenbank."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import math
+from typing import List, Dict, Any, Iterable, NamedTuple, Optional, Sequence, Tuple
+import dotenv
+import numpy as np
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+# Persistierter BM25-Index (wird von build_index.py neben der Chroma-Collection erzeugt).
+# Ein leerer Wert bedeutet: Index beim Start aus der Collection aufbauen.
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "./data/lexical_index.json")
+
+# BM25-Parameter (Standardwerte nach Robertson/Zaragoza)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+# Häufige deutsche Funktionswörter ohne Aussagekraft für die Suche
+STOPWORDS = frozenset("""
+    der die das den dem des ein eine einer eines einem einen und oder aber für von mit auf aus bei
+    im in ist sind war wird werden wie was wer wo welche welcher welches gibt es ich du sie wir ihr
+    zu zum zur am an als auch nicht noch nur so dass hat haben kann können soll sollen
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Zerlegt einen Text in kleingeschriebene Suchbegriffe (ohne Stoppwörter)."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalHit(NamedTuple):
+    """Treffer der lexikalischen Suche."""
+    id: str
+    score: float
+    content: str
+    classification: str
+
+
+class BM25Index:
+    """
+    Invertierter Index mit BM25-Ranking für exakte Begriffe (Projektnamen, Standorte, Daten).
+
+    Die BM25-Gewichte jedes Posting-Eintrags werden beim Aufbau vorberechnet, sodass
+    eine Suche nur noch die Gewichte der Anfragebegriffe aufsummiert. Zu jedem
+    Dokument wird die Klassifizierung gespeichert, damit die Suche (wie die
+    Vektorsuche im Modus 'prefilter') auf die erlaubten Klassifizierungen einer
+    Rolle eingeschränkt werden kann.
+    """
+
+    def __init__(
+        self,
+        doc_ids: List[str],
+        contents: List[str],
+        classifications: List[str],
+        postings: Dict[str, tuple],
+        version: Optional[str] = None
+    ):
+        self.doc_ids = doc_ids
+        self.contents = contents
+        self.classifications = classifications
+        self.version = version
+        # Begriff -> (Dokument-Indizes, vorberechnete BM25-Gewichte)
+        self.postings = postings
+        self._class_names = sorted(set(classifications))
+        self._class_codes = np.array(
+            [self._class_names.index(c) for c in classifications], dtype=np.int16
+        ) if classifications else np.zeros(0, dtype=np.int16)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(cls, documents: Iterable[Dict[str, Any]], version: Optional[str] = None) -> "BM25Index":
+        """
+        Baut den Index aus Dokumenten im Format von `documents.json` auf.
+
+        Args:
+            documents: Dokumente mit 'id', 'content' und 'metadata.classification'.
+            version (str, optional): Index-Version (siehe app/rag/manifest.py).
+        """
+        doc_ids, contents, classifications = [], [], []
+        term_freqs: Dict[str, Dict[int, int]] = {}
+        lengths = []
+        for index, doc in enumerate(documents):
+            doc_ids.append(doc["id"])
+            contents.append(doc["content"])
+            classifications.append(doc.get("metadata", {}).get("classification", "internal"))
+            tokens = tokenize(doc["content"])
+            lengths.append(len(tokens))
+            for token in tokens:
+                counts = term_freqs.setdefault(token, {})
+                counts[index] = counts.get(index, 0) + 1
+
+        total = len(doc_ids)
+        lengths = np.asarray(lengths, dtype=np.float32)
+        avg_length = float(lengths.mean()) if total else 0.0
+        # Längennormalisierung je Dokument: k1 * (1 - b + b * |d| / avgdl)
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length) if total and avg_length else lengths
+
+        postings = {}
+        for term, counts in term_freqs.items():
+            indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            idf = math.log(1 + (total - len(counts) + 0.5) / (len(counts) + 0.5))
+            postings[term] = (indices, (idf * tf * (BM25_K1 + 1) / (tf + norms[indices])).astype(np.float32))
+        return cls(doc_ids, contents, classifications, postings, version)
+
+    @classmethod
+    def from_collection(cls, collection: Any, version: Optional[str] = None) -> "BM25Index":
+        """Baut den Index aus dem Bestand einer ChromaDB-Collection auf (Fallback ohne Indexdatei)."""
+        data = collection.get(include=["documents", "metadatas"])
+        documents = [
+            {"id": doc_id, "content": content or "", "metadata": metadata or {}}
+            for doc_id, content, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+        ]
+        return cls.build(documents, version)
+
+    def search(self, query: str, k: int, allowed_classifications: Optional[Sequence[str]] = None) -> List[LexicalHit]:
+        """
+        Liefert die `k` besten Dokumente zur Anfrage (absteigend nach BM25-Score).
+
+        Args:
+            query (str): Die Suchanfrage.
+            k (int): Maximale Anzahl Treffer.
+            allowed_classifications (Sequence[str], optional): Nur Dokumente dieser
+                Klassifizierungen berücksichtigen (None = alle).
+
+        Returns:
+            List[LexicalHit]: Treffer mit Score > 0.
+        """
+        if not self.doc_ids or k <= 0:
+            return []
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                indices, weights = posting
+                scores[indices] += weights
+
+        if allowed_classifications is not None:
+            allowed_codes = [self._class_names.index(c) for c in allowed_classifications if c in self._class_names]
+            scores[~np.isin(self._class_codes, allowed_codes)] = 0.0
+
+        candidates = np.flatnonzero(scores)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [
+            LexicalHit(self.doc_ids[i], float(scores[i]), self.contents[i], self.classifications[i])
+            for i in ranked
+        ]
+
+    def save(self, path: str = LEXICAL_INDEX_PATH) -> None:
+        """Speichert den Index atomar als JSON (temporäre Datei + Umbenennen)."""
+        data = {
+            "version": self.version,
+            "doc_ids": self.doc_ids,
+            "contents": self.contents,
+            "classifications": self.classifications,
+            "postings": {
+                term: [indices.tolist(), weights.tolist()] for term, (indices, weights) in self.postings.items()
+            }
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = LEXICAL_INDEX_PATH) -> Optional["BM25Index"]:
+        """Lädt einen gespeicherten Index (None, falls die Datei fehlt)."""
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        postings = {
+            term: (np.asarray(indices, dtype=np.int32), np.asarray(weights, dtype=np.float32))
+            for term, (indices, weights) in data["postings"].items()
+        }
+        return cls(data["doc_ids"], data["contents"], data["classifications"], postings, data.get("version"))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Führt mehrere Ranglisten per Reciprocal Rank Fusion zusammen.
+
+    Jedes Dokument erhält die Summe von 1 / (k + Rang) über alle Listen, in denen
+    es vorkommt; Scores der einzelnen Verfahren müssen dafür nicht vergleichbar sein.
+
+    Args:
+        rankings: Ranglisten von Dokument-IDs (beste zuerst).
+        k (int): Glättungskonstante (60 nach Cormack et al.).
+
+    Returns:
+        List[Tuple[str, float]]: (Dokument-ID, fusionierter Score), beste zuerst.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
@@ -0,0 +1,124 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, Optional
+import dotenv
+
+from app.rag.embedding_cache import normalize_text, text_hash
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+# Manifest des Vektorindex: Dokument-ID -> Hash des Inhalts und der Metadaten.
+# Grundlage für die inkrementelle Indexierung (nur geänderte Dokumente werden verarbeitet).
+INDEX_MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", "./data/index_manifest.json")
+
+
+def metadata_hash(metadata: Dict[str, Any]) -> str:
+    """Berechnet einen stabilen Hash der Metadaten (unabhängig von der Schlüsselreihenfolge)."""
+    canonical = json.dumps(metadata, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def document_entry(doc: Dict[str, Any]) -> Dict[str, str]:
+    """Erzeugt den Manifest-Eintrag eines Dokuments aus `documents.json`."""
+    return {
+        "content_hash": text_hash(normalize_text(doc["content"])),
+        "metadata_hash": metadata_hash(doc["metadata"])
+    }
+
+
+def index_version(
+    documents: Dict[str, Dict[str, str]],
+    embedding_model: Optional[str] = None,
+    chunking: Optional[str] = None
+) -> str:
+    """
+    Fingerabdruck des gesamten Index-Inhalts; ändert sich bei jeder Inhalts- oder
+    Metadatenänderung sowie beim Wechsel des Embedding-Modells oder der Chunking-Konfiguration.
+    """
+    digest = hashlib.sha256()
+    if embedding_model:
+        digest.update(f"model:{embedding_model};".encode("utf-8"))
+    if chunking:
+        digest.update(f"chunking:{chunking};".encode("utf-8"))
+    for doc_id in sorted(documents):
+        entry = documents[doc_id]
+        digest.update(f"{doc_id}:{entry['content_hash']}:{entry['metadata_hash']};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def load_manifest(path: str = INDEX_MANIFEST_PATH) -> Dict[str, Any]:
+    """
+    Lädt das Manifest des Vektorindex.
+
+    Returns:
+        Dict[str, Any]: Manifest mit den Schlüsseln 'documents', 'index_version',
+            'embedding_model' und 'chunking'. Existiert keine Datei, wird ein leeres
+            Manifest zurückgegeben.
+    """
+    if not os.path.exists(path):
+        return {"documents": {}, "index_version": None, "embedding_model": None, "chunking": None}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(
+    documents: Dict[str, Dict[str, str]],
+    path: str = INDEX_MANIFEST_PATH,
+    embedding_model: Optional[str] = None,
+    chunking: Optional[str] = None
+) -> str:
+    """
+    Speichert das Manifest atomar (temporäre Datei + Umbenennen).
+
+    Args:
+        documents: Manifest-Einträge je Dokument-ID (siehe `document_entry`).
+        path (str): Zielpfad des Manifests.
+        embedding_model (str, optional): Modell, mit dem die Vektoren erzeugt wurden.
+        chunking (str, optional): Chunking-Konfiguration (siehe `chunking_signature`).
+
+    Returns:
+        str: Die neue Index-Version.
+    """
+    version = index_version(documents, embedding_model, chunking)
+    manifest = {
+        "index_version": version,
+        "embedding_model": embedding_model,
+        "chunking": chunking,
+        "updated_at": datetime.now().isoformat(),
+        "documents": documents
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return version
+
+
+_index_version_cache: Dict[str, Any] = {"stamp": None, "version": None}
+
+
+def get_index_version(path: str = INDEX_MANIFEST_PATH) -> Optional[str]:
+    """
+    Liefert die aktuelle Index-Version aus dem Manifest.
+
+    Das Manifest wird nur neu gelesen, wenn sich Änderungszeit oder Größe der Datei
+    geändert haben, sodass der Aufruf auch pro Anfrage günstig ist.
+
+    Returns:
+        Optional[str]: Die Index-Version (None, falls kein Manifest existiert).
+    """
+    try:
+        stat = os.stat(path)
+        stamp = (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+    if _index_version_cache["stamp"] != stamp:
+        _index_version_cache["version"] = load_manifest(path).get("index_version")
+        _index_version_cache["stamp"] = stamp
+    return _index_version_cache["version"]
@@ -1,13 +1,28 @@
 import os
 import time
+import asyncio
+import threading
 import dotenv
-import chromadb
-from typing import List, Dict, Any, Union
-from openai import OpenAI
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import List, Dict, Any, Union, Tuple, Iterator, Optional, Sequence
 
 # Eigene Module
-from app.security.rbac import check_access
-from app.logging.audit import log_request
+from app.security.rbac import check_access_many, get_allowed_classifications, get_policy_version, add_policy_listener
+from app.logging.audit import log_request, log_requests, alog_request
+from app.rag.embedding_cache import EmbeddingCache, normalize_text
+from app.rag.answer_cache import AnswerCache, ContextKey, ANSWER_CACHE_ENABLED
+from app.rag.manifest import get_index_version, load_manifest
+from app.rag.providers import create_embedding_provider, create_chat_provider, resolve_embedding_model
+from app.rag.lexical import BM25Index, LexicalHit, LEXICAL_INDEX_PATH, reciprocal_rank_fusion
+from app.rag.context import assemble_context, PROMPT_TOKEN_BUDGET, CONTEXT_SEPARATOR
+from app.rag.tokens import count_tokens, count_message_tokens, counter_name
+from app.rag.prompts import build_prompt_prefix, build_context_block, NO_CONTEXT_TEXT
+from app.rag.vector_store import (
+    VectorStore, ChromaVectorStore, FlatVectorStore, PartitionedVectorStore,
+    VECTOR_STORE, VECTOR_STORES, FLAT_INDEX_PATH, FLAT_INDEX_QUANTIZATION
+)
 
 # Initialisierung der Umgebungsvariablen
 dotenv.load_dotenv()
@@ -17,7 +32,60 @@ CHROMA_PATH = os.getenv("CHROMA_PATH", "./data/chromadb")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4-turbo")
 COLLECTION_NAME = "company_kb"
-RETRIEVAL_COUNT = 5  # Anzahl der abzurufenden Dokumente (Top-K)
+RETRIEVAL_COUNT = 5  # Anzahl der abzurufenden Dokumente bzw. Chunks (Top-K)
+
+# RBAC-Modus der Suche:
+# - 'postfilter': Top-K über alle Dokumente abrufen und danach per Enforcer filtern.
+# - 'prefilter':  Nur Klassifizierungen abfragen, die die Rolle lesen darf
+#                 (ChromaDB-'where'-Filter). Der Enforcer prüft zusätzlich jedes
+#                 Ergebnis als Defense-in-Depth-Kontrolle.
+RBAC_FILTER_MODE = os.getenv("RBAC_FILTER_MODE", "postfilter")
+FILTER_MODES = ("postfilter", "prefilter")
+
+# Retrieval-Verfahren:
+# - 'vector': reine Vektorsuche (ChromaDB).
+# - 'hybrid': Vektorsuche und lokale BM25-Suche, fusioniert per Reciprocal Rank Fusion.
+#             Der RBAC-Filter gilt in beiden Suchpfaden.
+# Standard bleibt 'vector', damit Retrieval und Blockierungsraten mit früheren Läufen vergleichbar sind.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+RETRIEVAL_MODES = ("vector", "hybrid")
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Lexikalischer Schnellpfad: Ist der beste BM25-Treffer eindeutig (Mindestscore und
+# Abstand zum Zweitplatzierten), entfallen Embedding-Aufruf und Vektorsuche. Nur im
+# Modus 'prefilter', da die BM25-Treffer sonst Dokumente enthalten, die die Rolle nicht lesen darf.
+LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "true").lower() in ("1", "true", "yes")
+LEXICAL_MIN_SCORE = float(os.getenv("LEXICAL_MIN_SCORE", "4.0"))
+LEXICAL_DECISIVE_RATIO = float(os.getenv("LEXICAL_DECISIVE_RATIO", "2.0"))
+# Max. gleichzeitige LLM-Aufrufe in `ask_batch`
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+# Max. Fragen je Embedding-Request in `ask_batch` (wie beim Indexieren, siehe build_index.py)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+class StageTimer:
+    """
+    Leichtgewichtige Zeitmessung der einzelnen Pipeline-Stufen.
+
+    Verwendet die monotone Uhr `time.perf_counter`. Die Dauer jeder Stufe
+    (z. B. 'embedding', 'vector_search', 'rbac_filter', 'generation') wird in
+    Sekunden gesammelt und im Audit-Log im Block 'metrics.stages' abgelegt.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str):
+        """Misst die Dauer des umschlossenen Blocks und addiert sie zur Stufe `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + (time.perf_counter() - start)
+
+    def elapsed(self) -> float:
+        """Gesamtdauer seit Erzeugung des Timers in Sekunden."""
+        return time.perf_counter() - self._start
 
 class RbacRagPipeline:
     """
@@ -29,20 +97,157 @@ class RbacRagPipeline:
     dem Logging der Transaktion.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        filter_mode: str = RBAC_FILTER_MODE,
+        use_answer_cache: bool = ANSWER_CACHE_ENABLED,
+        chroma_path: str = CHROMA_PATH,
+        collection_name: str = COLLECTION_NAME,
+        retrieval_mode: str = RETRIEVAL_MODE,
+        lexical_index_path: str = LEXICAL_INDEX_PATH,
+        vector_store: str = VECTOR_STORE,
+        flat_index_path: str = FLAT_INDEX_PATH
+    ):
         """
-        Initialisiert die Clients für die Vektordatenbank (ChromaDB) und
-        das Sprachmodell (OpenAI).
+        Konfiguriert die Pipeline. Die Clients für die Vektordatenbank (ChromaDB) sowie
+        die Anbieter für Embeddings und Sprachmodell (OpenAI oder lokal, siehe
+        EMBEDDING_PROVIDER / CHAT_PROVIDER in app/rag/providers.py) werden erst beim
+        ersten Zugriff erzeugt; `warmup()` lädt alles vorab.
+
+        Args:
+            filter_mode (str): 'postfilter' oder 'prefilter' (siehe RBAC_FILTER_MODE).
+            use_answer_cache (bool): Wiederverwendung generierter Antworten (siehe AnswerCache).
+            chroma_path (str): Verzeichnis der ChromaDB (z. B. für Benchmarks mit eigenem Korpus).
+            collection_name (str): Name der Collection.
+            retrieval_mode (str): 'vector' oder 'hybrid' (siehe RETRIEVAL_MODE).
+            lexical_index_path (str): Pfad des BM25-Index (leer = aus der Collection aufbauen).
+            vector_store (str): 'chroma', 'flat' oder 'partitioned' (siehe VECTOR_STORE in app/rag/vector_store.py).
+            flat_index_path (str): Verzeichnis des Flat-Index (leer = aus der Collection aufbauen).
         """
+        if filter_mode not in FILTER_MODES:
+            raise ValueError(f"Unbekannter RBAC-Filtermodus: '{filter_mode}'. Erlaubt: {FILTER_MODES}")
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unbekanntes Retrieval-Verfahren: '{retrieval_mode}'. Erlaubt: {RETRIEVAL_MODES}")
+        if vector_store not in VECTOR_STORES:
+            raise ValueError(f"Unbekanntes Vektor-Backend: '{vector_store}'. Erlaubt: {VECTOR_STORES}")
+        self.filter_mode = filter_mode
+        self.retrieval_mode = retrieval_mode
+        self.chroma_path = chroma_path
+        self.collection_name = collection_name
+        self.lexical_index_path = lexical_index_path
+        self.vector_backend = vector_store
+        self.flat_index_path = flat_index_path
+        self.lexical_fast_path = LEXICAL_FAST_PATH
+        self.prompt_token_budget = PROMPT_TOKEN_BUDGET
+        # Schützt die verzögerte Erzeugung der Clients bei gleichzeitigen ersten Anfragen
+        self._init_lock = threading.RLock()
+
         try:
-            self.chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
-            self.collection = self.chroma_client.get_collection(name=COLLECTION_NAME)
-            self.openai_client = OpenAI()
-            print(f"Pipeline initialisiert. Collection: '{COLLECTION_NAME}'")
+            self.embedding_cache = EmbeddingCache()
+            self.answer_cache = AnswerCache() if use_answer_cache else None
+            # Statische Prompt-Präfixe je Rolle, siehe `prompt_prefix`
+            self._prompt_prefixes: Dict[str, str] = {}
+            # Schwach registriert: endet mit der Pipeline-Instanz (siehe `add_policy_listener`)
+            add_policy_listener(self._on_policy_change)
+            embedding_model = resolve_embedding_model(EMBEDDING_MODEL)
+            print(
+                f"Pipeline initialisiert. Collection: '{collection_name}' | RBAC-Modus: {self.filter_mode} | "
+                f"Retrieval: {self.retrieval_mode} | Vektor-Backend: {self.vector_backend} | "
+                f"Embedding: {embedding_model} | LLM: {LLM_MODEL}"
+            )
+            indexed_model = load_manifest().get("embedding_model")
+            if indexed_model and indexed_model != embedding_model:
+                # Anfrage- und Dokumentvektoren stammen sonst aus verschiedenen Vektorräumen (bzw. Dimensionen)
+                print(f"⚠️ Warnung: Index wurde mit '{indexed_model}' erstellt, Anfragen nutzen '{embedding_model}'.")
         except Exception as e:
             print(f"Kritischer Fehler bei der Initialisierung der Pipeline: {e}")
             raise
 
+    # --- VERZÖGERT ERZEUGTE CLIENTS ---
+    # chromadb und openai benötigen zusammen über eine Sekunde für den Import. Sie werden
+    # daher erst bei der ersten Anfrage (oder in `warmup()`) geladen, sodass Skripte und
+    # die Streamlit-Oberfläche ohne diese Kosten starten.
+
+    @cached_property
+    def chroma_client(self):
+        """ChromaDB-Client (wird beim ersten Zugriff geöffnet)."""
+        with self._init_lock:
+            if "chroma_client" in self.__dict__:
+                return self.__dict__["chroma_client"]
+            import chromadb
+            return chromadb.PersistentClient(path=self.chroma_path)
+
+    @cached_property
+    def collection(self):
+        """Collection der Wissensbasis (wird beim ersten Zugriff geöffnet)."""
+        with self._init_lock:
+            if "collection" in self.__dict__:
+                return self.__dict__["collection"]
+            return self.chroma_client.get_collection(name=self.collection_name)
+
+    @cached_property
+    def vector_store(self) -> VectorStore:
+        """Backend der Vektorsuche (wird beim ersten Zugriff geöffnet, siehe VECTOR_STORE)."""
+        with self._init_lock:
+            if "vector_store" in self.__dict__:
+                return self.__dict__["vector_store"]
+            return self._load_vector_store()
+
+    @cached_property
+    def lexical_index(self) -> Optional[BM25Index]:
+        """BM25-Index (None beim Retrieval-Verfahren 'vector'), wird beim ersten Zugriff geladen."""
+        with self._init_lock:
+            if "lexical_index" in self.__dict__:
+                return self.__dict__["lexical_index"]
+            return self._load_lexical_index() if self.retrieval_mode == "hybrid" else None
+
+    @cached_property
+    def embedding_provider(self):
+        """Embedding-Anbieter (wird beim ersten Zugriff erzeugt)."""
+        with self._init_lock:
+            if "embedding_provider" in self.__dict__:
+                return self.__dict__["embedding_provider"]
+            return create_embedding_provider(EMBEDDING_MODEL)
+
+    @cached_property
+    def chat_provider(self):
+        """Chat-Anbieter (wird beim ersten Zugriff erzeugt)."""
+        with self._init_lock:
+            if "chat_provider" in self.__dict__:
+                return self.__dict__["chat_provider"]
+            return create_chat_provider(LLM_MODEL)
+
+    def warmup(self) -> Dict[str, float]:
+        """
+        Lädt alle verzögerten Bestandteile vorab, damit die erste Anfrage keine Startkosten trägt.
+
+        Schritte: RBAC-Policy, Vektor-Backend, BM25-Index, Suchindex im Arbeitsspeicher
+        (HNSW per Platzhalter-Abfrage mit einem Nullvektor ohne Embedding-Aufruf bzw.
+        Seiten der Flat-Matrix), Anbieter-Clients und Tokenizer.
+
+        Returns:
+            Dict[str, float]: Dauer je Schritt in Sekunden.
+        """
+        timer = StageTimer()
+        with timer.span("rbac_policy"):
+            get_policy_version()
+        with timer.span("vector_store"):
+            store = self.vector_store
+        with timer.span("lexical_index"):
+            self.lexical_index
+        with timer.span("vector_index"):
+            store.warmup()
+        with timer.span("providers"):
+            self.embedding_provider
+            self.chat_provider
+        with timer.span("tokenizer"):
+            counter_name()
+        print(
+            f"🔥 Pipeline vorgewärmt in {timer.elapsed():.2f}s ("
+            + ", ".join(f"{stage}: {seconds * 1000:.0f} ms" for stage, seconds in timer.timings.items()) + ")"
+        )
+        return timer.timings
+
     def get_embedding(self, text: str) -> List[float]:
         """
         Generiert eine Vektoreinbettung (Embedding) für den übergebenen Text.
@@ -53,107 +258,399 @@ class RbacRagPipeline:
         Returns:
             List[float]: Der Vektor, der den Text repräsentiert.
         """
-        # Bereinigung von Zeilenumbrüchen für bessere Embedding-Qualität
-        text = text.replace("\n", " ")
-        
-        response = self.openai_client.embeddings.create(
-            input=[text],
-            model=EMBEDDING_MODEL
-        )
-        return response.data[0].embedding
+        # Wiederholte Anfragen werden aus dem lokalen Cache bedient. Der Cache
+        # normalisiert den Text (u. a. Entfernen von Zeilenumbrüchen).
+        return self.embedding_cache.get_or_compute(self.embedding_provider.model, [text], self.embedding_provider.embed)[0]
 
-    def ask(self, user_role: str, query: str) -> Dict[str, Any]:
+    def _load_lexical_index(self) -> BM25Index:
+        """Lädt den BM25-Index passend zur aktuellen Index-Version (sonst Neuaufbau aus der Collection)."""
+        version = get_index_version()
+        index = BM25Index.load(self.lexical_index_path)
+        if index is None or index.version != version:
+            # Fehlende oder veraltete Datei: Die Collection ist maßgeblich (inkl. aktueller Klassifizierungen).
+            # Ein aktueller Flat-Index enthält denselben Bestand, ChromaDB muss dann nicht geladen werden.
+            store = self.vector_store
+            source = store if isinstance(store, FlatVectorStore) else self.collection
+            index = BM25Index.from_collection(source, version)
+        return index
+
+    def _load_vector_store(self) -> VectorStore:
+        """Öffnet das konfigurierte Vektor-Backend (Flat-Index bzw. Partitionen passend zur aktuellen Index-Version)."""
+        if self.vector_backend == "chroma":
+            return ChromaVectorStore(self.collection)
+        version = get_index_version()
+        if self.vector_backend == "partitioned":
+            store = PartitionedVectorStore.from_client(self.chroma_client, self.collection_name, version)
+            if store.is_synced(version):
+                return store
+            # Fehlende oder nicht mit dieser Index-Version abgeglichene Partitionen können veraltete
+            # Klassifizierungen enthalten -> Vorfilter als Metadaten-Filter auf der Collection
+            if store.partitions:
+                print("⚠️ Warnung: Partitionen sind nicht auf dem Stand des Index (build_index.py gleicht sie ab). Nutze die Collection.")
+            else:
+                print("⚠️ Warnung: Keine Partitionen je Klassifizierung gefunden (build_index.py mit VECTOR_STORE=partitioned erzeugt sie). Nutze die Collection.")
+            store = ChromaVectorStore(self.collection)
+            store.version = version
+            return store
+        store = FlatVectorStore.load(self.flat_index_path)
+        if store is None or store.version != version or store.quantization != FLAT_INDEX_QUANTIZATION:
+            # Fehlende, veraltete oder anders quantisierte Datei -> Export aus der Collection (nur im Arbeitsspeicher)
+            print("ℹ️ Flat-Index fehlt oder ist veraltet, wird aus der Collection aufgebaut (build_index.py erzeugt ihn).")
+            store = FlatVectorStore.from_collection(self.collection, version, FLAT_INDEX_QUANTIZATION)
+        return store
+
+    def _current_vector_store(self) -> VectorStore:
+        """Liefert das Vektor-Backend und lädt Flat-Index bzw. Partitionen nach einem Neuaufbau des Index nach."""
+        store = self.vector_store
+        if self.vector_backend != "chroma" and store.version != get_index_version():
+            with self._init_lock:
+                store = self.vector_store = self._load_vector_store()
+        return store
+
+    def lexical_search(
+        self,
+        user_role: str,
+        query: str,
+        filter_mode: Union[str, None] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Optional[List[LexicalHit]]:
         """
-        Führt eine vollständige RAG-Abfrage unter Berücksichtigung der Benutzerrolle durch.
+        BM25-Suche im lokalen invertierten Index (None, falls das Retrieval-Verfahren 'vector' ist).
 
-        Prozessschritte:
-        1. Vektorisierung der Suchanfrage.
-        2. Semantische Suche in der Wissensbasis (Retrieval).
-        3. Anwendung des RBAC-Filters auf die Suchergebnisse (Enforcement).
-        4. Konstruktion des Prompts mit nur erlaubten Kontexten.
-        5. Generierung der Antwort durch das LLM.
-        6. Protokollierung der Anfrage (Logging).
+        Im Modus 'prefilter' werden nur Dokumente mit erlaubter Klassifizierung
+        gewertet; im Modus 'postfilter' übernimmt `_apply_rbac` die Filterung.
+        """
+        if self.lexical_index is None:
+            return None
+        mode = filter_mode or self.filter_mode
+        timer = timer or StageTimer()
+        with timer.span("lexical_search"):
+            if self.lexical_index.version != get_index_version():
+                # Index wurde neu aufgebaut (z. B. Umklassifizierung) -> BM25-Index nachziehen
+                self.lexical_index = self._load_lexical_index()
+            allowed_classes = get_allowed_classifications(user_role) if mode == "prefilter" else None
+            return self.lexical_index.search(query, RETRIEVAL_COUNT, allowed_classes)
+
+    def is_decisive(self, lexical_hits: Optional[List[LexicalHit]], filter_mode: Union[str, None] = None) -> bool:
+        """
+        Prüft, ob der beste BM25-Treffer eindeutig genug für den lexikalischen Schnellpfad ist.
+
+        Im Modus 'postfilter' nie: Ein eindeutiger Treffer, den die Rolle nicht lesen darf,
+        würde sonst die Vektorsuche ersetzen und nach dem RBAC-Filter keinen Kontext liefern.
+        """
+        if (filter_mode or self.filter_mode) != "prefilter":
+            return False
+        if not self.lexical_fast_path or not lexical_hits or lexical_hits[0].score < LEXICAL_MIN_SCORE:
+            return False
+        return len(lexical_hits) == 1 or lexical_hits[0].score >= LEXICAL_DECISIVE_RATIO * lexical_hits[1].score
+
+    @staticmethod
+    def _fuse(vector_results: Dict[str, Any], lexical_hits: List[LexicalHit]) -> Dict[str, Any]:
+        """
+        Vereinigt Vektor- und BM25-Treffer per RRF zu einer Top-K-Liste im ChromaDB-Ergebnisformat
+        ('scores' enthält den fusionierten Score).
+        """
+        vector_ids = vector_results["ids"][0] if vector_results["ids"] else []
+        candidates = {
+            doc_id: (vector_results["documents"][0][i], vector_results["metadatas"][0][i])
+            for i, doc_id in enumerate(vector_ids)
+        }
+        for hit in lexical_hits:
+            candidates.setdefault(hit.id, (hit.content, {"classification": hit.classification}))
+        fused = reciprocal_rank_fusion([vector_ids, [hit.id for hit in lexical_hits]], RRF_K)[:RETRIEVAL_COUNT]
+        return {
+            "ids": [[doc_id for doc_id, _ in fused]],
+            "documents": [[candidates[doc_id][0] for doc_id, _ in fused]],
+            "metadatas": [[candidates[doc_id][1] for doc_id, _ in fused]],
+            "scores": [[score for _, score in fused]]
+        }
+
+    def retrieve_lexical(
+        self,
+        user_role: str,
+        lexical_hits: List[LexicalHit],
+        filter_mode: Union[str, None] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Tuple[List[str], List[str], int, List[float]]:
+        """Schnellpfad: Übernimmt die BM25-Treffer ohne Vektorsuche und wendet den RBAC-Filter an."""
+        mode = filter_mode or self.filter_mode
+        timer = timer or StageTimer()
+        results = self._fuse({"ids": [[]], "documents": [[]], "metadatas": [[]]}, lexical_hits)
+        with timer.span("rbac_filter"):
+            return self._apply_rbac(user_role, mode, results)
+
+    def retrieve(
+        self,
+        user_role: str,
+        query_vec: List[float],
+        filter_mode: Union[str, None] = None,
+        timer: Optional[StageTimer] = None,
+        lexical_hits: Optional[List[LexicalHit]] = None
+    ) -> Tuple[List[str], List[str], int, List[float]]:
+        """
+        Sucht die Top-K Dokumente zu einem Anfragevektor und wendet den RBAC-Filter an.
+
+        Im Modus 'prefilter' wird die Suche bereits in ChromaDB auf die erlaubten
+        Klassifizierungen der Rolle eingeschränkt, sodass die Rolle stets bis zu K
+        verwertbare Dokumente erhält. Unabhängig vom Modus wird jedes Ergebnis
+        erneut durch den Enforcer geprüft.
 
         Args:
-            user_role (str): Die Rolle des Anfragenden (z. B. 'Mitarbeiter').
-            query (str): Die natürlichsprachliche Frage.
+            user_role (str): Die Rolle des Anfragenden.
+            query_vec (List[float]): Der Vektor der Suchanfrage.
+            filter_mode (str, optional): Überschreibt den Modus der Pipeline (z. B. für Benchmarks).
+            timer (StageTimer, optional): Erfasst die Dauer von 'vector_search' und 'rbac_filter'.
+            lexical_hits (List[LexicalHit], optional): BM25-Treffer, die per RRF mit den
+                Vektor-Treffern fusioniert werden (siehe `lexical_search`).
 
         Returns:
-            Dict[str, Any]: Enthält die generierte Antwort sowie Metadaten zur Filterung.
+            Tuple[List[str], List[str], int, List[float]]: Erlaubte Texte, erlaubte IDs, Anzahl
+                blockierter Dokumente und Relevanz-Score je erlaubtem Dokument (höher = relevanter).
         """
-        start_time = time.time()
-        
-        print(f"\n--- Start RAG-Prozess ---")
-        print(f"Input: Rolle='{user_role}' | Query='{query}'")
+        mode = filter_mode or self.filter_mode
+        timer = timer or StageTimer()
 
-        # --- SCHRITT 1: RETRIEVAL ---
-        query_vec = self.get_embedding(query)
-        results = self.collection.query(
-            query_embeddings=[query_vec],
-            n_results=RETRIEVAL_COUNT
-        )
+        allowed_classes = None
+        if mode == "prefilter":
+            allowed_classes = get_allowed_classifications(user_role)
+            if not allowed_classes:
+                # Fail-Secure: Ohne erlaubte Klassifizierung findet keine Suche statt.
+                print(f"⚠️ Rolle '{user_role}' besitzt keine Leserechte. Retrieval übersprungen.")
+                return [], [], 0, []
+
+        with timer.span("vector_search"):
+            results = self._current_vector_store().query([query_vec], RETRIEVAL_COUNT, allowed_classes)
+        return self._rank_and_filter(user_role, mode, results, lexical_hits, timer)
+
+    def _rank_and_filter(
+        self,
+        user_role: str,
+        mode: str,
+        results: Dict[str, Any],
+        lexical_hits: Optional[List[LexicalHit]],
+        timer: StageTimer
+    ) -> Tuple[List[str], List[str], int, List[float]]:
+        """Ergänzt die Scores einer Vektorsuche, fusioniert ggf. mit BM25 und wendet den RBAC-Filter an."""
+        with timer.span("vector_search"):
+            results["scores"] = [self._similarities(results["distances"][0] if results.get("distances") else [])]
+            if lexical_hits:
+                results = self._fuse(results, lexical_hits)
+
+        with timer.span("rbac_filter"):
+            return self._apply_rbac(user_role, mode, results)
 
+    def _similarities(self, distances: List[float]) -> List[float]:
+        """Rechnet Distanzen des Vektor-Backends in Kosinus-Ähnlichkeiten um (Embeddings sind auf Länge 1 normiert)."""
+        if self.vector_store.space == "l2":
+            # Quadrierte euklidische Distanz normierter Vektoren: d = 2 - 2 * cos
+            return [1.0 - distance / 2.0 for distance in distances]
+        return [1.0 - distance for distance in distances]
+
+    def _apply_rbac(
+        self, user_role: str, mode: str, results: Dict[str, Any]
+    ) -> Tuple[List[str], List[str], int, List[float]]:
+        """Wendet den RBAC-Filter (Enforcement Point) auf die Ergebnisse einer Suche an."""
         allowed_docs_content = []  # Liste der Texte für das LLM
         allowed_doc_ids = []       # Liste der IDs für das Audit-Log
+        allowed_scores = []        # Relevanz je erlaubtem Dokument (für das Prompt-Budget)
         blocked_docs_count = 0
 
         # Die ChromaDB-Ergebnisse sind verschachtelte Listen. Wir extrahieren die erste Ebene.
-        if results['documents']:
+        if results['documents'] and results['documents'][0]:
             num_found = len(results['documents'][0])
-            
-            print(f"Retrieval: {num_found} Dokumente gefunden. Starte RBAC-Prüfung...")
+
+            print(f"Retrieval ({mode}): {num_found} Dokumente gefunden. Starte RBAC-Prüfung...")
+
+            # Extraktion der Sicherheitsklassifizierung (Default: 'internal')
+            classifications = [
+                metadata.get("classification", "internal") for metadata in results['metadatas'][0]
+            ]
+
+            # RBAC FILTERUNG (Enforcement Point) - eine Batch-Entscheidung für alle Treffer
+            decisions = check_access_many(user_role, classifications)
+            scores = results.get("scores", [[]])[0] or [0.0] * num_found
 
             for i in range(num_found):
                 doc_text = results['documents'][0][i]
-                metadata = results['metadatas'][0][i]
                 doc_id = results['ids'][0][i]
-                
-                # Extraktion der Sicherheitsklassifizierung (Default: 'internal')
-                classification = metadata.get("classification", "internal")
-
-                # --- SCHRITT 2: RBAC FILTERUNG (Enforcement Point) ---
-                is_allowed = check_access(user_role, classification)
+                classification = classifications[i]
 
-                if is_allowed:
+                if decisions[i]:
                     allowed_docs_content.append(doc_text)
                     allowed_doc_ids.append(doc_id)
+                    allowed_scores.append(scores[i])
                     print(f"  Zugriff gewährt: ID={doc_id} (Class={classification})")
                 else:
                     blocked_docs_count += 1
-                    print(f"  Zugriff verweigert: ID={doc_id} (Class={classification})")
+                    if mode == "prefilter":
+                        # Der Vorfilter hätte dieses Dokument nie liefern dürfen.
+                        print(f"  ❌ Sicherheitswarnung: Vorfilter lieferte unerlaubtes Dokument ID={doc_id} (Class={classification})")
+                    else:
+                        print(f"  Zugriff verweigert: ID={doc_id} (Class={classification})")
         else:
             print("⚠️ Keine Dokumente im Vektorraum gefunden.")
 
-        # --- SCHRITT 3: KONTEXT-KONSTRUKTION ---
+        return allowed_docs_content, allowed_doc_ids, blocked_docs_count, allowed_scores
+
+    def _on_policy_change(self, _version: str) -> None:
+        """Policy-Listener: verwirft die (veralteten) Antworten der alten Policy."""
+        if self.answer_cache is not None:
+            # Der Kontext-Schlüssel schließt alte Antworten ohnehin aus; so wird der Speicher sofort frei
+            self.answer_cache.clear()
+
+    def answer_context(self, user_role: str, allowed_doc_ids: List[str]) -> ContextKey:
+        """Kontext-Schlüssel des Antwort-Caches: Rolle, erlaubte Dokumente, Index- und Policy-Version."""
+        return AnswerCache.context_key(user_role, allowed_doc_ids, get_index_version(), get_policy_version())
+
+    def lookup_answer(self, context: ContextKey, query: str, query_vec: Optional[List[float]]) -> Optional[Dict[str, Any]]:
+        """Sucht eine wiederverwendbare Antwort (None bei Fehltreffer oder deaktiviertem Cache)."""
+        if self.answer_cache is None:
+            return None
+        cached = self.answer_cache.lookup(context, query, query_vec)
+        if cached:
+            print(f"Antwort-Cache: Treffer ({cached['match']}, Ähnlichkeit {cached['similarity']:.3f})")
+        return cached
+
+    def cache_status(self, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Status des Antwort-Caches für das Audit-Log (inkl. kumulierter Zähler)."""
+        if self.answer_cache is None:
+            return None
+        status = {"status": cached["match"] if cached else "miss", **self.answer_cache.stats()}
+        if cached:
+            status["similarity"] = round(cached["similarity"], 4)
+        return status
+
+    def build_prompt(
+        self,
+        user_role: str,
+        query: str,
+        allowed_doc_ids: List[str],
+        allowed_docs_content: List[str],
+        allowed_scores: Optional[List[float]] = None
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """
+        Baut die Chat-Nachrichten unter Einhaltung des Prompt-Budgets (PROMPT_TOKEN_BUDGET).
+
+        Die festen Bestandteile (Anweisungen und Frage) werden zuerst gezählt; der Rest
+        des Budgets steht dem Kontext zur Verfügung, der nach Relevanz zusammengestellt
+        und bei Bedarf gekürzt wird (siehe app/rag/context.py).
+
+        Returns:
+            Tuple[List[Dict[str, str]], Dict[str, Any]]: Nachrichten und Kennzahlen für das
+                Audit-Log (gezählte Prompt-Tokens, Budget, übernommene/gekürzte Dokumente).
+        """
+        fixed_tokens = count_message_tokens(self.build_messages(user_role, query, [""]))
+        context_docs = assemble_context(
+            allowed_doc_ids, allowed_docs_content, max(self.prompt_token_budget - fixed_tokens, 0), allowed_scores
+        )
+        messages = self.build_messages(user_role, query, [doc.content for doc in context_docs])
+        prompt_info = {
+            "tokens": count_message_tokens(messages),
+            "prefix_tokens": count_tokens(messages[0]["content"]),
+            "budget": self.prompt_token_budget,
+            "context_tokens": sum(doc.tokens for doc in context_docs),
+            "context_documents": len(context_docs),
+            "truncated_documents": sum(doc.truncated for doc in context_docs),
+            "counter": counter_name()
+        }
+        return messages, prompt_info
+
+    def prompt_prefix(self, user_role: str) -> str:
+        """
+        Liefert den statischen Präfix des System-Prompts (Anweisungen und Rollenangabe).
+
+        Der Text wird je Rolle nur einmal erzeugt, damit er über alle Anfragen hinweg
+        Byte für Byte identisch bleibt (Voraussetzung für das Prompt-Caching des Anbieters).
+        """
+        prefix = self._prompt_prefixes.get(user_role)
+        if prefix is None:
+            prefix = build_prompt_prefix(user_role)
+            self._prompt_prefixes[user_role] = prefix
+        return prefix
+
+    def build_messages(self, user_role: str, query: str, allowed_docs_content: List[str]) -> List[Dict[str, str]]:
+        """
+        Konstruiert die Chat-Nachrichten: statischer Präfix, danach Kontext und Benutzerfrage.
+
+        Args:
+            user_role (str): Die Rolle des Anfragenden.
+            query (str): Die natürlichsprachliche Frage.
+            allowed_docs_content (List[str]): Texte der Dokumente, die den RBAC-Filter passiert haben.
+
+        Returns:
+            List[Dict[str, str]]: Nachrichten im Format der Chat-Completions-API.
+        """
         if not allowed_docs_content:
-            context_text = "Keine relevanten Informationen in den für diese Rolle freigegebenen Dokumenten gefunden."
+            context_text = NO_CONTEXT_TEXT
         else:
-            context_text = "\n\n".join(allowed_docs_content)
-
-        # System-Prompt Instruktion
-        system_prompt = (
-            f"Du bist ein hilfreicher interner Unternehmensassistent. "
-            f"Du interagierst mit einem Benutzer der Rolle: {user_role}. "
-            f"Beantworte die Frage ausschließlich basierend auf dem untenstehenden Kontext. "
-            f"Wenn der Kontext die Antwort nicht enthält, antworte wahrheitsgemäß mit 'Das weiß ich nicht' "
-            f"oder 'Dazu liegen mir keine Informationen vor'. Erfinde keine Fakten.\n\n"
-            f"--- ANFANG KONTEXT ---\n{context_text}\n--- ENDE KONTEXT ---"
-        )
+            context_text = CONTEXT_SEPARATOR.join(allowed_docs_content)
 
-        # --- SCHRITT 4: ANTWORT-GENERIERUNG (LLM) ---
-        chat_completion = self.openai_client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query}
-            ],
-        )
+        return [
+            {"role": "system", "content": self.prompt_prefix(user_role)},
+            {"role": "system", "content": build_context_block(context_text)},
+            {"role": "user", "content": query}
+        ]
+
+    def ask(self, user_role: str, query: str) -> Dict[str, Any]:
+        """
+        Führt eine vollständige RAG-Abfrage unter Berücksichtigung der Benutzerrolle durch.
+
+        Prozessschritte:
+        1. Vektorisierung der Suchanfrage.
+        2. Semantische Suche in der Wissensbasis (Retrieval).
+        3. Anwendung des RBAC-Filters auf die Suchergebnisse (Enforcement).
+        4. Konstruktion des Prompts mit nur erlaubten Kontexten (Chunks je Dokument
+           zusammengeführt, nach Relevanz begrenzt durch PROMPT_TOKEN_BUDGET).
+        5. Generierung der Antwort durch das LLM.
+        6. Protokollierung der Anfrage (Logging).
+
+        Args:
+            user_role (str): Die Rolle des Anfragenden (z. B. 'Mitarbeiter').
+            query (str): Die natürlichsprachliche Frage.
+
+        Returns:
+            Dict[str, Any]: Enthält die generierte Antwort sowie Metadaten zur Filterung.
+        """
+        timer = StageTimer()
+        
+        print(f"\n--- Start RAG-Prozess ---")
+        print(f"Input: Rolle='{user_role}' | Query='{query}'")
+
+        # --- SCHRITT 1 & 2: RETRIEVAL UND RBAC FILTERUNG ---
+        lexical_hits = self.lexical_search(user_role, query, timer=timer)
+        if self.is_decisive(lexical_hits):
+            # Eindeutiger Begriffstreffer: kein Embedding-Aufruf, keine Vektorsuche
+            query_vec = None
+            allowed_docs_content, allowed_doc_ids, blocked_docs_count, allowed_scores = self.retrieve_lexical(
+                user_role, lexical_hits, timer=timer
+            )
+        else:
+            with timer.span("embedding"):
+                query_vec = self.get_embedding(query)
+            allowed_docs_content, allowed_doc_ids, blocked_docs_count, allowed_scores = self.retrieve(
+                user_role, query_vec, timer=timer, lexical_hits=lexical_hits
+            )
+
+        # Gleiche Frage (oder nahezu gleiche) mit identischem Kontext -> gespeicherte Antwort
+        context = self.answer_context(user_role, allowed_doc_ids)
+        cached = self.lookup_answer(context, query, query_vec)
+        if cached:
+            answer, token_usage, prompt_info = cached["answer"], None, None  # Kein LLM-Aufruf, keine Token-Kosten
+        else:
+            # --- SCHRITT 3: KONTEXT-KONSTRUKTION ---
+            with timer.span("prompt_build"):
+                messages, prompt_info = self.build_prompt(
+                    user_role, query, allowed_doc_ids, allowed_docs_content, allowed_scores
+                )
 
-        answer = chat_completion.choices[0].message.content
+            # --- SCHRITT 4: ANTWORT-GENERIERUNG (LLM) ---
+            with timer.span("generation"):
+                answer, token_usage = self.chat_provider.complete(messages)
+            if self.answer_cache is not None:
+                self.answer_cache.store(context, query, query_vec, answer, token_usage)
         
         # Berechnung der Verarbeitungszeit
-        end_time = time.time()
-        process_duration = end_time - start_time
+        process_duration = timer.elapsed()
 
         # --- SCHRITT 5: LOGGING & AUDIT ---
         try:
@@ -163,7 +660,11 @@ class RbacRagPipeline:
                 response_text=answer,
                 allowed_docs=allowed_doc_ids, # Übergabe der IDs für Traceability
                 blocked_count=blocked_docs_count,
-                latency_seconds=process_duration
+                latency_seconds=process_duration,
+                stage_timings=timer.timings,
+                token_usage=token_usage,
+                answer_cache=self.cache_status(cached),
+                prompt=prompt_info
             )
         except Exception as e:
             # Das Logging darf den Hauptprozess nicht abbrechen, daher nur Konsolenausgabe
@@ -173,5 +674,418 @@ class RbacRagPipeline:
             "answer": answer,
             "allowed_docs": allowed_docs_content,
             "blocked_count": blocked_docs_count,
-            "latency": process_duration
-        }
\ No newline at end of file
+            "latency": process_duration,
+            "stages": timer.timings,
+            "token_usage": token_usage,
+            "prompt": prompt_info,
+            "cache": cached["match"] if cached else None
+        }
+
+    def ask_batch(
+        self,
+        requests: Sequence[Tuple[str, str]],
+        concurrency: int = BATCH_LLM_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Beantwortet viele (Rolle, Frage)-Paare gemeinsam (z. B. für Evaluationsläufe).
+
+        Gegenüber wiederholten `ask`-Aufrufen werden die Stufen gebündelt:
+        1. BM25-Suche je Anfrage (lokal); eindeutige Treffer nutzen den Schnellpfad.
+        2. Embeddings für alle übrigen Fragen in Blöcken von EMBED_BATCH_SIZE (über den Embedding-Cache).
+        3. Eine Vektorsuche mit allen Anfragevektoren (im Modus 'prefilter' eine je
+           Menge erlaubter Klassifizierungen, da der Vorfilter je Abfrage gilt).
+        4. RBAC-Filter je Anfrage mit einer Batch-Entscheidung (`check_access_many`).
+        5. LLM-Aufrufe parallel mit höchstens `concurrency` gleichzeitigen Anfragen.
+           Schlägt ein Aufruf fehl, bleiben die übrigen Antworten erhalten.
+        6. Ein gemeinsamer Audit-Log-Schreibauftrag für alle beantworteten Anfragen.
+
+        Die Dauer gebündelter Stufen wird im Audit-Log zu gleichen Teilen auf die
+        beteiligten Anfragen verteilt; 'latency_seconds' ist die Zeit vom Start des
+        Batches bis zur fertigen Antwort der jeweiligen Anfrage.
+
+        Args:
+            requests (Sequence[Tuple[str, str]]): Paare aus Rolle und Frage.
+            concurrency (int): Max. gleichzeitige LLM-Aufrufe (siehe BATCH_LLM_CONCURRENCY).
+
+        Returns:
+            List[Dict[str, Any]]: Ein Ergebnis je Anfrage (Format wie bei `ask`), in Eingabereihenfolge.
+                'error' enthält die Fehlermeldung eines fehlgeschlagenen LLM-Aufrufs ('answer' ist
+                dann None); solche Anfragen werden nicht protokolliert.
+        """
+        requests = list(requests)
+        batch_start = time.perf_counter()
+        timers = [StageTimer() for _ in requests]
+
+        print(f"\n--- Start RAG-Batch: {len(requests)} Anfragen ---")
+
+        # --- SCHRITT 1: BM25-SUCHE (lokal, je Anfrage) ---
+        lexical = [self.lexical_search(role, query, timer=timers[i]) for i, (role, query) in enumerate(requests)]
+        vector_rows = [i for i, hits in enumerate(lexical) if not self.is_decisive(hits)]
+        lexical_rows = set(range(len(requests))) - set(vector_rows)
+
+        # --- SCHRITT 2: EMBEDDINGS (blockweise für alle Fragen ohne Schnellpfad) ---
+        # Blöcke von EMBED_BATCH_SIZE halten jeden Request unter den Eingabelimits der API.
+        query_vecs: List[Optional[List[float]]] = [None] * len(requests)
+        for offset in range(0, len(vector_rows), max(1, EMBED_BATCH_SIZE)):
+            rows = vector_rows[offset:offset + max(1, EMBED_BATCH_SIZE)]
+            start = time.perf_counter()
+            vectors = self.embedding_cache.get_or_compute(
+                self.embedding_provider.model, [requests[i][1] for i in rows], self.embedding_provider.embed
+            )
+            self._share_timing(timers, rows, "embedding", time.perf_counter() - start)
+            for i, vector in zip(rows, vectors):
+                query_vecs[i] = vector
+
+        # --- SCHRITT 3 & 4: VEKTORSUCHE (gebündelt) UND RBAC FILTERUNG (je Anfrage) ---
+        retrieved: List[Tuple[List[str], List[str], int, List[float]]] = [([], [], 0, [])] * len(requests)
+        for i in sorted(lexical_rows):
+            retrieved[i] = self.retrieve_lexical(requests[i][0], lexical[i], timer=timers[i])
+
+        groups: Dict[Optional[Tuple[str, ...]], List[int]] = {}
+        for i in vector_rows:
+            key = tuple(get_allowed_classifications(requests[i][0])) if self.filter_mode == "prefilter" else None
+            groups.setdefault(key, []).append(i)
+        for allowed_classes, rows in groups.items():
+            if allowed_classes == ():
+                # Fail-Secure: Ohne erlaubte Klassifizierung findet keine Suche statt.
+                print(f"⚠️ {len(rows)} Anfragen ohne Leserechte. Retrieval übersprungen.")
+                continue
+            start = time.perf_counter()
+            results = self._current_vector_store().query(
+                [query_vecs[i] for i in rows], RETRIEVAL_COUNT, allowed_classes
+            )
+            self._share_timing(timers, rows, "vector_search", time.perf_counter() - start)
+            for position, i in enumerate(rows):
+                row_results = {
+                    field: [results[field][position]]
+                    for field in ("ids", "documents", "metadatas", "distances") if results.get(field)
+                }
+                retrieved[i] = self._rank_and_filter(
+                    requests[i][0], self.filter_mode, row_results, lexical[i], timers[i]
+                )
+
+        # --- SCHRITT 5: ANTWORT-CACHE UND KONTEXT-KONSTRUKTION ---
+        answers: List[Optional[str]] = [None] * len(requests)
+        usages: List[Optional[Dict[str, int]]] = [None] * len(requests)
+        prompts: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        finished: List[float] = [0.0] * len(requests)
+        contexts, cached_answers, pending = [], [], {}
+        for i, (role, query) in enumerate(requests):
+            allowed_docs_content, allowed_doc_ids, _, allowed_scores = retrieved[i]
+            contexts.append(self.answer_context(role, allowed_doc_ids))
+            cached_answers.append(self.lookup_answer(contexts[i], query, query_vecs[i]))
+            if cached_answers[i]:
+                answers[i] = cached_answers[i]["answer"]
+                finished[i] = time.perf_counter()
+                continue
+            with timers[i].span("prompt_build"):
+                pending[i], prompts[i] = self.build_prompt(
+                    role, query, allowed_doc_ids, allowed_docs_content, allowed_scores
+                )
+
+        # --- SCHRITT 6: ANTWORT-GENERIERUNG (LLM, begrenzt parallel) ---
+        def generate(i: int) -> None:
+            with timers[i].span("generation"):
+                answers[i], usages[i] = self.chat_provider.complete(pending[i])
+            finished[i] = time.perf_counter()
+
+        errors: Dict[int, str] = {}
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending)))) as executor:
+                futures = {i: executor.submit(generate, i) for i in pending}
+                for i, future in futures.items():
+                    # Ein fehlgeschlagener Aufruf darf die bereits erzeugten Antworten nicht verwerfen
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors[i] = str(e)
+                        print(f"❌ LLM-Aufruf für Anfrage {i} fehlgeschlagen: {e}")
+            if self.answer_cache is not None:
+                for i in pending:
+                    if i not in errors:
+                        self.answer_cache.store(contexts[i], requests[i][1], query_vecs[i], answers[i], usages[i])
+
+        results = []
+        records = []
+        for i, (role, query) in enumerate(requests):
+            allowed_docs_content, allowed_doc_ids, blocked_docs_count, _ = retrieved[i]
+            if i in errors:
+                results.append({
+                    "answer": None,
+                    "allowed_docs": allowed_docs_content,
+                    "blocked_count": blocked_docs_count,
+                    "latency": None,
+                    "stages": timers[i].timings,
+                    "token_usage": None,
+                    "prompt": prompts[i],
+                    "cache": None,
+                    "error": errors[i]
+                })
+                continue
+            latency = finished[i] - batch_start
+            records.append({
+                "user_role": role,
+                "query": query,
+                "response_text": answers[i],
+                "allowed_docs": allowed_doc_ids,
+                "blocked_count": blocked_docs_count,
+                "latency_seconds": latency,
+                "stage_timings": timers[i].timings,
+                "token_usage": usages[i],
+                "answer_cache": self.cache_status(cached_answers[i]),
+                "prompt": prompts[i]
+            })
+            results.append({
+                "answer": answers[i],
+                "allowed_docs": allowed_docs_content,
+                "blocked_count": blocked_docs_count,
+                "latency": latency,
+                "stages": timers[i].timings,
+                "token_usage": usages[i],
+                "prompt": prompts[i],
+                "cache": cached_answers[i]["match"] if cached_answers[i] else None,
+                "error": None
+            })
+
+        # --- SCHRITT 7: LOGGING & AUDIT (ein Schreibauftrag) ---
+        try:
+            if records:
+                log_requests(records)
+        except Exception as e:
+            # Das Logging darf den Hauptprozess nicht abbrechen, daher nur Konsolenausgabe
+            print(f"⚠️ Warnung: Audit-Logging fehlgeschlagen: {e}")
+
+        print(
+            f"--- RAG-Batch abgeschlossen: {len(requests)} Anfragen in {time.perf_counter() - batch_start:.2f}s"
+            + (f", {len(errors)} fehlgeschlagen" if errors else "") + " ---"
+        )
+        return results
+
+    @staticmethod
+    def _share_timing(timers: List[StageTimer], rows: List[int], stage: str, seconds: float) -> None:
+        """Verteilt die Dauer einer gebündelten Stufe zu gleichen Teilen auf die beteiligten Anfragen."""
+        for i in rows:
+            timers[i].timings[stage] = timers[i].timings.get(stage, 0.0) + seconds / len(rows)
+
+    def ask_stream(self, user_role: str, query: str) -> Iterator[Union[str, Dict[str, Any]]]:
+        """
+        Streaming-Variante von `ask`: liefert die Antwort Token für Token.
+
+        Retrieval und RBAC-Filterung laufen wie bei `ask` vollständig vor der
+        Generierung. Danach werden die Textfragmente des LLM unmittelbar
+        weitergereicht, sodass die wahrgenommene Latenz der Zeit bis zum ersten
+        Token entspricht. Als letztes Element folgt ein Metadaten-Ereignis (dict).
+
+        Args:
+            user_role (str): Die Rolle des Anfragenden (z. B. 'Mitarbeiter').
+            query (str): Die natürlichsprachliche Frage.
+
+        Yields:
+            str: Textfragmente der Antwort.
+            Dict[str, Any]: Abschließend die Metadaten (wie Rückgabewert von `ask`,
+                ergänzt um 'ttft' = Zeit bis zum ersten Token in Sekunden).
+
+        Der Audit-Eintrag wird auch geschrieben, wenn der Aufrufer den Generator vorzeitig
+        schließt; er enthält dann die bis dahin ausgelieferte Antwort und 'truncated': true.
+        """
+        timer = StageTimer()
+
+        print(f"\n--- Start RAG-Prozess (Streaming) ---")
+        print(f"Input: Rolle='{user_role}' | Query='{query}'")
+
+        # --- SCHRITT 1 & 2: RETRIEVAL UND RBAC FILTERUNG ---
+        lexical_hits = self.lexical_search(user_role, query, timer=timer)
+        if self.is_decisive(lexical_hits):
+            # Eindeutiger Begriffstreffer: kein Embedding-Aufruf, keine Vektorsuche
+            query_vec = None
+            allowed_docs_content, allowed_doc_ids, blocked_docs_count, allowed_scores = self.retrieve_lexical(
+                user_role, lexical_hits, timer=timer
+            )
+        else:
+            with timer.span("embedding"):
+                query_vec = self.get_embedding(query)
+            allowed_docs_content, allowed_doc_ids, blocked_docs_count, allowed_scores = self.retrieve(
+                user_role, query_vec, timer=timer, lexical_hits=lexical_hits
+            )
+
+        context = self.answer_context(user_role, allowed_doc_ids)
+        cached = self.lookup_answer(context, query, query_vec)
+        answer_parts: List[str] = []
+        time_to_first_token = None
+        token_usage, prompt_info = None, None
+        completed = False
+        try:
+            if cached:
+                # Gespeicherte Antwort wird als ein einziges Fragment ausgeliefert
+                answer_parts.append(cached["answer"])
+                time_to_first_token = timer.elapsed()
+                completed = True
+                yield cached["answer"]
+            else:
+                # --- SCHRITT 3: KONTEXT-KONSTRUKTION ---
+                with timer.span("prompt_build"):
+                    messages, prompt_info = self.build_prompt(
+                        user_role, query, allowed_doc_ids, allowed_docs_content, allowed_scores
+                    )
+
+                # --- SCHRITT 4: ANTWORT-GENERIERUNG (LLM, Streaming) ---
+                # Gemessen wird nur das Warten auf den Anbieter, nicht die Verarbeitungszeit des Aufrufers.
+                stream = iter(self.chat_provider.stream(messages))
+                try:
+                    while True:
+                        with timer.span("generation"):
+                            token = next(stream, None)
+                        if token is None:
+                            break
+                        if isinstance(token, dict):
+                            # Abschließendes Ereignis mit den Token-Verbrauchsdaten
+                            token_usage = token
+                            continue
+                        if time_to_first_token is None:
+                            time_to_first_token = timer.elapsed()
+                        answer_parts.append(token)
+                        yield token
+                finally:
+                    # Bricht der Aufrufer ab, wird auch der Stream des Anbieters beendet
+                    close = getattr(stream, "close", None)
+                    if close is not None:
+                        close()
+                completed = True
+                if self.answer_cache is not None:
+                    self.answer_cache.store(context, query, query_vec, "".join(answer_parts), token_usage)
+        finally:
+            # --- SCHRITT 5: LOGGING & AUDIT ---
+            # Auch bei vorzeitigem Abbruch (z. B. Stop/Rerun in Streamlit, getrennte Verbindung):
+            # Die bis dahin ausgelieferten Tokens hat der Benutzer bereits gesehen.
+            answer = "".join(answer_parts)
+            process_duration = timer.elapsed()
+            try:
+                log_request(
+                    user_role=user_role,
+                    query=query,
+                    response_text=answer,
+                    allowed_docs=allowed_doc_ids,
+                    blocked_count=blocked_docs_count,
+                    latency_seconds=process_duration,
+                    ttft_seconds=time_to_first_token,
+                    stage_timings=timer.timings,
+                    token_usage=token_usage,
+                    answer_cache=self.cache_status(cached),
+                    prompt=prompt_info,
+                    truncated=not completed
+                )
+            except Exception as e:
+                # Das Logging darf den Hauptprozess nicht abbrechen, daher nur Konsolenausgabe
+                print(f"⚠️ Warnung: Audit-Logging fehlgeschlagen: {e}")
+
+        yield {
+            "answer": answer,
+            "allowed_docs": allowed_docs_content,
+            "blocked_count": blocked_docs_count,
+            "latency": process_duration,
+            "ttft": time_to_first_token,
+            "stages": timer.timings,
+            "token_usage": token_usage,
+            "prompt": prompt_info,
+            "cache": cached["match"] if cached else None
+        }
+
+    async def aget_embedding(self, text: str) -> List[float]:
+        """
+        Asynchrone Variante von `get_embedding` (asynchroner Anbieter, Cache-Zugriffe im Thread-Pool).
+
+        Args:
+            text (str): Der Eingabetext.
+
+        Returns:
+            List[float]: Der Vektor, der den Text repräsentiert.
+        """
+        normalized = normalize_text(text)
+        model = self.embedding_provider.model
+        cached = (await asyncio.to_thread(self.embedding_cache.get_many, model, [normalized]))[0]
+        if cached is not None:
+            return cached
+
+        vector = (await self.embedding_provider.aembed([normalized]))[0]
+        await asyncio.to_thread(self.embedding_cache.put_many, model, [normalized], [vector])
+        return vector
+
+    async def aask(self, user_role: str, query: str) -> Dict[str, Any]:
+        """
+        Asynchrone Variante von `ask` für den Betrieb mit vielen gleichzeitigen Benutzern.
+
+        Embedding und Antwort-Generierung laufen asynchron über die Anbieter; die (blockierende)
+        ChromaDB-Suche und das Audit-Logging werden in den Thread-Pool ausgelagert,
+        sodass der Event-Loop während aller Netzwerk- und I/O-Wartezeiten frei bleibt.
+
+        Args:
+            user_role (str): Die Rolle des Anfragenden (z. B. 'Mitarbeiter').
+            query (str): Die natürlichsprachliche Frage.
+
+        Returns:
+            Dict[str, Any]: Enthält die generierte Antwort sowie Metadaten zur Filterung.
+        """
+        timer = StageTimer()
+
+        # --- SCHRITT 1 & 2: RETRIEVAL UND RBAC FILTERUNG ---
+        lexical_hits = await asyncio.to_thread(self.lexical_search, user_role, query, None, timer)
+        if self.is_decisive(lexical_hits):
+            query_vec = None
+            allowed_docs_content, allowed_doc_ids, blocked_docs_count, allowed_scores = await asyncio.to_thread(
+                self.retrieve_lexical, user_role, lexical_hits, None, timer
+            )
+        else:
+            with timer.span("embedding"):
+                query_vec = await self.aget_embedding(query)
+            allowed_docs_content, allowed_doc_ids, blocked_docs_count, allowed_scores = await asyncio.to_thread(
+                self.retrieve, user_role, query_vec, None, timer, lexical_hits
+            )
+
+        # Der Cache liegt im Arbeitsspeicher; Zugriffe blockieren den Event-Loop nicht spürbar
+        context = self.answer_context(user_role, allowed_doc_ids)
+        cached = self.lookup_answer(context, query, query_vec)
+        if cached:
+            answer, token_usage, prompt_info = cached["answer"], None, None
+        else:
+            # --- SCHRITT 3: KONTEXT-KONSTRUKTION ---
+            with timer.span("prompt_build"):
+                messages, prompt_info = self.build_prompt(
+                    user_role, query, allowed_doc_ids, allowed_docs_content, allowed_scores
+                )
+
+            # --- SCHRITT 4: ANTWORT-GENERIERUNG (LLM) ---
+            with timer.span("generation"):
+                answer, token_usage = await self.chat_provider.acomplete(messages)
+            if self.answer_cache is not None:
+                self.answer_cache.store(context, query, query_vec, answer, token_usage)
+
+        process_duration = timer.elapsed()
+
+        # --- SCHRITT 5: LOGGING & AUDIT ---
+        try:
+            await alog_request(
+                user_role=user_role,
+                query=query,
+                response_text=answer,
+                allowed_docs=allowed_doc_ids,
+                blocked_count=blocked_docs_count,
+                latency_seconds=process_duration,
+                stage_timings=timer.timings,
+                token_usage=token_usage,
+                answer_cache=self.cache_status(cached),
+                prompt=prompt_info
+            )
+        except Exception as e:
+            # Das Logging darf den Hauptprozess nicht abbrechen, daher nur Konsolenausgabe
+            print(f"⚠️ Warnung: Audit-Logging fehlgeschlagen: {e}")
+
+        return {
+            "answer": answer,
+            "allowed_docs": allowed_docs_content,
+            "blocked_count": blocked_docs_count,
+            "latency": process_duration,
+            "stages": timer.timings,
+            "token_usage": token_usage,
+            "prompt": prompt_info,
+            "cache": cached["match"] if cached else None
+        }
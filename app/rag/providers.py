@@ -0,0 +1,323 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional, Union
+import dotenv
+import numpy as np
+
+from app.rag.prompts import CONTEXT_START, CONTEXT_END
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+# Auswahl der Anbieter: 'openai' (Standard) oder 'local' (deterministisch, ohne Netzwerk)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+CHAT_PROVIDER = os.getenv("CHAT_PROVIDER", "openai")
+PROVIDERS = ("openai", "local")
+
+# Verkürzte Embeddings (Parameter `dimensions` der OpenAI API, z. B. 512 statt 1536 bei
+# text-embedding-3-small). Leer = volle Dimension des Modells. Die Dimension ist Teil
+# der Modellkennung (`EmbeddingProvider.model`), damit Cache und Manifest Vektoren
+# verschiedener Länge nicht vermischen; eine Änderung erzwingt einen Neuaufbau des Index.
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+
+# Parameter der lokalen Implementierungen
+LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "1536"))               # wie text-embedding-3-small
+LOCAL_EMBEDDING_LATENCY = float(os.getenv("LOCAL_EMBEDDING_LATENCY", "0"))        # Simulierte Latenz je Aufruf (s)
+LOCAL_CHAT_LATENCY = float(os.getenv("LOCAL_CHAT_LATENCY", "0"))                  # Simulierte Zeit bis zum ersten Token (s)
+LOCAL_CHAT_TOKEN_INTERVAL = float(os.getenv("LOCAL_CHAT_TOKEN_INTERVAL", "0"))    # Simulierte Zeit je weiterem Token (s)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class ChatResult(NamedTuple):
+    """Ergebnis einer (nicht gestreamten) Chat-Anfrage."""
+    content: str
+    usage: Optional[Dict[str, int]]
+
+
+def usage_to_dict(usage: Any) -> Optional[Dict[str, int]]:
+    """Extrahiert die Token-Verbrauchsdaten aus einer OpenAI-Antwort (falls vorhanden)."""
+    if usage is None:
+        return None
+    result = {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens
+    }
+    # Aus dem Prompt-Cache des Anbieters bediente Präfix-Tokens (fehlt bei älteren API-Versionen)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached_tokens is not None:
+        result["cached_tokens"] = cached_tokens
+    return result
+
+
+class EmbeddingProvider(ABC):
+    """Schnittstelle für Embedding-Modelle. `model` dient auch als Schlüssel im Embedding-Cache."""
+
+    model: str
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Erzeugt Embeddings für mehrere Texte mit einem einzigen Aufruf."""
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Asynchrone Variante von `embed` (Standard: Ausführung im Thread-Pool)."""
+        return await asyncio.to_thread(self.embed, texts)
+
+
+class ChatProvider(ABC):
+    """Schnittstelle für Chat-Modelle."""
+
+    model: str
+
+    @abstractmethod
+    def complete(self, messages: List[Dict[str, str]]) -> ChatResult:
+        """Erzeugt eine vollständige Antwort."""
+
+    @abstractmethod
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[Union[str, Dict[str, int]]]:
+        """Liefert die Antwort als Textfragmente; optional zuletzt die Token-Verbrauchsdaten (dict)."""
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> ChatResult:
+        """Asynchrone Variante von `complete` (Standard: Ausführung im Thread-Pool)."""
+        return await asyncio.to_thread(self.complete, messages)
+
+
+def embedding_model_name(model: str, dimensions: Optional[int] = None) -> str:
+    """Kennung eines Embedding-Modells inkl. verkürzter Dimension (z. B. 'text-embedding-3-small@512')."""
+    return f"{model}@{dimensions}" if dimensions else model
+
+
+def hashing_model_name(dim: int) -> str:
+    """Kennung der lokalen Hashing-Embeddings einer Dimension (z. B. 'local-hashing-1536')."""
+    return f"local-hashing-{dim}"
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings über die OpenAI API (optional verkürzt, siehe EMBEDDING_DIMENSIONS)."""
+
+    def __init__(self, model: str, dimensions: Optional[int] = None):
+        from openai import OpenAI, AsyncOpenAI
+
+        self.api_model = model
+        self.dimensions = dimensions
+        self.model = embedding_model_name(model, dimensions)
+        self.client = OpenAI()
+        self.async_client = AsyncOpenAI()
+
+    def _request_args(self, texts: List[str]) -> Dict[str, Any]:
+        args = {"input": texts, "model": self.api_model}
+        if self.dimensions:
+            args["dimensions"] = self.dimensions
+        return args
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(**self._request_args(texts))
+        return [item.embedding for item in response.data]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        response = await self.async_client.embeddings.create(**self._request_args(texts))
+        return [item.embedding for item in response.data]
+
+
+class OpenAIChatProvider(ChatProvider):
+    """Antwort-Generierung über die OpenAI Chat-Completions-API."""
+
+    def __init__(self, model: str):
+        from openai import OpenAI, AsyncOpenAI
+
+        self.model = model
+        self.client = OpenAI()
+        self.async_client = AsyncOpenAI()
+
+    def complete(self, messages: List[Dict[str, str]]) -> ChatResult:
+        completion = self.client.chat.completions.create(model=self.model, messages=messages)
+        return ChatResult(completion.choices[0].message.content, usage_to_dict(completion.usage))
+
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[Union[str, Dict[str, int]]]:
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for chunk in stream:
+            if chunk.usage is not None:
+                # Der letzte Chunk enthält die Token-Verbrauchsdaten (ohne choices)
+                yield usage_to_dict(chunk.usage)
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> ChatResult:
+        completion = await self.async_client.chat.completions.create(model=self.model, messages=messages)
+        return ChatResult(completion.choices[0].message.content, usage_to_dict(completion.usage))
+
+
+@lru_cache(maxsize=65536)
+def _feature_slot(feature: str, dim: int) -> tuple:
+    """Bildet ein Merkmal deterministisch auf (Dimension, Vorzeichen) ab (Feature Hashing)."""
+    value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+    return value % dim, 1.0 if (value >> 63) & 1 else -1.0
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministische, lokale Embeddings per Feature Hashing.
+
+    Wörter und Zeichen-Trigramme (für deutsche Komposita) werden in einen Vektor
+    fester Dimension gehasht und auf Länge 1 normiert. Texte mit gemeinsamen
+    Wörtern liegen dadurch nahe beieinander - ausreichend, um Retrieval, RBAC und
+    Caching realistisch zu testen, ohne das Netzwerk zu nutzen.
+    """
+
+    def __init__(self, dim: int = LOCAL_EMBEDDING_DIM, latency: float = LOCAL_EMBEDDING_LATENCY):
+        self.dim = dim
+        self.latency = latency
+        self.model = hashing_model_name(dim)
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD_PATTERN.findall(text.lower()):
+            index, sign = _feature_slot(word, self.dim)
+            vector[index] += sign
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                index, sign = _feature_slot(padded[i:i + 3], self.dim)
+                vector[index] += 0.5 * sign
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+
+class EchoChatProvider(ChatProvider):
+    """
+    Deterministisches, lokales Chat-Modell für Benchmarks und Tests.
+
+    Die Antwort wiederholt die Frage und den Beginn des Kontexts. Zeit bis zum
+    ersten Token und Zeit je weiterem Token sind konfigurierbar; die Token-Zahlen
+    werden über die Anzahl der Wörter angenähert.
+    """
+
+    def __init__(
+        self,
+        latency: float = LOCAL_CHAT_LATENCY,
+        token_interval: float = LOCAL_CHAT_TOKEN_INTERVAL,
+        model: str = "local-echo"
+    ):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.model = model
+
+    def _answer(self, messages: List[Dict[str, str]]) -> ChatResult:
+        question = messages[-1]["content"] if messages else ""
+        system = "\n".join(m["content"] for m in messages[:-1])
+        context = system.split(CONTEXT_START)[-1].split(CONTEXT_END)[0].strip()
+        content = f"Antwort auf: {question} | Kontext: {context[:200]}"
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+        completion_tokens = len(content.split())
+        return ChatResult(content, {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        })
+
+    def _total_latency(self, content: str) -> float:
+        return self.latency + self.token_interval * max(len(content.split(" ")) - 1, 0)
+
+    def complete(self, messages: List[Dict[str, str]]) -> ChatResult:
+        result = self._answer(messages)
+        delay = self._total_latency(result.content)
+        if delay:
+            time.sleep(delay)
+        return result
+
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[Union[str, Dict[str, int]]]:
+        result = self._answer(messages)
+        if self.latency:
+            time.sleep(self.latency)
+        for i, word in enumerate(result.content.split(" ")):
+            if i and self.token_interval:
+                time.sleep(self.token_interval)
+            yield word if i == 0 else " " + word
+        yield result.usage
+
+    async def acomplete(self, messages: List[Dict[str, str]]) -> ChatResult:
+        result = self._answer(messages)
+        delay = self._total_latency(result.content)
+        if delay:
+            await asyncio.sleep(delay)
+        return result
+
+
+def resolve_embedding_model(
+    model: str,
+    provider: str = EMBEDDING_PROVIDER,
+    dimensions: Optional[int] = EMBEDDING_DIMENSIONS
+) -> str:
+    """
+    Modellkennung des Anbieters, den `create_embedding_provider` mit denselben Argumenten
+    erzeugen würde - ohne ihn zu erzeugen (z. B. für den Abgleich mit dem Index-Manifest).
+
+    Args:
+        model (str): Modellname für den OpenAI-Anbieter (z. B. 'text-embedding-3-small').
+        provider (str): 'openai' oder 'local' (siehe EMBEDDING_PROVIDER).
+        dimensions (int, optional): Verkürzte Dimension (siehe EMBEDDING_DIMENSIONS).
+    """
+    if provider == "local":
+        return hashing_model_name(dimensions or LOCAL_EMBEDDING_DIM)
+    return embedding_model_name(model, dimensions)
+
+
+def create_embedding_provider(
+    model: str,
+    provider: str = EMBEDDING_PROVIDER,
+    dimensions: Optional[int] = EMBEDDING_DIMENSIONS
+) -> EmbeddingProvider:
+    """
+    Erzeugt den konfigurierten Embedding-Anbieter.
+
+    Args:
+        model (str): Modellname für den OpenAI-Anbieter (z. B. 'text-embedding-3-small').
+        provider (str): 'openai' oder 'local' (siehe EMBEDDING_PROVIDER).
+        dimensions (int, optional): Verkürzte Dimension (siehe EMBEDDING_DIMENSIONS).
+    """
+    if provider == "openai":
+        return OpenAIEmbeddingProvider(model, dimensions)
+    if provider == "local":
+        return HashingEmbeddingProvider(dim=dimensions or LOCAL_EMBEDDING_DIM)
+    raise ValueError(f"Unbekannter Embedding-Anbieter: '{provider}'. Erlaubt: {PROVIDERS}")
+
+
+def create_chat_provider(model: str, provider: str = CHAT_PROVIDER) -> ChatProvider:
+    """
+    Erzeugt den konfigurierten Chat-Anbieter.
+
+    Args:
+        model (str): Modellname für den OpenAI-Anbieter (z. B. 'gpt-4-turbo').
+        provider (str): 'openai' oder 'local' (siehe CHAT_PROVIDER).
+    """
+    if provider == "openai":
+        return OpenAIChatProvider(model)
+    if provider == "local":
+        return EchoChatProvider()
+    raise ValueError(f"Unbekannter Chat-Anbieter: '{provider}'. Erlaubt: {PROVIDERS}")
@@ -0,0 +1,95 @@
+import os
+import re
+from functools import lru_cache
+from typing import List, Dict
+import dotenv
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+# Exakte Zählung mit dem Tokenizer des Modells, falls installiert (tiktoken, wird erst
+# bei der ersten Zählung importiert).
+# 'auto': tiktoken falls verfügbar, sonst Näherung | 'tiktoken' | 'approx'
+TOKEN_COUNTER = os.getenv("TOKEN_COUNTER", "auto")
+TOKENIZER_MODEL = os.getenv("LLM_MODEL", "gpt-4-turbo")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "65536"))
+
+# Näherung: Wörter werden in Stücke von ca. 4 Zeichen zerlegt, Satzzeichen zählen einzeln
+CHARS_PER_TOKEN = 4
+_APPROX_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Zusätzliche Tokens je Chat-Nachricht bzw. für den Antwortbeginn (Chat-Completions-Format)
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_OVERHEAD_TOKENS = 3
+
+_encoding = None
+
+
+def _get_encoding():
+    """Lädt den Tokenizer einmalig (None, falls nicht verfügbar oder abgeschaltet)."""
+    global _encoding
+    if _encoding is None and TOKEN_COUNTER in ("auto", "tiktoken"):
+        try:
+            import tiktoken
+        except ImportError:
+            _encoding = False
+            return None
+        try:
+            try:
+                _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # z. B. kein Netzwerk zum Laden der BPE-Datei -> Näherung
+            print(f"⚠️ Warnung: Tokenizer nicht verfügbar ({e}), Token-Zahlen werden geschätzt.")
+            _encoding = False
+    return _encoding or None
+
+
+def counter_name() -> str:
+    """Bezeichnung des aktiven Zählverfahrens (für Audit-Log und Benchmarks)."""
+    encoding = _get_encoding()
+    return f"tiktoken:{encoding.name}" if encoding else "approx"
+
+
+def _piece_tokens(piece: str) -> int:
+    """Geschätzte Tokens eines Wortes bzw. Satzzeichens."""
+    return (len(piece) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def count_tokens(text: str) -> int:
+    """
+    Zählt die Tokens eines Textes.
+
+    Mit tiktoken exakt für das konfigurierte Modell, sonst per Näherung. Die
+    Ergebnisse werden zwischengespeichert, da dieselben Dokumente in vielen
+    Anfragen wiederkehren.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return sum(_piece_tokens(piece) for piece in _APPROX_PATTERN.findall(text))
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Zählt die Tokens einer Nachrichtenliste inkl. Format-Overhead der Chat-API."""
+    return sum(count_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages) + REPLY_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Kürzt einen Text auf höchstens `max_tokens` Tokens (bei der Näherung an Wortgrenzen)."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    used = 0
+    for match in _APPROX_PATTERN.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > max_tokens:
+            return text[:match.start()].rstrip()
+    return text
@@ -0,0 +1,583 @@
+import os
+import re
+import json
+import heapq
+import weakref
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import dotenv
+import numpy as np
+
+# Laden der Umgebungsvariablen für Konfigurationsparameter
+dotenv.load_dotenv()
+
+# Backend der Vektorsuche:
+# - 'chroma': ChromaDB-Collection (HNSW, persistiert in SQLite).
+# - 'flat':   Exakte Suche über eine per Memory-Map geladene N x d float32-Matrix
+#             (ein Matrixprodukt je Anfrage-Batch). Für Korpora bis zu einigen
+#             zehntausend Chunks schneller und sparsamer als HNSW.
+# - 'partitioned': Eine ChromaDB-Collection je Klassifizierung ('company_kb__public', ...).
+#             Im Modus 'prefilter' werden nur die Partitionen durchsucht, die die Rolle
+#             lesen darf; nicht freigegebene Dokumente sind für die Suche unerreichbar
+#             und der Suchraum kleiner als bei einem Metadaten-Filter.
+# Die ChromaDB-Collection bleibt in allen Fällen die maßgebliche Quelle
+# (build_index.py); Flat-Index bzw. Partitionen werden daraus exportiert.
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
+VECTOR_STORES = ("chroma", "flat", "partitioned")
+# Verzeichnis des Flat-Index (wird von build_index.py bei VECTOR_STORE=flat geschrieben).
+# Ein leerer Wert bedeutet: Index beim Start aus der Collection aufbauen.
+FLAT_INDEX_PATH = os.getenv("FLAT_INDEX_PATH", "./data/flat_index")
+# Speicherformat der Suchmatrix im Flat-Index:
+# - 'none':    float32 (4 Byte je Komponente).
+# - 'float16': halbe Genauigkeit (2 Byte je Komponente).
+# - 'int8':    8-Bit-Ganzzahlen mit einem Skalierungsfaktor je Vektor (1 Byte je Komponente).
+# Gesucht wird über die quantisierte Matrix. Optional werden die besten
+# FLAT_RESCORE_FACTOR x Top-K Kandidaten danach mit den float32-Vektoren neu bewertet
+# (Standard 0 = ohne Nachbewertung; int8 erreicht ohne sie bereits ~99 % recall@5,
+# siehe benchmarks/eval_quantization.py). Die float32-Matrix liegt weiter auf der Platte; die Zeilen der
+# Kandidaten werden einzeln per pread gelesen, nicht über die Memory-Map.
+FLAT_INDEX_QUANTIZATION = os.getenv("FLAT_INDEX_QUANTIZATION", "none")
+QUANTIZATIONS = ("none", "float16", "int8")
+FLAT_RESCORE_FACTOR = int(os.getenv("FLAT_RESCORE_FACTOR", "0"))
+
+_VECTORS_FILE = "vectors.npy"
+_CLASSES_FILE = "classifications.npy"
+_META_FILE = "store.json"
+_CODES_FILE = "vectors_quantized.npy"
+_SCALES_FILE = "scales.npy"
+# Zeilen je Block beim Bewerten der quantisierten Matrix (die float32-Kopie bleibt im CPU-Cache)
+_SCORE_BLOCK_ROWS = 256
+
+# Trennzeichen zwischen Collection-Name und Klassifizierung im Namen einer Partition
+PARTITION_SEPARATOR = "__"
+# Metadaten-Schlüssel einer Partition mit der Index-Version ihres letzten Abgleichs
+PARTITION_VERSION_KEY = "index_version"
+# Erlaubte Collection-Namen in ChromaDB: 3-512 Zeichen [a-zA-Z0-9._-], Anfang und Ende alphanumerisch
+_COLLECTION_NAME_PATTERN = re.compile(r"[a-zA-Z0-9][a-zA-Z0-9._-]{1,510}[a-zA-Z0-9]")
+
+
+def _classification_of(metadata: Optional[Dict[str, Any]]) -> str:
+    """Klassifizierung eines Eintrags (Default wie im RBAC-Filter: 'internal')."""
+    return (metadata or {}).get("classification", "internal")
+
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Quantisiert auf Länge 1 normierte Vektoren (siehe FLAT_INDEX_QUANTIZATION).
+
+    Returns:
+        Tuple[Optional[np.ndarray], Optional[np.ndarray]]: Quantisierte Matrix (None bei
+            'none') und Skalierungsfaktor je Vektor (nur bei 'int8').
+    """
+    if quantization == "none":
+        return None, None
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    if quantization == "int8":
+        # Symmetrisch je Vektor: die betragsgrößte Komponente wird auf 127 abgebildet
+        scales = np.abs(vectors).max(axis=1) / 127.0 if vectors.size else np.zeros(len(vectors))
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales
+    raise ValueError(f"Unbekannte Quantisierung: '{quantization}'. Erlaubt: {QUANTIZATIONS}")
+
+
+class VectorStore(ABC):
+    """
+    Schnittstelle der Vektorsuche hinter `RbacRagPipeline`.
+
+    Ergebnisse haben das Format von `chromadb.Collection.query` (verschachtelte Listen
+    'ids', 'documents', 'metadatas', 'distances' mit einer Liste je Anfragevektor),
+    damit Fusion und RBAC-Filter unabhängig vom Backend arbeiten.
+    """
+
+    # Distanzmaß der Ergebnisse ('l2' = quadrierte euklidische Distanz, 'cosine' = 1 - Kosinus)
+    space: str = "l2"
+    # Index-Version des Bestands (None, falls das Backend stets aktuell ist)
+    version: Optional[str] = None
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int,
+        allowed_classifications: Optional[Sequence[str]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Sucht die `n_results` nächsten Nachbarn je Anfragevektor.
+
+        Args:
+            query_embeddings: Ein oder mehrere Anfragevektoren.
+            n_results (int): Top-K je Anfrage.
+            allowed_classifications (Sequence[str], optional): Nur Einträge dieser
+                Klassifizierungen berücksichtigen (Vorfilter, None = alle).
+        """
+
+    @abstractmethod
+    def warmup(self) -> None:
+        """Lädt den Suchindex in den Arbeitsspeicher (z. B. vor der ersten Anfrage)."""
+
+
+class ChromaVectorStore(VectorStore):
+    """Vektorsuche über eine ChromaDB-Collection (bisheriges Verhalten)."""
+
+    def __init__(self, collection: Any):
+        self.collection = collection
+        self.space = (collection.metadata or {}).get("hnsw:space", "l2")
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int,
+        allowed_classifications: Optional[Sequence[str]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        # ChromaDB akzeptiert nur Python-Floats bzw. float32-Arrays (keine Listen von NumPy-Skalaren)
+        vectors = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        query_args = {"query_embeddings": list(vectors), "n_results": n_results}
+        if allowed_classifications is not None:
+            query_args["where"] = {"classification": {"$in": list(allowed_classifications)}}
+        return self.collection.query(**query_args)
+
+    def warmup(self) -> None:
+        # Die erste Abfrage lädt den HNSW-Index; ein Nullvektor erspart den Embedding-Aufruf
+        sample = self.collection.get(limit=1, include=["embeddings"])
+        if sample["embeddings"] is not None and len(sample["embeddings"]):
+            dimension = len(sample["embeddings"][0])
+            self.collection.query(query_embeddings=[[0.0] * dimension], n_results=1, include=[])
+
+
+class FlatVectorStore(VectorStore):
+    """
+    Exakte Vektorsuche über eine zusammenhängende float32-Matrix.
+
+    Die Vektoren werden beim Aufbau auf Länge 1 normiert; die Kosinus-Ähnlichkeit
+    aller Einträge ergibt sich damit aus einem einzigen Matrixprodukt (BLAS) für alle
+    Anfragevektoren. Parallel zur Matrix liegt je Eintrag ein Klassifizierungs-Code
+    (uint8), aus dem der RBAC-Vorfilter eine boolesche Maske bildet; ausgeschlossene
+    Einträge werden vor der Top-K-Auswahl (`argpartition`) auf -inf gesetzt.
+
+    Auf der Platte liegen Matrix und Codes als .npy-Dateien und werden per Memory-Map
+    geöffnet (das Betriebssystem lädt nur genutzte Seiten, mehrere Prozesse teilen sie).
+
+    Mit Quantisierung (float16/int8) wird die verkleinerte Matrix blockweise durchsucht
+    und (bei `rescore_factor` > 0) nur für die besten `rescore_factor` x Top-K Kandidaten
+    auf die float32-Vektoren zugegriffen.
+    """
+
+    space = "cosine"
+
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        vectors: np.ndarray,
+        class_codes: np.ndarray,
+        class_names: List[str],
+        version: Optional[str] = None,
+        quantization: str = "none",
+        codes: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None
+    ):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.vectors = vectors
+        self.class_codes = class_codes
+        self.class_names = class_names
+        self.version = version
+        self.quantization = quantization
+        self.codes = codes
+        self.scales = scales
+        self.rescore_factor = FLAT_RESCORE_FACTOR
+        self._vectors_fd: Optional[int] = None
+        self._class_lookup = {name: code for code, name in enumerate(class_names)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def index_nbytes(self) -> int:
+        """Größe der bei jeder Anfrage durchsuchten Matrix in Byte (quantisiert bzw. float32)."""
+        if self.codes is None:
+            return int(self.vectors.nbytes)
+        return int(self.codes.nbytes) + (int(self.scales.nbytes) if self.scales is not None else 0)
+
+    @classmethod
+    def build(
+        cls,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        version: Optional[str] = None,
+        quantization: str = FLAT_INDEX_QUANTIZATION
+    ) -> "FlatVectorStore":
+        """Erzeugt den Index aus Vektoren und Metadaten (Klassifizierung Default: 'internal')."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if not len(ids):
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+        classifications = [_classification_of(metadata) for metadata in metadatas]
+        class_names = sorted(set(classifications))
+        if len(class_names) > 255:
+            raise ValueError(f"Zu viele Klassifizierungen für den Flat-Index: {len(class_names)} (max. 255)")
+        lookup = {name: code for code, name in enumerate(class_names)}
+        class_codes = np.array([lookup[c] for c in classifications], dtype=np.uint8)
+        vectors = np.ascontiguousarray(vectors)
+        codes, scales = quantize(vectors, quantization)
+        return cls(
+            list(ids), [d or "" for d in documents], [m or {} for m in metadatas],
+            vectors, class_codes, class_names, version, quantization, codes, scales
+        )
+
+    @classmethod
+    def from_collection(
+        cls, collection: Any, version: Optional[str] = None, quantization: str = FLAT_INDEX_QUANTIZATION
+    ) -> "FlatVectorStore":
+        """Exportiert den Bestand einer ChromaDB-Collection in einen Flat-Index."""
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        embeddings = data["embeddings"] if data["embeddings"] is not None else []
+        return cls.build(data["ids"], embeddings, data["documents"], data["metadatas"], version, quantization)
+
+    def get(self, include: Sequence[str] = ("documents", "metadatas")) -> Dict[str, Any]:
+        """Bestand im Format von `chromadb.Collection.get` (z. B. für `BM25Index.from_collection`)."""
+        data = {"ids": list(self.ids)}
+        if "documents" in include:
+            data["documents"] = list(self.documents)
+        if "metadatas" in include:
+            data["metadatas"] = list(self.metadatas)
+        if "embeddings" in include:
+            data["embeddings"] = np.asarray(self.vectors)
+        return data
+
+    def _mask(self, allowed_classifications: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        """Boolesche Maske der erlaubten Einträge (None = keine Einschränkung)."""
+        if allowed_classifications is None:
+            return None
+        codes = [self._class_lookup[c] for c in allowed_classifications if c in self._class_lookup]
+        return np.isin(self.class_codes, np.asarray(codes, dtype=np.uint8))
+
+    def _read_rows(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Liest einzelne float32-Zeilen für die Nachbewertung.
+
+        Bei einem gespeicherten Index per `os.pread` aus der .npy-Datei: Ein Zugriff über
+        die Memory-Map würde das Betriebssystem benachbarte Seiten mit einblenden lassen
+        (fault-around), sodass nach wenigen Anfragen fast die ganze float32-Matrix im
+        Prozess liegt.
+        """
+        vectors = self.vectors
+        if not (isinstance(vectors, np.memmap) and vectors.filename and hasattr(os, "pread")
+                and vectors.flags.c_contiguous):
+            return np.asarray(vectors[indices])
+        if self._vectors_fd is None:
+            self._vectors_fd = os.open(vectors.filename, os.O_RDONLY)
+            weakref.finalize(self, os.close, self._vectors_fd)
+        row_bytes = vectors.shape[1] * vectors.itemsize
+        rows = np.empty((len(indices), vectors.shape[1]), dtype=vectors.dtype)
+        for position, index in enumerate(indices.tolist()):
+            rows[position] = np.frombuffer(
+                os.pread(self._vectors_fd, row_bytes, vectors.offset + index * row_bytes), dtype=vectors.dtype
+            )
+        return rows
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Kosinus-Ähnlichkeit aller Einträge je Anfrage (bei Quantisierung angenähert)."""
+        if self.codes is None:
+            return queries @ self.vectors.T  # (Anfragen x Einträge), ein BLAS-Aufruf
+        # Blockweise Umwandlung nach float32 (float16/int8 haben keine BLAS-Routinen) in einen
+        # wiederverwendeten Puffer; neue Arrays je Block kosten Seitenfehler und sind deutlich langsamer
+        scores = np.empty((len(queries), len(self.ids)), dtype=np.float32)
+        buffer = np.empty((min(_SCORE_BLOCK_ROWS, len(self.ids)), self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.ids), _SCORE_BLOCK_ROWS):
+            block = self.codes[start:start + _SCORE_BLOCK_ROWS]
+            converted = buffer[:len(block)]
+            np.copyto(converted, block, casting="unsafe")
+            scores[:, start:start + len(block)] = queries @ converted.T
+        if self.scales is not None:
+            scores *= np.asarray(self.scales)
+        return scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Indizes und Werte der `k` höchsten Scores je Zeile, absteigend sortiert."""
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int,
+        allowed_classifications: Optional[Sequence[str]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        mask = self._mask(allowed_classifications)
+        available = len(self.ids) if mask is None else int(mask.sum())
+        k = min(n_results, available)
+        if k <= 0:
+            for values in result.values():
+                values.extend([] for _ in range(len(queries)))
+            return result
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+        scores = self._scores(queries)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+
+        if self.codes is None or self.rescore_factor <= 0:
+            top, top_scores = self._top_k(scores, k)
+        else:
+            # Kandidaten aus der quantisierten Suche mit float32-Vektoren neu bewerten
+            candidates, _ = self._top_k(scores, min(k * self.rescore_factor, available))
+            vectors = self._read_rows(candidates.ravel()).reshape(*candidates.shape, -1)
+            exact = np.einsum("qcd,qd->qc", vectors, queries)
+            order = np.argsort(-exact, axis=1, kind="stable")[:, :k]
+            top = np.take_along_axis(candidates, order, axis=1)
+            top_scores = np.take_along_axis(exact, order, axis=1)
+
+        for indices, similarities in zip(top.tolist(), top_scores.tolist()):
+            result["ids"].append([self.ids[i] for i in indices])
+            result["documents"].append([self.documents[i] for i in indices])
+            result["metadatas"].append([self.metadatas[i] for i in indices])
+            result["distances"].append([1.0 - similarity for similarity in similarities])
+        return result
+
+    def warmup(self) -> None:
+        # Liest alle Seiten der durchsuchten Matrix einmal, damit die erste Anfrage nicht von der Platte lädt
+        if len(self.ids):
+            float(np.asarray(self.vectors if self.codes is None else self.codes).sum(dtype=np.float64))
+
+    def save(self, path: str = FLAT_INDEX_PATH) -> None:
+        """
+        Speichert den Index in das Verzeichnis `path` (Matrizen und Codes als .npy, Rest als JSON).
+
+        Jede Datei wird atomar ersetzt; die JSON-Datei mit der Version zuletzt. Ein
+        Leser, der Dateien verschiedener Stände sieht, erkennt dies an der Anzahl
+        der Einträge (siehe `load`).
+        """
+        os.makedirs(path, exist_ok=True)
+        arrays = [(_VECTORS_FILE, self.vectors), (_CLASSES_FILE, self.class_codes)]
+        for name, array in ((_CODES_FILE, self.codes), (_SCALES_FILE, self.scales)):
+            if array is not None:
+                arrays.append((name, array))
+            elif os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))  # Rest eines früheren, anders quantisierten Index
+        for name, array in arrays:
+            tmp_path = os.path.join(path, name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.asarray(array))
+            os.replace(tmp_path, os.path.join(path, name))
+        meta = {
+            "version": self.version,
+            "count": len(self.ids),
+            "quantization": self.quantization,
+            "class_names": self.class_names,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas
+        }
+        tmp_path = os.path.join(path, _META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(path, _META_FILE))
+
+    @classmethod
+    def load(cls, path: str = FLAT_INDEX_PATH) -> Optional["FlatVectorStore"]:
+        """Öffnet einen gespeicherten Index per Memory-Map (None, falls er fehlt oder unvollständig ist)."""
+        if not path or not os.path.exists(os.path.join(path, _META_FILE)):
+            return None
+        with open(os.path.join(path, _META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        try:
+            quantization = meta.get("quantization", "none")
+            vectors = np.load(os.path.join(path, _VECTORS_FILE), mmap_mode="r")
+            class_codes = np.load(os.path.join(path, _CLASSES_FILE), mmap_mode="r")
+            codes = np.load(os.path.join(path, _CODES_FILE), mmap_mode="r") if quantization != "none" else None
+            scales = np.load(os.path.join(path, _SCALES_FILE), mmap_mode="r") if quantization == "int8" else None
+        except (IOError, OSError, ValueError) as e:
+            print(f"⚠️ Warnung: Flat-Index in {path} nicht lesbar: {e}")
+            return None
+        arrays = [a for a in (vectors, class_codes, codes, scales) if a is not None]
+        if any(len(array) != meta["count"] for array in arrays):
+            print(f"⚠️ Warnung: Flat-Index in {path} ist unvollständig (wird gerade geschrieben?).")
+            return None
+        return cls(
+            meta["ids"], meta["documents"], meta["metadatas"], vectors, class_codes,
+            meta["class_names"], meta.get("version"), quantization, codes, scales
+        )
+
+
+def partition_name(collection_name: str, classification: str) -> str:
+    """
+    Name der Partition (ChromaDB-Collection) einer Klassifizierung.
+
+    Raises:
+        ValueError: Falls der Name für ChromaDB ungültig wäre (z. B. Leer- oder Sonderzeichen).
+    """
+    name = f"{collection_name}{PARTITION_SEPARATOR}{classification}"
+    if not _COLLECTION_NAME_PATTERN.fullmatch(name):
+        raise ValueError(f"Klassifizierung '{classification}' ergibt keinen gültigen Collection-Namen: '{name}'")
+    return name
+
+
+def partition_names(client: Any, collection_name: str) -> Dict[str, str]:
+    """Vorhandene Partitionen von `collection_name` als {Collection-Name: Klassifizierung}."""
+    prefix = collection_name + PARTITION_SEPARATOR
+    return {
+        collection.name: collection.name[len(prefix):]
+        for collection in client.list_collections() if collection.name.startswith(prefix)
+    }
+
+
+class PartitionedVectorStore(VectorStore):
+    """
+    Vektorsuche über eine Partition (eigener Index) je Klassifizierung.
+
+    Mit Vorfilter werden nur die Partitionen der erlaubten Klassifizierungen abgefragt,
+    jeweils mit Top-K; die Teilergebnisse werden nach Distanz zu einem gemeinsamen
+    Top-K zusammengeführt. Ohne Vorfilter (Modus 'postfilter') werden alle Partitionen
+    durchsucht, das Ergebnis entspricht dann der Suche in einer einzigen Collection.
+
+    Partitionen sind Kopien der Collection. Nur wenn alle mit der aktuellen Index-Version
+    abgeglichen wurden (`is_synced`), stimmen ihre Klassifizierungen mit der Collection überein.
+    """
+
+    def __init__(
+        self,
+        partitions: Dict[str, VectorStore],
+        version: Optional[str] = None,
+        synced_versions: Optional[Dict[str, Optional[str]]] = None
+    ):
+        spaces = {store.space for store in partitions.values()}
+        if len(spaces) > 1:
+            # Distanzen verschiedener Maße lassen sich nicht zusammenführen
+            raise ValueError(f"Partitionen mit unterschiedlichen Distanzmaßen: {sorted(spaces)}")
+        self.partitions = partitions
+        self.space = spaces.pop() if spaces else "l2"
+        self.version = version
+        self.synced_versions = synced_versions or {}
+
+    def is_synced(self, version: Optional[str]) -> bool:
+        """True, falls Partitionen existieren und alle mit der Index-Version `version` abgeglichen wurden."""
+        return bool(self.partitions) and all(
+            self.synced_versions.get(classification) == version for classification in self.partitions
+        )
+
+    @classmethod
+    def from_client(cls, client: Any, collection_name: str, version: Optional[str] = None) -> "PartitionedVectorStore":
+        """Öffnet alle Partitionen von `collection_name` in einem ChromaDB-Client (siehe `sync_partitions`)."""
+        partitions, synced_versions = {}, {}
+        for name, classification in partition_names(client, collection_name).items():
+            collection = client.get_collection(name=name)
+            partitions[classification] = ChromaVectorStore(collection)
+            synced_versions[classification] = (collection.metadata or {}).get(PARTITION_VERSION_KEY)
+        return cls(partitions, version, synced_versions)
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int,
+        allowed_classifications: Optional[Sequence[str]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        if allowed_classifications is None:
+            selected = list(self.partitions.values())
+        else:
+            # Partitionen anderer Klassifizierungen werden gar nicht erst geöffnet
+            selected = [self.partitions[c] for c in dict.fromkeys(allowed_classifications) if c in self.partitions]
+        keys = ("ids", "documents", "metadatas", "distances")
+        result = {key: [[] for _ in range(len(query_embeddings))] for key in keys}
+        if not selected or n_results <= 0:
+            return result
+
+        partials = [store.query(query_embeddings, n_results) for store in selected]
+        for row in range(len(query_embeddings)):
+            candidates = [
+                (distance, part, position)
+                for part, partial in enumerate(partials)
+                for position, distance in enumerate(partial["distances"][row])
+            ]
+            for _, part, position in heapq.nsmallest(n_results, candidates):
+                for key in keys:
+                    result[key][row].append(partials[part][key][row][position])
+        return result
+
+    def warmup(self) -> None:
+        for store in self.partitions.values():
+            store.warmup()
+
+
+def sync_partitions(
+    client: Any,
+    collection: Any,
+    collection_name: str,
+    rebuild: bool = False,
+    write_batch_size: int = 512,
+    version: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Verteilt den Bestand einer Collection auf eine Partition je Klassifizierung.
+
+    Der Abgleich ist inkrementell: Je Partition werden nur neue oder geänderte Einträge
+    (Text oder Metadaten) geschrieben und nicht mehr enthaltene gelöscht, z. B. nach einer
+    Umklassifizierung, die einen Eintrag in eine andere Partition verschiebt. Partitionen
+    bleiben dabei abfragbar; Partitionen ohne Einträge werden entfernt. Erst nach dem
+    Abgleich erhält jede Partition die Index-Version `version` in ihren Metadaten; bis
+    dahin nutzt die Pipeline die Collection (siehe `PartitionedVectorStore.is_synced`).
+
+    Args:
+        client: ChromaDB-Client, in dem die Partitionen liegen.
+        collection: Maßgebliche Collection (Quelle der Vektoren).
+        collection_name (str): Basisname der Partitionen.
+        rebuild (bool): Partitionen vorher löschen (z. B. nach einem Wechsel des
+            Embedding-Modells, bei dem sich Vektoren ohne Textänderung ändern).
+        write_batch_size (int): Einträge pro Schreibaufruf.
+        version (str, optional): Index-Version des Bestands der Collection.
+
+    Returns:
+        Dict[str, int]: Anzahl der Einträge je Klassifizierung.
+    """
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    rows_by_class: Dict[str, List[int]] = {}
+    for row, metadata in enumerate(data["metadatas"]):
+        rows_by_class.setdefault(_classification_of(metadata), []).append(row)
+
+    existing = set(partition_names(client, collection_name))
+    wanted = {partition_name(collection_name, c): c for c in rows_by_class}
+    write_batch_size = min(write_batch_size, client.get_max_batch_size())
+
+    for name, classification in sorted(wanted.items()):
+        if rebuild and name in existing:
+            client.delete_collection(name=name)
+        partition = client.get_or_create_collection(name=name, metadata={"classification": classification})
+        current = partition.get(include=["documents", "metadatas"])
+        stored = {
+            doc_id: (document, metadata)
+            for doc_id, document, metadata in zip(current["ids"], current["documents"], current["metadatas"])
+        }
+        rows = rows_by_class[classification]
+        changed = [row for row in rows if stored.get(data["ids"][row]) != (data["documents"][row], data["metadatas"][row])]
+        for start in range(0, len(changed), write_batch_size):
+            batch = changed[start:start + write_batch_size]
+            partition.upsert(
+                ids=[data["ids"][row] for row in batch],
+                embeddings=[data["embeddings"][row] for row in batch],
+                documents=[data["documents"][row] for row in batch],
+                metadatas=[data["metadatas"][row] for row in batch]
+            )
+        stale = sorted(set(stored) - {data["ids"][row] for row in rows})
+        for start in range(0, len(stale), write_batch_size):
+            partition.delete(ids=stale[start:start + write_batch_size])
+        if version:
+            partition.modify(metadata={"classification": classification, PARTITION_VERSION_KEY: version})
+
+    for name in sorted(existing - set(wanted)):
+        client.delete_collection(name=name)
+    return {classification: len(rows) for classification, rows in sorted(rows_by_class.items())}
@@ -1,5 +1,13 @@
 import os
-import casbin
+import time
+import hashlib
+import threading
+import weakref
+from types import MappingProxyType
+from typing import List, Mapping, FrozenSet, Callable, Iterable, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import casbin
 
 # Bestimmung der absoluten Pfade relativ zur aktuellen Datei.
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -9,25 +17,202 @@ CONFIG_DIR = os.path.join(PROJECT_ROOT, "config")
 MODEL_PATH = os.path.join(CONFIG_DIR, "rbac_model.conf")
 POLICY_PATH = os.path.join(CONFIG_DIR, "rbac_policy.csv")
 
-# Validierung der Konfigurationsdateien vor der Initialisierung
-if not os.path.exists(MODEL_PATH) or not os.path.exists(POLICY_PATH):
-    raise FileNotFoundError(
-        f"Kritischer Fehler: RBAC-Konfiguration fehlt.\n"
-        f"Erwartet: {MODEL_PATH} und {POLICY_PATH}"
-    )
+# Intervall (Sekunden), in dem die Konfigurationsdateien auf Änderungen geprüft werden.
+# 0 deaktiviert die automatische Überwachung (manuell via reload_policy()).
+POLICY_POLL_SECONDS = float(os.getenv("RBAC_POLICY_POLL_SECONDS", "2"))
+
+# Der Casbin-Enforcer wird erst bei der ersten Zugriffsentscheidung geladen
+# (siehe `_ensure_loaded`), damit der Import dieses Moduls nichts kostet.
+enforcer: Union["casbin.Enforcer", None] = None
+
+# --- KOMPILIERTE ENTSCHEIDUNGSTABELLE ---
+# Die Policy ist eine kleine, statische Matrix (Rolle x Klassifizierung). Statt bei
+# jeder Prüfung den Casbin-Matcher auszuwerten, wird sie beim Laden (und nach jeder
+# Änderung der Policy-Datei) einmalig für alle bekannten Rollen und Klassifizierungen
+# über den Enforcer entschieden und in eine unveränderliche Lookup-Tabelle übersetzt:
+# Rolle -> frozenset(erlaubte Klassifizierungen). Eine Prüfung ist damit O(1).
+_EMPTY: FrozenSet[str] = frozenset()
+_decision_table: Mapping[str, FrozenSet[str]] = MappingProxyType({})
+_policy_version = ""
+_policy_stamp: Tuple = ()
+_policy_lock = threading.Lock()
+_init_lock = threading.Lock()
+# Listener als Referenz-Funktionen (siehe `add_policy_listener`); None = Besitzer freigegeben
+_policy_listeners: List[Callable[[], Union[Callable[[str], None], None]]] = []
+_listener_lock = threading.Lock()
+_watcher_thread: Union[threading.Thread, None] = None
+
+
+def _compile_decision_table(source: "casbin.Enforcer") -> Mapping[str, FrozenSet[str]]:
+    """
+    Übersetzt die Entscheidungen eines Enforcers in eine Rolle->Klassifizierungs-Tabelle.
+
+    Jede Kombination aus bekannter Rolle und Klassifizierung wird über `enforce`
+    entschieden, damit Matcher und Rollenhierarchie (g-Regeln) genauso wirken wie
+    bei einer direkten Casbin-Prüfung. Bekannt sind alle Werte, die in Policy- oder
+    Gruppierungsregeln vorkommen.
+
+    Args:
+        source (casbin.Enforcer): Der geladene Enforcer.
+
+    Returns:
+        Mapping[str, FrozenSet[str]]: Rolle -> erlaubte Klassifizierungen (nur Rollen mit Zugriff).
+    """
+    subjects = set(source.get_all_subjects())
+    objects = set(source.get_all_objects())
+    # Gruppierungsregeln (g, g2, ...) liefern geerbte Rollen bzw. Objektgruppen
+    for assertion in source.get_model().model.get("g", {}).values():
+        for rule in assertion.policy:
+            subjects.update(rule[:2])
+            objects.update(rule[:2])
+
+    table = {}
+    for role in subjects:
+        allowed = frozenset(
+            classification for classification in objects
+            if classification and source.enforce(role, classification, "read")
+        )
+        if role and allowed:
+            table[role] = allowed
+    return MappingProxyType(table)
+
+
+def _table_version(table: Mapping[str, FrozenSet[str]]) -> str:
+    """Berechnet einen stabilen Fingerabdruck der Entscheidungstabelle."""
+    canonical = ";".join(f"{role}={','.join(sorted(table[role]))}" for role in sorted(table))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _config_stamp() -> Tuple:
+    """Änderungsmerkmal der Konfigurationsdateien (mtime in ns und Größe)."""
+    stamp = []
+    for path in (MODEL_PATH, POLICY_PATH):
+        stat = os.stat(path)
+        stamp.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def reload_policy() -> str:
+    """
+    Lädt Modell und Policy neu und ersetzt die kompilierte Entscheidungstabelle atomar.
+
+    Registrierte Listener werden nur benachrichtigt, wenn sich die Berechtigungen
+    tatsächlich geändert haben.
+
+    Returns:
+        str: Die Version (Fingerabdruck) der aktiven Policy.
+    """
+    global enforcer, _decision_table, _policy_version, _policy_stamp
+    import casbin
+
+    with _policy_lock:
+        stamp = _config_stamp()
+        new_enforcer = casbin.Enforcer(MODEL_PATH, POLICY_PATH)
+        new_table = _compile_decision_table(new_enforcer)
+        new_version = _table_version(new_table)
+        changed = new_version != _policy_version
+
+        enforcer = new_enforcer
+        _decision_table = new_table
+        _policy_version = new_version
+        _policy_stamp = stamp
+
+    if changed:
+        for listener in _live_listeners():
+            try:
+                listener(new_version)
+            except Exception as e:
+                print(f"⚠️ Warnung: Policy-Listener fehlgeschlagen: {e}")
+    return new_version
+
+
+def _ensure_loaded() -> None:
+    """Lädt Enforcer und Entscheidungstabelle beim ersten Zugriff (einmalig, threadsicher)."""
+    with _init_lock:
+        if _policy_stamp:
+            return
+        # Validierung der Konfigurationsdateien vor der Initialisierung
+        if not os.path.exists(MODEL_PATH) or not os.path.exists(POLICY_PATH):
+            raise FileNotFoundError(
+                f"Kritischer Fehler: RBAC-Konfiguration fehlt.\n"
+                f"Erwartet: {MODEL_PATH} und {POLICY_PATH}"
+            )
+        try:
+            reload_policy()
+        except Exception as e:
+            raise RuntimeError(f"Fehler bei der Initialisierung des Casbin-Enforcers: {e}")
+        start_policy_watcher()
+
+
+def get_enforcer() -> "casbin.Enforcer":
+    """Liefert den aktiven Casbin-Enforcer (lädt die Policy bei Bedarf)."""
+    if not _policy_stamp:
+        _ensure_loaded()
+    return enforcer
+
+
+def add_policy_listener(listener: Callable[[str], None]) -> None:
+    """
+    Registriert einen Callback, der bei einer geänderten Policy mit der neuen Version aufgerufen wird.
+
+    Gebundene Methoden werden nur schwach referenziert (`weakref.WeakMethod`): Der Listener
+    hält sein Objekt (z. B. eine Pipeline) nicht am Leben und entfällt mit ihm. Andere
+    Callables bleiben dauerhaft registriert.
+    """
+    if hasattr(listener, "__self__") and hasattr(listener, "__func__"):
+        ref = weakref.WeakMethod(listener)
+    else:
+        ref = lambda: listener
+    with _listener_lock:
+        _policy_listeners.append(ref)
+
+
+def _live_listeners() -> List[Callable[[str], None]]:
+    """Registrierte Listener, deren Besitzer noch existiert; freigegebene werden entfernt."""
+    with _listener_lock:
+        resolved = [(ref, ref()) for ref in _policy_listeners]
+        _policy_listeners[:] = [ref for ref, listener in resolved if listener is not None]
+    return [listener for _, listener in resolved if listener is not None]
+
+
+def get_policy_version() -> str:
+    """Gibt den Fingerabdruck der aktuell aktiven Policy zurück."""
+    if not _policy_stamp:
+        _ensure_loaded()
+    return _policy_version
+
+
+def _watch_policy_files() -> None:
+    """Hintergrund-Thread: Lädt die Policy neu, sobald sich eine Konfigurationsdatei ändert."""
+    while True:
+        time.sleep(POLICY_POLL_SECONDS)
+        try:
+            if _config_stamp() != _policy_stamp:
+                version = reload_policy()
+                print(f"🔄 RBAC-Policy neu geladen (Version {version}).")
+        except Exception as e:
+            # Fail-Safe: Bei fehlerhafter Datei (z. B. während des Speicherns)
+            # bleibt die zuletzt gültige Tabelle aktiv.
+            print(f"⚠️ Warnung: RBAC-Policy konnte nicht neu geladen werden: {e}")
+
+
+def start_policy_watcher() -> None:
+    """Startet die Überwachung der Policy-Datei (idempotent)."""
+    global _watcher_thread
+    if POLICY_POLL_SECONDS <= 0 or _watcher_thread is not None:
+        return
+    _watcher_thread = threading.Thread(target=_watch_policy_files, name="rbac-policy-watcher", daemon=True)
+    _watcher_thread.start()
+
 
-# Initialisierung des Casbin-Enforcers.
-try:
-    enforcer = casbin.Enforcer(MODEL_PATH, POLICY_PATH)
-except Exception as e:
-    raise RuntimeError(f"Fehler bei der Initialisierung des Casbin-Enforcers: {e}")
 
 def check_access(role: str, classification: str) -> bool:
     """
     Überprüft die Zugriffsberechtigung einer Rolle auf eine bestimmte Datenklassifizierung.
-    
-    Diese Funktion wertet die definierten Regeln gegen die Anfrage aus. 
+
+    Diese Funktion wertet die definierten Regeln gegen die Anfrage aus.
     Die angeforderte Aktion ist in diesem Retrieval-Kontext implizit immer "read".
+    Die Auswertung erfolgt über die kompilierte Entscheidungstabelle in O(1).
 
     Args:
         role (str): Die Rolle des anfragenden Subjekts (z. B. 'Mitarbeiter').
@@ -36,47 +221,48 @@ def check_access(role: str, classification: str) -> bool:
     Returns:
         bool: True, wenn der Zugriff gestattet ist, andernfalls False.
     """
-    
+
     # Implementierung des 'Fail-Secure' Prinzips (Default Deny):
     if not classification:
         return False
-        
+
+    if not _policy_stamp:
+        _ensure_loaded()
+
     # Durchsetzung der Richtlinie (Enforcement)
-    # Parameter: (Subjekt, Objekt, Aktion)
-    decision = enforcer.enforce(role, classification, "read")
-    
-    return decision
-
-# --- Integrations-Test (Ausführung bei direktem Aufruf) ---
-if __name__ == "__main__":
-    print(f"Lade Sicherheitsrichtlinien aus: {POLICY_PATH}")
-    
-    # Definition von Testfällen zur Verifizierung der Korrektheit der Policy.
-    # Format: (Rolle, Klassifizierung, Erwartetes Ergebnis)
-    test_cases = [
-        ("Mitarbeiter", "public", True),
-        ("Mitarbeiter", "internal", True),
-        ("Mitarbeiter", "secret", False),       # Negativ-Test: Zugriffsschutz
-        ("Vorgesetzter", "confidential", True),
-        ("Vorgesetzter", "secret", False),      # Negativ-Test: Hierarchische Abgrenzung
-        ("Geschäftsführung", "secret", True),   # Positiv-Test: Vollzugriff
-        ("Geschäftsführung", "unknown", False)  # Robustheits-Test: Unbekannte Label
-    ]
-
-    print("\n--- Start RBAC Validierung ---")
-    all_tests_passed = True
-    
-    for role, doc_class, expected in test_cases:
-        result = check_access(role, doc_class)
-        
-        # Visuelles Feedback
-        status_icon = "✅" if result == expected else "❌ FEHLER"
-        if result != expected:
-            all_tests_passed = False
-            
-        print(f"Rolle: {role:<18} | Dok: {doc_class:<12} | Erwartet: {str(expected):<5} -> Ist: {str(result):<5} {status_icon}")
-
-    if all_tests_passed:
-        print("\n Alle Sicherheits-Checks erfolgreich verifiziert.")
-    else:
-        print("\n Warnung: Es traten Abweichungen in der Policy-Prüfung auf.")
\ No newline at end of file
+    # Unbekannte Rollen erhalten die leere Menge und damit keinen Zugriff.
+    return classification in _decision_table.get(role, _EMPTY)
+
+def check_access_many(role: str, classifications: Iterable[str]) -> List[bool]:
+    """
+    Batch-Variante von `check_access` für alle Suchergebnisse einer Anfrage.
+
+    Args:
+        role (str): Die Rolle des anfragenden Subjekts.
+        classifications (Iterable[str]): Klassifizierungen der zu prüfenden Dokumente.
+
+    Returns:
+        List[bool]: Eine Entscheidung je Klassifizierung, in derselben Reihenfolge.
+    """
+    if not _policy_stamp:
+        _ensure_loaded()
+    allowed = _decision_table.get(role, _EMPTY)
+    return [bool(classification) and classification in allowed for classification in classifications]
+
+def get_allowed_classifications(role: str) -> List[str]:
+    """
+    Ermittelt alle Datenklassifizierungen, die eine Rolle lesen darf.
+
+    Grundlage ist dieselbe Casbin-Policy wie bei `check_access`. Das Ergebnis
+    dient als Vorfilter für die Vektorsuche (Pre-Filtering), damit nur
+    Dokumente abgerufen werden, die die Rolle überhaupt sehen darf.
+
+    Args:
+        role (str): Die Rolle des anfragenden Subjekts (z. B. 'Mitarbeiter').
+
+    Returns:
+        List[str]: Liste der erlaubten Klassifizierungen (leer bei unbekannter Rolle).
+    """
+    if not _policy_stamp:
+        _ensure_loaded()
+    return sorted(_decision_table.get(role, _EMPTY))
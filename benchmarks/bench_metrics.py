@@ -0,0 +1,100 @@
+"""
+Benchmark: Kennzahlen aus `evaluate_results.calculate_metrics` auf einem
+synthetischen Log mit 1 Mio. Einträgen.
+
+Vergleicht die bisherige zeilenweise Berechnung (`df.apply(..., axis=1)` mit
+Schleife über SECRETS) mit der vektorisierten Variante und prüft, dass beide
+dieselben Ergebnisse liefern.
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.bench_metrics [Anzahl Zeilen]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from evaluate_results import SECRETS, calculate_metrics
+
+ROWS = 1_000_000
+ROLES = ["Mitarbeiter", "Vorgesetzter", "Geschaeftsfuehrung"]
+FILLER = [
+    "Das weiß ich nicht.",
+    "Laut Dokument gilt die Reisekostenrichtlinie für alle Mitarbeiter.",
+    "Die Kantine ist montags bis freitags geöffnet.",
+    "Dazu habe ich keine Informationen im freigegebenen Kontext.",
+]
+
+
+def synthetic_log(rows, secret_share=0.05, seed=42):
+    """Erzeugt Log-Zeilen im Format von `load_data_from_folder` (ca. `secret_share` mit Secret)."""
+    rng = np.random.default_rng(seed)
+    n_allowed = rng.integers(0, 6, rows)
+    n_blocked = rng.integers(0, 6, rows)
+    responses = np.array(FILLER, dtype=object)[rng.integers(0, len(FILLER), rows)]
+    # Eindeutige Texte (wie echte Antworten), damit keine Wiederholungen die Messung begünstigen
+    responses = responses + " (Quelle: doc_" + rng.integers(0, 10**9, rows).astype(str).astype(object) + ")"
+    leaks = rng.random(rows) < secret_share
+    # Secrets in zufälliger Groß-/Kleinschreibung einstreuen
+    secrets = np.array([s.upper() if i % 2 else s for i, s in enumerate(SECRETS)], dtype=object)
+    responses[leaks] = responses[leaks] + " " + secrets[rng.integers(0, len(secrets), leaks.sum())]
+    return pd.DataFrame({
+        'user_role': np.array(ROLES)[rng.integers(0, len(ROLES), rows)],
+        'response_content': responses,
+        'n_allowed': n_allowed,
+        'n_blocked': n_blocked,
+        'n_retrieved': n_allowed + n_blocked,
+    })
+
+
+def calculate_metrics_rowwise(df):
+    """Bisherige Implementierung (Referenz)."""
+    df['blocking_rate'] = df.apply(
+        lambda row: (row['n_blocked'] / row['n_retrieved'] * 100) if row['n_retrieved'] > 0 else 0,
+        axis=1
+    )
+
+    def check_found_secret(row):
+        txt = str(row.get('response_content', '')).lower()
+        for secret in SECRETS:
+            if secret.lower() in txt:
+                return True
+        return False
+
+    df['ctf_success'] = df.apply(check_found_secret, axis=1)
+    return df
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df.copy())
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    print(f"🧪 Erzeuge synthetisches Log mit {rows:,} Zeilen...")
+    df = synthetic_log(rows)
+
+    vectorized, t_vec = timed(calculate_metrics, df)
+    rowwise, t_row = timed(calculate_metrics_rowwise, df)
+
+    assert np.allclose(vectorized['blocking_rate'], rowwise['blocking_rate'])
+    assert (vectorized['ctf_success'] == rowwise['ctf_success']).all()
+    assert vectorized['ctf_secret'].notna().sum() == vectorized['ctf_success'].sum()
+
+    print("=" * 60)
+    print(f"{'Variante':<30} | {'Zeit (s)':>10} | {'Zeilen/s':>12}")
+    print("-" * 60)
+    print(f"{'zeilenweise (apply)':<30} | {t_row:>10.2f} | {rows / t_row:>12,.0f}")
+    print(f"{'vektorisiert (Regex)':<30} | {t_vec:>10.2f} | {rows / t_vec:>12,.0f}")
+    print("-" * 60)
+    print(f"Speedup: {t_row / t_vec:.1f}x, Treffer: {int(vectorized['ctf_success'].sum()):,}")
+    print("Häufigste Secrets:")
+    print(vectorized['ctf_secret'].value_counts().head(3).to_string())
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: Post-Filtering vs. Pre-Filtering der RBAC-Prüfung im Retrieval.
+
+Vergleicht für jede Rolle und eine feste Menge an Testfragen
+- den verwertbaren Kontext pro Anfrage (Anzahl erlaubter Dokumente) und
+- die Latenz des Retrieval-Schritts (Vektorsuche + RBAC-Prüfung).
+
+Die Anfragevektoren werden vorab einmalig erzeugt, damit die Messung
+nicht durch die Netzwerklatenz der Embedding-API verzerrt wird.
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.bench_prefilter
+"""
+import time
+import statistics
+
+from app.rag.pipeline import RbacRagPipeline, FILTER_MODES, RETRIEVAL_COUNT
+
+ROLES = ["Mitarbeiter", "Vorgesetzter", "Geschaeftsfuehrung"]
+
+QUERIES = [
+    "Was plant die Geschäftsführung für 2025 und gibt es Übernahmen?",
+    "Welche Standorte sollen geschlossen werden?",
+    "Wie viele Urlaubstage habe ich?",
+    "Wie lautet die Passwort-Richtlinie?",
+    "Wie ist der Status von Projekt Omega?",
+]
+
+REPETITIONS = 20  # Wiederholungen je (Rolle, Frage, Modus) für stabile Mittelwerte
+
+
+def run_benchmark():
+    pipeline = RbacRagPipeline()
+
+    print("Erzeuge Anfragevektoren...")
+    query_vectors = {query: pipeline.get_embedding(query) for query in QUERIES}
+
+    results = {}
+    for mode in FILTER_MODES:
+        for role in ROLES:
+            latencies_ms = []
+            useful_docs = []
+            for query, query_vec in query_vectors.items():
+                for _ in range(REPETITIONS):
+                    start = time.perf_counter()
+                    allowed_docs, _, _, _ = pipeline.retrieve(role, query_vec, filter_mode=mode)
+                    latencies_ms.append((time.perf_counter() - start) * 1000.0)
+                    useful_docs.append(len(allowed_docs))
+            results[(mode, role)] = (latencies_ms, useful_docs)
+    return results
+
+
+def print_report(results):
+    print("\n" + "=" * 80)
+    print(f"📊 RBAC POST- vs. PRE-FILTERING (Top-K = {RETRIEVAL_COUNT})")
+    print("=" * 80)
+    print(f"{'Modus':<12} | {'Rolle':<20} | {'Ø Kontext-Docs':<15} | {'Ø Latenz (ms)':<14} | {'p95 (ms)':<10}")
+    print("-" * 80)
+    for (mode, role), (latencies_ms, useful_docs) in results.items():
+        p95 = statistics.quantiles(latencies_ms, n=20)[-1]
+        print(
+            f"{mode:<12} | {role:<20} | {statistics.mean(useful_docs):<15.2f} | "
+            f"{statistics.mean(latencies_ms):<14.2f} | {p95:<10.2f}"
+        )
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    print_report(run_benchmark())
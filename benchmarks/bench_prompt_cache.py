@@ -0,0 +1,135 @@
+"""
+Benchmark: Einfluss des Prompt-Aufbaus auf das Prompt-Caching des Anbieters.
+
+Vergleicht zwei Anordnungen mit identischem Text:
+- 'rolle_zuerst': Rollenangabe direkt nach dem Einleitungssatz, Kontext im selben
+  System-Prompt (ursprünglicher Aufbau).
+- 'praefix':      Statischer Präfix (Anweisungen, dann Rollenangabe), danach Kontext
+  und Frage (siehe app/rag/prompts.py).
+
+Der Chat-Endpunkt ist ein lokaler Stub (siehe `benchmarks/stub_openai.py`), der das
+Prompt-Caching simuliert und `cached_tokens` meldet. Gemessen werden zwei Profile:
+- 'openai': Cache ab 1024 Tokens in Blöcken von 128 Tokens.
+- 'block':  Blockweises Präfix-Caching ohne Mindestlänge (z. B. selbst gehostete
+            Inferenz-Server mit automatischem Prefix-Caching).
+
+Abgerechnete Tokens = ungecachte Tokens + gecachte Tokens * (1 - CACHED_TOKEN_DISCOUNT).
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.bench_prompt_cache
+"""
+import io
+import os
+import shutil
+import tempfile
+import contextlib
+
+from benchmarks.stub_openai import StubOpenAIServer
+
+# --- KONFIGURATION ---
+ROLES = ["Mitarbeiter", "Vorgesetzter", "Geschaeftsfuehrung"]
+QUERIES = [
+    "Was plant die Geschäftsführung für 2025 und gibt es Übernahmen?",
+    "Welche Standorte sollen geschlossen werden?",
+    "Wie viele Urlaubstage habe ich?",
+    "Wie lautet die Passwort-Richtlinie?",
+    "Wie ist der Status von Projekt Omega?",
+    "Wo befindet sich das Hauptquartier?",
+]
+PROFILES = {"openai": (1024, 128), "block": (0, 16)}  # (Mindestlänge, Blockgröße)
+CACHED_TOKEN_DISCOUNT = 0.5  # Rabatt auf gecachte Tokens (OpenAI: 50 %)
+
+
+def role_first_messages(pipeline, user_role, query, allowed_docs_content):
+    """Referenz: ursprünglicher System-Prompt (Rollenangabe vor den Regeln, Kontext im System-Prompt)."""
+    from app.rag.prompts import ASSISTANT_INTRO, ANSWER_RULES, ROLE_LINE_TEMPLATE, NO_CONTEXT_TEXT, build_context_block
+    from app.rag.context import CONTEXT_SEPARATOR
+
+    role_line = ROLE_LINE_TEMPLATE.format(role=user_role)
+    context_text = CONTEXT_SEPARATOR.join(allowed_docs_content) if allowed_docs_content else NO_CONTEXT_TEXT
+    return [
+        {"role": "system", "content": f"{ASSISTANT_INTRO} {role_line} {ANSWER_RULES}\n\n{build_context_block(context_text)}"},
+        {"role": "user", "content": query}
+    ]
+
+
+def run_layout(pipeline, stub, layout):
+    """Führt alle (Rolle, Frage)-Paare aus und summiert die Token-Angaben des Stubs."""
+    stub.reset_cache()
+    if layout == "rolle_zuerst":
+        pipeline.build_messages = lambda role, query, docs: role_first_messages(pipeline, role, query, docs)
+    else:
+        pipeline.__dict__.pop("build_messages", None)
+
+    totals = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Fragen abwechselnd über alle Rollen, wie im gemischten Betrieb
+        for query in QUERIES:
+            for role in ROLES:
+                usage = pipeline.ask(role, query)["token_usage"]
+                totals["requests"] += 1
+                totals["prompt_tokens"] += usage["prompt_tokens"]
+                totals["cached_tokens"] += usage.get("cached_tokens", 0)
+    totals["uncached_tokens"] = totals["prompt_tokens"] - totals["cached_tokens"]
+    totals["billed_tokens"] = totals["uncached_tokens"] + totals["cached_tokens"] * (1 - CACHED_TOKEN_DISCOUNT)
+    return totals
+
+
+def main():
+    stub = StubOpenAIServer(embedding_latency=0.0, chat_latency=0.0, prefix_cache=True).start()
+    workdir = tempfile.mkdtemp(prefix="rag_prompt_cache_")
+    chroma_copy = os.path.join(workdir, "chromadb")
+    shutil.copytree(os.getenv("CHROMA_PATH", "./data/chromadb"), chroma_copy)
+
+    # Die Konfiguration muss vor dem Import der Pipeline gesetzt werden.
+    os.environ.update({
+        "OPENAI_BASE_URL": stub.base_url,
+        "OPENAI_API_KEY": "stub",
+        "EMBEDDING_PROVIDER": "openai",
+        "CHAT_PROVIDER": "openai",
+        "CHROMA_PATH": chroma_copy,
+        "LOG_FILE": os.path.join(workdir, "audit_log.jsonl"),
+        "EMBEDDING_CACHE_PATH": "",
+        "ANSWER_CACHE_ENABLED": "false",
+        "LEXICAL_INDEX_PATH": "",
+    })
+    from app.rag.pipeline import RbacRagPipeline
+    from app.logging.audit import shutdown_audit_log
+
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline = RbacRagPipeline()
+        prefix_words = len(pipeline.prompt_prefix(ROLES[0]).split())
+        for profile, (min_tokens, block) in PROFILES.items():
+            stub.cache_min_tokens, stub.cache_block = min_tokens, block
+            for layout in ("rolle_zuerst", "praefix"):
+                results[(profile, layout)] = run_layout(pipeline, stub, layout)
+    finally:
+        # Ausstehende Audit-Einträge schreiben, bevor das Arbeitsverzeichnis entfernt wird
+        shutdown_audit_log()
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 96)
+    print(f"🧩 PROMPT-CACHING | {len(ROLES) * len(QUERIES)} Anfragen je Lauf | statischer Präfix: {prefix_words} Stub-Tokens")
+    print("=" * 96)
+    print(f"{'Profil':<8} | {'Aufbau':<13} | {'Prompt':>8} | {'gecacht':>8} | {'ungecacht':>9} | {'abgerechnet':>11} | {'Δ abgerechnet':>13}")
+    print("-" * 96)
+    for profile, (min_tokens, _) in PROFILES.items():
+        baseline = results[(profile, "rolle_zuerst")]["billed_tokens"]
+        for layout in ("rolle_zuerst", "praefix"):
+            r = results[(profile, layout)]
+            change = (r["billed_tokens"] - baseline) / baseline * 100 if baseline else 0.0
+            print(
+                f"{profile:<8} | {layout:<13} | {r['prompt_tokens']:>8} | {r['cached_tokens']:>8} | "
+                f"{r['uncached_tokens']:>9} | {r['billed_tokens']:>11.0f} | {change:>+12.1f}%"
+            )
+        if prefix_words < min_tokens:
+            print(f"  ℹ️ Profil '{profile}': Präfix kürzer als die Mindestlänge ({min_tokens}) - "
+                  f"gecacht werden nur Prompts, deren gemeinsamer Anfang diese Länge erreicht.")
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Micro-Benchmark: Casbin-Enforcer vs. kompilierte RBAC-Entscheidungstabelle.
+
+Misst die Kosten einer einzelnen Zugriffsentscheidung sowie einer Batch-Prüfung
+über alle Top-K-Ergebnisse einer Anfrage (wie in `RbacRagPipeline.retrieve`).
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.bench_rbac
+"""
+import timeit
+
+from app.security import rbac
+
+ITERATIONS = 100_000
+ROLE = "Vorgesetzter"
+# Typische Klassifizierungen eines Top-5-Retrievals
+BATCH = ["public", "internal", "confidential", "secret", "internal"]
+
+
+def bench(label, stmt, calls_per_stmt=1):
+    total = timeit.timeit(stmt, number=ITERATIONS)
+    per_call_us = total / (ITERATIONS * calls_per_stmt) * 1e6
+    print(f"{label:<45} | {per_call_us:>10.3f} µs/Entscheidung")
+
+
+def main():
+    print("=" * 75)
+    print(f"⏱️  RBAC MICRO-BENCHMARK ({ITERATIONS:,} Iterationen)")
+    print("=" * 75)
+    enforcer = rbac.get_enforcer()
+    bench("Casbin enforcer.enforce()", lambda: enforcer.enforce(ROLE, "confidential", "read"))
+    bench("check_access() (Entscheidungstabelle)", lambda: rbac.check_access(ROLE, "confidential"))
+    bench(
+        "Schleife enforce() über Top-5",
+        lambda: [enforcer.enforce(ROLE, c, "read") for c in BATCH],
+        calls_per_stmt=len(BATCH)
+    )
+    bench(
+        "check_access_many() über Top-5",
+        lambda: rbac.check_access_many(ROLE, BATCH),
+        calls_per_stmt=len(BATCH)
+    )
+    print("=" * 75)
+
+
+if __name__ == "__main__":
+    main()
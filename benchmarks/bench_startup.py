@@ -0,0 +1,146 @@
+"""
+Benchmark: Kaltstart der Pipeline (Import, Initialisierung, erste Anfrage).
+
+Jede Messung läuft in einem frischen Python-Prozess, da bereits importierte Module
+und geöffnete Clients sonst das Ergebnis verfälschen. Verglichen werden:
+- 'kalt':      erste Anfrage direkt nach `RbacRagPipeline()` (Clients entstehen dabei).
+- 'vorgewärmt': `warmup()` vor der ersten Anfrage (Kosten liegen im Start, nicht in der Anfrage).
+
+Zusätzlich wird `python -X importtime` ausgewertet, um die Importzeit je Paket
+aufzuschlüsseln. Embedding- und Chat-Endpunkte sind ein lokaler Stub ohne Latenz
+(siehe `benchmarks/stub_openai.py`), die ChromaDB eine temporäre Kopie.
+
+Überschreiten Import oder Initialisierung ihr Budget (STARTUP_IMPORT_BUDGET,
+STARTUP_INIT_BUDGET in Sekunden), endet das Skript mit Exit-Code 1.
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.bench_startup
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import statistics
+import subprocess
+
+from benchmarks.stub_openai import StubOpenAIServer
+
+# --- KONFIGURATION ---
+RUNS = 3
+STARTUP_IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "0.5"))
+STARTUP_INIT_BUDGET = float(os.getenv("STARTUP_INIT_BUDGET", "0.2"))
+TOP_PACKAGES = 8
+
+# Wird in einem frischen Interpreter ausgeführt; gibt die Messwerte als JSON aus.
+CHILD_SCRIPT = r"""
+import io, sys, json, time, contextlib
+start = time.perf_counter()
+from app.rag.pipeline import RbacRagPipeline
+timings = {"import": time.perf_counter() - start}
+with contextlib.redirect_stdout(io.StringIO()):
+    start = time.perf_counter()
+    pipeline = RbacRagPipeline()
+    timings["init"] = time.perf_counter() - start
+    timings["warmup"] = 0.0
+    if sys.argv[1] == "warm":
+        start = time.perf_counter()
+        pipeline.warmup()
+        timings["warmup"] = time.perf_counter() - start
+    start = time.perf_counter()
+    pipeline.ask("Mitarbeiter", "Was plant die Geschäftsführung für 2025 und gibt es Übernahmen?")
+    timings["first_query"] = time.perf_counter() - start
+    start = time.perf_counter()
+    pipeline.ask("Mitarbeiter", "Welche Standorte sollen geschlossen werden?")
+    timings["second_query"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def run_child(mode, env):
+    """Führt eine Messung in einem neuen Prozess aus."""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, mode], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_breakdown(env):
+    """Summiert die Importzeit (ohne Untermodule anderer Pakete) je Top-Level-Paket in Sekunden."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.rag.pipeline"],
+        env=env, capture_output=True, text=True, check=True
+    )
+    packages = {}
+    for line in result.stderr.splitlines():
+        # Format: 'import time: <self µs> | <kumuliert µs> | <Einrückung><Modul>'
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = [part.strip() for part in line[len("import time:"):].split("|")]
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+    return sorted(packages.items(), key=lambda item: -item[1])
+
+
+def main():
+    stub = StubOpenAIServer(embedding_latency=0.0, chat_latency=0.0).start()
+    workdir = tempfile.mkdtemp(prefix="rag_startup_")
+    chroma_copy = os.path.join(workdir, "chromadb")
+    shutil.copytree(os.getenv("CHROMA_PATH", "./data/chromadb"), chroma_copy)
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.getcwd(),
+        "OPENAI_BASE_URL": stub.base_url,
+        "OPENAI_API_KEY": "stub",
+        "EMBEDDING_PROVIDER": "openai",
+        "CHAT_PROVIDER": "openai",
+        "CHROMA_PATH": chroma_copy,
+        "LOG_FILE": os.path.join(workdir, "audit_log.jsonl"),
+        "EMBEDDING_CACHE_PATH": "",
+        "ANSWER_CACHE_ENABLED": "false",
+        "LEXICAL_INDEX_PATH": "",
+        "RBAC_POLICY_POLL_SECONDS": "0",
+    }
+
+    try:
+        results = {mode: [run_child(mode, env) for _ in range(RUNS)] for mode in ("cold", "warm")}
+        packages = import_breakdown(env)
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    medians = {
+        mode: {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        for mode, runs in results.items()
+    }
+    labels = {"cold": "kalt", "warm": "vorgewärmt"}
+
+    print("\n" + "=" * 84)
+    print(f"🚀 KALTSTART DER PIPELINE | Median aus {RUNS} Prozessen je Variante")
+    print("=" * 84)
+    print(f"{'Variante':<11} | {'Import':>8} | {'Init':>8} | {'Warmup':>8} | {'1. Anfrage':>10} | {'2. Anfrage':>10}")
+    print("-" * 84)
+    for mode, m in medians.items():
+        print(
+            f"{labels[mode]:<11} | {m['import'] * 1000:>6.0f}ms | {m['init'] * 1000:>6.0f}ms | "
+            f"{m['warmup'] * 1000:>6.0f}ms | {m['first_query'] * 1000:>8.0f}ms | {m['second_query'] * 1000:>8.0f}ms"
+        )
+    print("-" * 84)
+    print("Importzeit je Paket (python -X importtime, ohne Interpreter-Start):")
+    for package, seconds in packages[:TOP_PACKAGES]:
+        print(f"  {package:<30} {seconds * 1000:>8.1f} ms")
+
+    cold = medians["cold"]
+    within_budget = cold["import"] <= STARTUP_IMPORT_BUDGET and cold["init"] <= STARTUP_INIT_BUDGET
+    print("-" * 84)
+    print(
+        f"{'✅' if within_budget else '❌'} Budget: Import {cold['import'] * 1000:.0f}/{STARTUP_IMPORT_BUDGET * 1000:.0f} ms, "
+        f"Init {cold['init'] * 1000:.0f}/{STARTUP_INIT_BUDGET * 1000:.0f} ms"
+    )
+    print("=" * 84)
+    if not within_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
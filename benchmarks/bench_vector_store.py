@@ -0,0 +1,196 @@
+"""
+Benchmark: Vektor-Backends 'chroma' (HNSW), 'partitioned' (HNSW je Klassifizierung)
+und 'flat' (NumPy-Matrix per Memory-Map).
+
+Auf einem synthetischen Korpus (siehe `benchmarks/synthetic.py`, lokale Hashing-
+Embeddings in der Dimension von text-embedding-3-small) werden alle Backends über
+die gemeinsame Schnittstelle `VectorStore.query` gemessen:
+
+- Latenz je Einzelanfrage ohne Filter (Modus 'postfilter') und mit RBAC-Vorfilter
+  ('prefilter', Klassifizierungen der jeweiligen Rolle), p50/p95 in ms; der Vorfilter
+  zusätzlich je Rolle (Rollen mit wenigen Rechten durchsuchen nur kleine Partitionen).
+- Latenz je Anfrage bei einem Batch-Aufruf mit allen Anfragevektoren (wie `ask_batch`).
+- Ladezeit (inkl. Import von chromadb) und Arbeitsspeicher (RSS) des Prozesses vor dem
+  Laden sowie nach dem Laden und allen Anfragen.
+- Übereinstimmung der Top-K mit der exakten Suche (HNSW ist approximativ).
+
+Jedes Backend läuft in einem eigenen Prozess, damit sich die Speicherwerte nicht mischen.
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.bench_vector_store --size 5000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+from benchmarks.suite import summarize, rss_peak_mb
+from benchmarks.synthetic import ROLES, generate_corpus, generate_workload
+
+COLLECTION = "company_kb"
+TOP_K = 5
+QUERIES_PER_ROLE = 100
+BACKENDS = ["chroma", "partitioned", "flat"]
+
+
+def rss_current_mb():
+    """Aktueller Arbeitsspeicher (RSS) des Prozesses in MB (ohne /proc: bisheriger Peak)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+    except (IOError, OSError):
+        return rss_peak_mb()
+    return round(resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+
+def build_stores(workdir, size):
+    """Erzeugt Korpus, Anfragevektoren, ChromaDB-Collection, Partitionen und Flat-Index im Arbeitsverzeichnis."""
+    import chromadb
+    from app.rag.providers import HashingEmbeddingProvider
+    from app.rag.vector_store import FlatVectorStore, sync_partitions
+
+    provider = HashingEmbeddingProvider(latency=0.0)
+    documents = generate_corpus(size)
+    embeddings = provider.embed([doc["content"] for doc in documents])
+
+    client = chromadb.PersistentClient(path=os.path.join(workdir, "chromadb"))
+    collection = client.create_collection(name=COLLECTION)
+    step = client.get_max_batch_size()
+    for start in range(0, len(documents), step):
+        batch = documents[start:start + step]
+        collection.add(
+            ids=[doc["id"] for doc in batch],
+            documents=[doc["content"] for doc in batch],
+            embeddings=embeddings[start:start + step],
+            metadatas=[doc["metadata"] for doc in batch]
+        )
+    sync_partitions(client, collection, COLLECTION)
+    FlatVectorStore.from_collection(collection).save(os.path.join(workdir, "flat_index"))
+
+    workload = generate_workload(QUERIES_PER_ROLE)
+    np.save(os.path.join(workdir, "queries.npy"), np.asarray(provider.embed([w["query"] for w in workload]), dtype=np.float32))
+    with open(os.path.join(workdir, "roles.json"), "w", encoding="utf-8") as f:
+        json.dump([w["role"] for w in workload], f)
+    return provider.dim
+
+
+def run_child(backend, workdir):
+    """Misst ein Backend in einem frischen Prozess."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_vector_store", "--child", backend, "--workdir", workdir],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def child(backend, workdir):
+    from app.security.rbac import get_allowed_classifications
+    from app.rag.vector_store import ChromaVectorStore, FlatVectorStore, PartitionedVectorStore
+
+    queries = np.load(os.path.join(workdir, "queries.npy"))
+    with open(os.path.join(workdir, "roles.json"), "r", encoding="utf-8") as f:
+        roles = json.load(f)
+    allowed = {role: get_allowed_classifications(role) for role in set(roles)}
+    rss_before = rss_current_mb()
+
+    start = time.perf_counter()
+    if backend in ("chroma", "partitioned"):
+        import chromadb
+        client = chromadb.PersistentClient(path=os.path.join(workdir, "chromadb"))
+        if backend == "chroma":
+            store = ChromaVectorStore(client.get_collection(name=COLLECTION))
+        else:
+            store = PartitionedVectorStore.from_client(client, COLLECTION)
+    else:
+        store = FlatVectorStore.load(os.path.join(workdir, "flat_index"))
+    store.warmup()
+    load_seconds = time.perf_counter() - start
+
+    post, pre, top_ids = [], [], []
+    pre_by_role = {role: [] for role in allowed}
+    for vector, role in zip(queries, roles):
+        start = time.perf_counter()
+        result = store.query([vector], TOP_K)
+        post.append(time.perf_counter() - start)
+        top_ids.append(result["ids"][0])
+
+        start = time.perf_counter()
+        store.query([vector], TOP_K, allowed[role])
+        pre.append(time.perf_counter() - start)
+        pre_by_role[role].append(pre[-1])
+
+    start = time.perf_counter()
+    store.query(queries, TOP_K)
+    batch_per_query = (time.perf_counter() - start) / len(queries)
+
+    print(json.dumps({
+        "load_seconds": round(load_seconds, 4),
+        "postfilter_ms": summarize(post),
+        "prefilter_ms": summarize(pre),
+        "prefilter_p50_by_role_ms": {role: summarize(values)["p50"] for role, values in pre_by_role.items()},
+        "batch_ms_per_query": round(batch_per_query * 1000, 4),
+        "rss_before_mb": rss_before,
+        "rss_after_mb": rss_current_mb(),
+        "top_ids": top_ids,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleich der Vektor-Backends 'chroma', 'partitioned' und 'flat'.")
+    parser.add_argument("--size", type=int, default=5000, help="Anzahl synthetischer Dokumente")
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.workdir)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="rag_vector_store_")
+    try:
+        print(f"Erzeuge Korpus mit {args.size} Dokumenten und alle Indizes...")
+        dimension = build_stores(workdir, args.size)
+        results = {backend: run_child(backend, workdir) for backend in BACKENDS}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Anteil der exakten Top-K (Flat), die HNSW ebenfalls liefert
+    def overlap(backend):
+        return np.mean([
+            len(set(exact) & set(approx)) / len(exact)
+            for exact, approx in zip(results["flat"]["top_ids"], results[backend]["top_ids"]) if exact
+        ])
+
+    print("\n" + "=" * 99)
+    print(f"🗂️  VEKTOR-BACKENDS | {args.size} Dokumente x {dimension} Dimensionen | "
+          f"{QUERIES_PER_ROLE * len(ROLES)} Anfragen | Top-{TOP_K}")
+    print("=" * 99)
+    print(f"{'Backend':<11} | {'Laden':>8} | {'ohne Filter p50/p95':>20} | {'Vorfilter p50/p95':>18} | "
+          f"{'Batch/Anfr.':>11} | {'RSS vorher/nachher':>18}")
+    print("-" * 99)
+    for backend, r in results.items():
+        print(
+            f"{backend:<11} | {r['load_seconds'] * 1000:>6.0f}ms | "
+            f"{r['postfilter_ms']['p50']:>8.3f} / {r['postfilter_ms']['p95']:>7.3f}ms | "
+            f"{r['prefilter_ms']['p50']:>7.3f} / {r['prefilter_ms']['p95']:>6.3f}ms | "
+            f"{r['batch_ms_per_query']:>9.3f}ms | {r['rss_before_mb']:>7.0f} / {r['rss_after_mb']:>5.0f} MB"
+        )
+    print("-" * 99)
+    print("Vorfilter p50 je Rolle:")
+    for role in ROLES:
+        print(f"  {role:<19} " + " | ".join(
+            f"{backend}: {r['prefilter_p50_by_role_ms'][role]:.3f}ms" for backend, r in results.items()
+        ))
+    print("-" * 99)
+    for backend in ("chroma", "partitioned"):
+        print(f"Übereinstimmung Top-{TOP_K} {backend} (HNSW) vs. exakte Suche: {overlap(backend) * 100:.1f} %")
+    print("=" * 99)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Vergleicht zwei Ergebnisdateien der Benchmark-Suite (z. B. zweier Commits).
+
+Alle Zahlenwerte, die in beiden Dateien vorkommen, werden mit relativer
+Änderung ausgegeben. Bei Latenzen und Speicher ist ein Anstieg eine
+Verschlechterung, bei Durchsatzwerten ein Rückgang.
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.compare alt.json neu.json [--threshold 10]
+"""
+import sys
+import json
+import argparse
+
+# Kennzahlen, bei denen ein höherer Wert besser ist
+HIGHER_IS_BETTER = ("throughput_qps", "docs_per_second")
+# Konfigurations- und Zählwerte, die nicht verglichen werden
+SKIP = ("documents", "queries", "requests", "users")
+
+
+def flatten(data, prefix=""):
+    """Verschachtelte Ergebnisse -> {'corpora.1000.warm_queries.latency_ms.p95': 1.23, ...}"""
+    items = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            items.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, list):
+        for value in data:
+            # Listen (Laststufen) werden über die Benutzerzahl identifiziert
+            label = f"users={value['users']}" if isinstance(value, dict) and "users" in value else str(data.index(value))
+            items.update(flatten(value, f"{prefix}{label}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        items[prefix[:-1]] = float(data)
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleich zweier Benchmark-Ergebnisse")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Markierung ab dieser Änderung (%%)")
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    old_values = flatten(old.get("corpora", {}))
+    new_values = flatten(new.get("corpora", {}))
+
+    print(f"Vergleich: {old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    print(f"{'Kennzahl':<62} | {'alt':>10} | {'neu':>10} | {'Δ %':>8}")
+    print("-" * 100)
+    regressions = 0
+    for key in sorted(set(old_values) & set(new_values)):
+        if key.rsplit(".", 1)[-1] in SKIP:
+            continue
+        before, after = old_values[key], new_values[key]
+        change = (after - before) / before * 100 if before else 0.0
+        worse = change < 0 if key.endswith(HIGHER_IS_BETTER) else change > 0
+        marker = ""
+        if abs(change) >= args.threshold:
+            marker = "❌" if worse else "✅"
+            regressions += worse
+        print(f"{key:<62} | {before:>10.3f} | {after:>10.3f} | {change:>+7.1f}% {marker}")
+    print("-" * 100)
+    print(f"{regressions} Verschlechterung(en) über {args.threshold:.0f}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Evaluierung: Verkürzte Embeddings (`dimensions`) und quantisierte Vektoren (float16/int8).
+
+Teil 1 - Recall auf `data/docs/documents.json`:
+Grundlage sind die Vektoren der bestehenden ChromaDB (text-embedding-3-small, gelesen
+aus einer temporären Kopie). Verkürzte Embeddings entstehen durch Abschneiden und
+erneutes Normieren; bei text-embedding-3-* entspricht das dem Ergebnis des
+API-Parameters `dimensions`, ohne die Dokumente neu zu vektorisieren. Als Anfragen
+dienen die Dokumentvektoren selbst (Leave-one-out: der Eintrag selbst zählt nicht als
+Treffer). Referenz ist die exakte float32-Suche in voller Dimension; recall@K ist der
+Anteil der Referenz-Top-K, den eine Variante ebenfalls liefert.
+
+Teil 2 - Speicher und Latenz auf einem synthetischen Korpus (`--size`, lokale
+Hashing-Embeddings), je Variante in einem eigenen Prozess: Größe der Suchmatrix,
+Arbeitsspeicher (RSS) nach allen Anfragen und Latenz je Einzelanfrage (p50/p95).
+Die Nachbewertung liest die float32-Zeilen der Kandidaten per pread und blendet die
+float32-Matrix daher nicht in den Prozess ein.
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.eval_quantization --size 20000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+from benchmarks.suite import summarize
+from benchmarks.bench_vector_store import rss_current_mb
+from benchmarks.synthetic import ROLES, generate_corpus, generate_workload
+
+COLLECTION = "company_kb"
+RECALL_KS = (1, 3, 5)
+DIMENSIONS = (1536, 1024, 512, 256)
+QUANTIZATIONS = ("none", "float16", "int8")
+RESCORE_FACTOR = 4
+QUERIES_PER_ROLE = 100
+# (Dimension, Quantisierung, Nachbewertungsfaktor) für die Messung von Speicher und Latenz
+SCALE_VARIANTS = [
+    (1536, "none", 0), (1536, "float16", RESCORE_FACTOR), (1536, "int8", RESCORE_FACTOR), (1536, "int8", 0),
+    (512, "none", 0), (512, "int8", RESCORE_FACTOR), (512, "int8", 0), (256, "int8", RESCORE_FACTOR),
+]
+
+
+def shorten(vectors, dimensions):
+    """Verkürzt Embeddings auf `dimensions` Komponenten und normiert sie erneut (wie `dimensions` der API)."""
+    vectors = np.asarray(vectors, dtype=np.float32)[:, :dimensions]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def load_documents_vectors():
+    """Liest IDs, Vektoren und Metadaten der Wissensbasis aus einer Kopie der ChromaDB."""
+    import chromadb
+
+    workdir = tempfile.mkdtemp(prefix="rag_quantization_")
+    try:
+        chroma_copy = os.path.join(workdir, "chromadb")
+        shutil.copytree(os.getenv("CHROMA_PATH", "./data/chromadb"), chroma_copy)
+        data = chromadb.PersistentClient(path=chroma_copy).get_collection(name=COLLECTION).get(
+            include=["embeddings", "metadatas"]
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return data["ids"], np.asarray(data["embeddings"], dtype=np.float32), data["metadatas"]
+
+
+def leave_one_out(store, ids, queries, k):
+    """Top-K je Anfragevektor ohne den Eintrag, aus dem die Anfrage stammt."""
+    result = store.query(queries, k + 1)["ids"]
+    return [[doc_id for doc_id in row if doc_id != own_id][:k] for own_id, row in zip(ids, result)]
+
+
+def evaluate_recall():
+    """recall@K je Variante (Dimension, Quantisierung, Nachbewertung) gegenüber float32 in voller Dimension."""
+    from app.rag.vector_store import FlatVectorStore
+
+    ids, embeddings, metadatas = load_documents_vectors()
+    full_dimension = embeddings.shape[1]
+    documents = [""] * len(ids)
+    max_k = max(RECALL_KS)
+    reference = leave_one_out(FlatVectorStore.build(ids, embeddings, documents, metadatas, quantization="none"), ids, embeddings, max_k)
+
+    rows = []
+    for dimensions in DIMENSIONS:
+        if dimensions > full_dimension:
+            continue
+        vectors = shorten(embeddings, dimensions)
+        for quantization in QUANTIZATIONS:
+            store = FlatVectorStore.build(ids, vectors, documents, metadatas, quantization=quantization)
+            for rescore_factor in ([0] if quantization == "none" else [0, RESCORE_FACTOR]):
+                store.rescore_factor = rescore_factor
+                found = leave_one_out(store, ids, vectors, max_k)
+                rows.append({
+                    "dimensions": dimensions,
+                    "quantization": quantization,
+                    "rescore_factor": rescore_factor,
+                    "recall": {
+                        k: float(np.mean([len(set(ref[:k]) & set(row[:k])) / k for ref, row in zip(reference, found)]))
+                        for k in RECALL_KS
+                    },
+                    "bytes_per_vector": store.index_nbytes / len(ids),
+                })
+    return len(ids), full_dimension, rows
+
+
+def build_scale_variants(workdir, size):
+    """Erzeugt je Variante einen gespeicherten Flat-Index sowie passende Anfragevektoren."""
+    from app.rag.providers import HashingEmbeddingProvider
+    from app.rag.vector_store import FlatVectorStore
+
+    provider = HashingEmbeddingProvider(latency=0.0)
+    documents = generate_corpus(size)
+    embeddings = np.asarray(provider.embed([doc["content"] for doc in documents]), dtype=np.float32)
+    queries = np.asarray(provider.embed([w["query"] for w in generate_workload(QUERIES_PER_ROLE)]), dtype=np.float32)
+    ids = [doc["id"] for doc in documents]
+    for dimensions, quantization in sorted({variant[:2] for variant in SCALE_VARIANTS}):
+        path = os.path.join(workdir, f"{dimensions}_{quantization}")
+        FlatVectorStore.build(
+            ids, shorten(embeddings, dimensions), [doc["content"] for doc in documents],
+            [doc["metadata"] for doc in documents], quantization=quantization
+        ).save(path)
+        np.save(os.path.join(path, "queries.npy"), shorten(queries, dimensions))
+
+
+def run_child(path, rescore_factor):
+    """Misst eine Variante in einem frischen Prozess."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.eval_quantization", "--child", path, "--rescore-factor", str(rescore_factor)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def child(path, rescore_factor):
+    from app.rag.vector_store import FlatVectorStore
+
+    queries = np.load(os.path.join(path, "queries.npy"))
+    rss_before = rss_current_mb()
+    store = FlatVectorStore.load(path)
+    store.rescore_factor = rescore_factor
+    store.warmup()
+
+    latencies = []
+    for vector in queries:
+        start = time.perf_counter()
+        store.query([vector], max(RECALL_KS))
+        latencies.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        "index_mb": round(store.index_nbytes / 1024 ** 2, 1),
+        "latency_ms": summarize(latencies),
+        "rss_delta_mb": round(rss_current_mb() - rss_before, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall, Speicher und Latenz verkürzter bzw. quantisierter Embeddings.")
+    parser.add_argument("--size", type=int, default=20000, help="Anzahl synthetischer Dokumente für Speicher/Latenz")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--rescore-factor", type=int, default=RESCORE_FACTOR, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.rescore_factor)
+        return
+
+    count, full_dimension, recall_rows = evaluate_recall()
+
+    workdir = tempfile.mkdtemp(prefix="rag_quantization_")
+    try:
+        print(f"Erzeuge synthetischen Korpus mit {args.size} Dokumenten und {len(SCALE_VARIANTS)} Varianten...")
+        build_scale_variants(workdir, args.size)
+        scale = {
+            (dimensions, quantization, factor): run_child(os.path.join(workdir, f"{dimensions}_{quantization}"), factor)
+            for dimensions, quantization, factor in SCALE_VARIANTS
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 90)
+    print(f"🎯 RECALL | documents.json: {count} Vektoren x {full_dimension} Dimensionen | "
+          f"Referenz: float32, {full_dimension} Dimensionen (Leave-one-out)")
+    print("=" * 90)
+    print(f"{'Dimension':>9} | {'Format':<8} | {'Nachbewertung':<13} | "
+          + " | ".join(f"{'recall@' + str(k):>9}" for k in RECALL_KS) + f" | {'Byte/Vektor':>11}")
+    print("-" * 90)
+    for row in recall_rows:
+        rescoring = f"float32 x{row['rescore_factor']}" if row["rescore_factor"] else "-"
+        print(
+            f"{row['dimensions']:>9} | {row['quantization']:<8} | {rescoring:<13} | "
+            + " | ".join(f"{row['recall'][k] * 100:>8.1f}%" for k in RECALL_KS)
+            + f" | {row['bytes_per_vector']:>11.0f}"
+        )
+
+    print("\n" + "=" * 90)
+    print(f"💾 SPEICHER & LATENZ | {args.size} synthetische Dokumente | "
+          f"{QUERIES_PER_ROLE * len(ROLES)} Anfragen | Top-{max(RECALL_KS)}")
+    print("=" * 90)
+    print(f"{'Dimension':>9} | {'Format':<8} | {'Nachbewertung':<13} | {'Suchmatrix':>10} | "
+          f"{'RSS-Zuwachs':>11} | {'p50':>9} | {'p95':>9}")
+    print("-" * 90)
+    for (dimensions, quantization, factor), r in scale.items():
+        rescoring = f"float32 x{factor}" if factor else "-"
+        print(
+            f"{dimensions:>9} | {quantization:<8} | {rescoring:<13} | {r['index_mb']:>7.1f} MB | "
+            f"{r['rss_delta_mb']:>8.1f} MB | {r['latency_ms']['p50']:>7.3f}ms | {r['latency_ms']['p95']:>7.3f}ms"
+        )
+    print("=" * 90)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Lasttest: Durchsatz von `RbacRagPipeline.aask` bei 1/10/100 gleichzeitigen Benutzern.
+
+Embedding- und Chat-Endpunkte werden durch einen lokalen Stub mit simulierter
+Latenz ersetzt (siehe `benchmarks/stub_openai.py`). Die Vektorsuche läuft gegen
+eine temporäre Kopie der ChromaDB, das Audit-Log in eine temporäre Datei.
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.load_test
+"""
+import io
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import statistics
+import contextlib
+
+from benchmarks.stub_openai import StubOpenAIServer
+
+# --- KONFIGURATION ---
+CONCURRENCY_LEVELS = [1, 10, 100]
+REQUESTS_PER_USER = 5
+EMBEDDING_LATENCY = 0.05  # Sekunden
+CHAT_LATENCY = 0.5        # Sekunden
+ROLES = ["Mitarbeiter", "Vorgesetzter", "Geschaeftsfuehrung"]
+QUERY = "Was plant die Geschäftsführung für 2025 und gibt es Übernahmen?"
+
+
+async def simulate_user(pipeline, user_id, latencies):
+    role = ROLES[user_id % len(ROLES)]
+    for i in range(REQUESTS_PER_USER):
+        # Eindeutige Anfragen, damit jede Anfrage den Embedding-Endpunkt erreicht
+        query = f"{QUERY} (Benutzer {user_id}, Anfrage {i})"
+        start = time.perf_counter()
+        await pipeline.aask(role, query)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_all_levels(pipeline):
+    # Ein Event-Loop für alle Stufen: der AsyncOpenAI-Client ist an seinen Loop gebunden.
+    return [await run_level(pipeline, users) for users in CONCURRENCY_LEVELS]
+
+
+async def run_level(pipeline, users):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(simulate_user(pipeline, user_id, latencies) for user_id in range(users)))
+    duration = time.perf_counter() - start
+    return {
+        "users": users,
+        "requests": len(latencies),
+        "seconds": duration,
+        "throughput": len(latencies) / duration,
+        "p50": statistics.median(latencies),
+        "p95": statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0],
+    }
+
+
+def main():
+    stub = StubOpenAIServer(embedding_latency=EMBEDDING_LATENCY, chat_latency=CHAT_LATENCY).start()
+    workdir = tempfile.mkdtemp(prefix="rag_load_test_")
+    chroma_copy = os.path.join(workdir, "chromadb")
+    shutil.copytree(os.getenv("CHROMA_PATH", "./data/chromadb"), chroma_copy)
+
+    # Die Konfiguration muss vor dem Import der Pipeline gesetzt werden.
+    os.environ.update({
+        "OPENAI_BASE_URL": stub.base_url,
+        "OPENAI_API_KEY": "stub",
+        "CHROMA_PATH": chroma_copy,
+        "LOG_FILE": os.path.join(workdir, "audit_log.jsonl"),
+        "EMBEDDING_CACHE_PATH": "",
+    })
+    from app.rag.pipeline import RbacRagPipeline
+    from app.logging.audit import get_audit_stats, shutdown_audit_log
+
+    try:
+        pipeline = RbacRagPipeline()
+        # Die Konsolenausgaben der Pipeline werden während der Messung unterdrückt.
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = asyncio.run(run_all_levels(pipeline))
+        audit_stats = get_audit_stats()
+    finally:
+        # Ausstehende Audit-Einträge schreiben, bevor das Arbeitsverzeichnis entfernt wird
+        shutdown_audit_log()
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 78)
+    print(f"🚀 LASTTEST aask() | Stub-Latenz: Embedding {EMBEDDING_LATENCY * 1000:.0f} ms, Chat {CHAT_LATENCY * 1000:.0f} ms")
+    print("=" * 78)
+    print(f"{'Benutzer':<10} | {'Anfragen':<9} | {'Dauer (s)':<10} | {'Durchsatz (req/s)':<18} | {'p50 (s)':<8} | {'p95 (s)':<8}")
+    print("-" * 78)
+    for r in results:
+        print(
+            f"{r['users']:<10} | {r['requests']:<9} | {r['seconds']:<10.2f} | "
+            f"{r['throughput']:<18.2f} | {r['p50']:<8.3f} | {r['p95']:<8.3f}"
+        )
+    print("-" * 78)
+    print(
+        f"Audit-Writer: {audit_stats['enqueued']} angenommen | {audit_stats['dropped']} verworfen | "
+        f"{audit_stats['backpressure']}x Backpressure | {audit_stats['batches']} Schreibvorgänge"
+    )
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
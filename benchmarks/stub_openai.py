@@ -0,0 +1,217 @@
+"""
+Lokaler Stub-Server mit OpenAI-kompatiblen Endpunkten für Last- und Latenztests.
+
+Implementiert `POST /v1/embeddings` und `POST /v1/chat/completions` mit
+deterministischen Antworten und konfigurierbarer, simulierter Latenz. Die
+Pipeline wird über `OPENAI_BASE_URL` auf den Stub umgeleitet, sodass keine
+echten API-Aufrufe (und keine Kosten) entstehen.
+
+Optional simuliert der Stub das Prompt-Caching der Anbieter: Der längste bereits
+gesehene Präfix eines Prompts (in Blöcken von `cache_block` Tokens, frühestens ab
+`cache_min_tokens`) wird in `usage.prompt_tokens_details.cached_tokens` gemeldet.
+Tokens werden dabei - wie überall im Stub - als Wörter gezählt.
+"""
+import json
+import time
+import random
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+EMBEDDING_DIM = 1536  # Dimension von text-embedding-3-small
+
+
+def stub_embedding(text, dim=EMBEDDING_DIM):
+    """Erzeugt einen deterministischen, normierten Pseudo-Vektor für einen Text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [v / norm for v in vector]
+
+
+def prompt_units(messages):
+    """Zerlegt die Nachrichten in Stub-Tokens (Rollenmarker und Wörter, in Prompt-Reihenfolge)."""
+    units = []
+    for message in messages:
+        units.append(f"<|{message.get('role', '')}|>")
+        units.extend(message.get("content", "").split())
+    return units
+
+
+class StubOpenAIServer:
+    """
+    Startet den Stub in einem Hintergrund-Thread.
+
+    Args:
+        embedding_latency (float): Simulierte Antwortzeit des Embedding-Endpunkts (Sekunden).
+        chat_latency (float): Simulierte Antwortzeit des Chat-Endpunkts (Sekunden).
+        prefix_cache (bool): Prompt-Caching simulieren und `cached_tokens` melden.
+        cache_min_tokens (int): Mindestlänge eines gecachten Präfixes (OpenAI: 1024).
+        cache_block (int): Granularität des Caches in Tokens (OpenAI: 128).
+    """
+
+    def __init__(self, embedding_latency=0.05, chat_latency=0.5, host="127.0.0.1", port=0,
+                 prefix_cache=False, cache_min_tokens=1024, cache_block=128):
+        self.embedding_latency = embedding_latency
+        self.chat_latency = chat_latency
+        self.prefix_cache = prefix_cache
+        self.cache_min_tokens = cache_min_tokens
+        self.cache_block = cache_block
+        self.request_counts = {"embeddings": 0, "chat": 0}
+        self._lock = threading.Lock()
+        self._prefixes = set()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # Keine Zugriffsprotokolle auf der Konsole
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.endswith("/embeddings"):
+                    payload = server.handle_embeddings(body)
+                elif self.path.endswith("/chat/completions") and body.get("stream"):
+                    self.stream_events(server.handle_chat_stream(body))
+                    return
+                elif self.path.endswith("/chat/completions"):
+                    payload = server.handle_chat(body)
+                else:
+                    self.send_error(404)
+                    return
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def stream_events(self, events):
+                """Sendet Server-Sent Events und schließt danach die Verbindung."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for event in events:
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 256  # Viele gleichzeitige Verbindungen im Lasttest
+
+        self._httpd = Server((host, port), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-openai", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _count(self, endpoint):
+        with self._lock:
+            self.request_counts[endpoint] += 1
+
+    def reset_cache(self):
+        """Leert den simulierten Prompt-Cache."""
+        with self._lock:
+            self._prefixes.clear()
+
+    def cached_prefix_tokens(self, messages):
+        """Länge des längsten bereits gesehenen Präfixes (in ganzen Blöcken); merkt sich den Prompt."""
+        if not self.prefix_cache:
+            return 0
+        digest = hashlib.sha256()
+        keys, cached = [], 0
+        for length, unit in enumerate(prompt_units(messages), start=1):
+            digest.update(unit.encode("utf-8") + b"\0")
+            if length % self.cache_block == 0 and length >= self.cache_min_tokens:
+                keys.append((length, digest.hexdigest()))
+        with self._lock:
+            for length, key in keys:
+                if key in self._prefixes:
+                    cached = length
+            self._prefixes.update(key for _, key in keys)
+        return cached
+
+    def _chat_usage(self, messages, completion_tokens):
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if self.prefix_cache:
+            # Rollenmarker zählen nicht zu den abgerechneten Tokens
+            usage["prompt_tokens_details"] = {
+                "cached_tokens": min(self.cached_prefix_tokens(messages), prompt_tokens)
+            }
+        return usage
+
+    def handle_embeddings(self, body):
+        self._count("embeddings")
+        time.sleep(self.embedding_latency)
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        tokens = sum(len(text.split()) for text in inputs)
+        return {
+            "object": "list",
+            "model": body.get("model", "stub-embedding"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": stub_embedding(text, body.get("dimensions") or EMBEDDING_DIM)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def handle_chat(self, body):
+        self._count("chat")
+        time.sleep(self.chat_latency)
+        messages = body.get("messages", [])
+        question = messages[-1]["content"] if messages else ""
+        answer = f"Stub-Antwort auf: {question}"
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub-chat"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}
+            ],
+            "usage": self._chat_usage(messages, len(answer.split())),
+        }
+
+    def handle_chat_stream(self, body, token_interval=0.01):
+        """
+        Streaming-Variante: Die simulierte Latenz bis zum ersten Token entspricht
+        `chat_latency`, danach folgt alle `token_interval` Sekunden ein Wort.
+        """
+        self._count("chat")
+        time.sleep(self.chat_latency)
+        messages = body.get("messages", [])
+        question = messages[-1]["content"] if messages else ""
+        words = f"Stub-Antwort auf: {question}".split(" ")
+        base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model", "stub-chat")}
+        for i, word in enumerate(words):
+            token = word if i == 0 else " " + word
+            yield {**base, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            time.sleep(token_interval)
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if body.get("stream_options", {}).get("include_usage"):
+            yield {**base, "choices": [], "usage": self._chat_usage(messages, len(words))}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,336 @@
+"""
+Reproduzierbare Benchmark-Suite für die RAG+RBAC-Pipeline.
+
+Läuft vollständig offline mit den lokalen Anbietern (Hashing-Embeddings und
+Echo-Chat, siehe `app/rag/providers.py`) auf synthetischen Korpora
+(siehe `benchmarks/synthetic.py`). Gemessen werden je Korpusgröße:
+
+- index_build:      Aufbau der Collection (Dokumente/s)
+- cold_start:       Neuer Prozess: Imports, Initialisierung, erste Anfrage
+- warm_queries:     Sequenzielle Anfragen: p50/p95/p99 gesamt und je Stufe,
+                    Durchsatz, Blocking-Rate, Speicher-Peak
+- concurrent_load:  `aask` mit mehreren gleichzeitigen Benutzern
+
+Das Ergebnis wird als JSON gespeichert und kann mit `benchmarks/compare.py`
+zwischen zwei Commits verglichen werden.
+
+Aufruf (aus dem Projekt-Root):
+    python -m benchmarks.suite --sizes 1000,10000 --output bench_results.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from app.logging.reader import STAGES
+from benchmarks.synthetic import DEFAULT_MIX, ROLES, generate_corpus, generate_workload
+
+COLLECTION = "company_kb"
+
+
+def summarize(values_seconds):
+    """Kennzahlen einer Latenzverteilung in Millisekunden."""
+    if not values_seconds:
+        return None
+    values = np.asarray(values_seconds, dtype=np.float64) * 1000.0
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "mean": round(float(values.mean()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def rss_peak_mb():
+    """Maximaler Arbeitsspeicher (Resident Set Size) des Prozesses bisher in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: Kilobyte, macOS: Byte
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def quiet():
+    """Unterdrückt die Konsolenausgaben der Pipeline während der Messung."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def bench_index_build(chroma_path, documents):
+    import chromadb
+    import build_index
+
+    client = chromadb.PersistentClient(path=chroma_path)
+    collection = client.create_collection(name=COLLECTION)
+    with quiet():
+        stats = build_index.index_documents(collection, documents)
+    return {
+        "documents": stats["documents"],
+        "seconds": round(stats["seconds"], 3),
+        "docs_per_second": round(stats["docs_per_second"], 1),
+        "rss_peak_mb": rss_peak_mb(),
+    }
+
+
+def bench_cold_start(chroma_path, workload):
+    """Startet einen neuen Interpreter und misst Imports, Initialisierung und die ersten Anfragen."""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--cold-start-child", chroma_path,
+         "--child-role", workload[0]["role"], "--child-query", workload[0]["query"]],
+        capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def cold_start_child(chroma_path, role, query):
+    start = time.perf_counter()
+    from app.rag.pipeline import RbacRagPipeline
+    imported = time.perf_counter()
+    with quiet():
+        pipeline = RbacRagPipeline(use_answer_cache=False, chroma_path=chroma_path, collection_name=COLLECTION)
+        initialized = time.perf_counter()
+        pipeline.ask(role, query)
+        first = time.perf_counter()
+        pipeline.ask(role, query + " (erneut)")
+        second = time.perf_counter()
+    print(json.dumps({
+        "import_seconds": round(imported - start, 4),
+        "init_seconds": round(initialized - imported, 4),
+        "first_query_seconds": round(first - initialized, 4),
+        "second_query_seconds": round(second - first, 4),
+    }))
+
+
+def bench_warm_queries(pipeline, workload, memory_sample):
+    # Aufwärmen (Caches, Lazy-Initialisierung in ChromaDB), nicht gemessen
+    with quiet():
+        for item in workload[:5]:
+            pipeline.ask(item["role"], item["query"] + " (warmup)")
+
+    latencies, stages = [], {stage: [] for stage in STAGES}
+    allowed_by_role = {role: 0 for role in ROLES}
+    blocked_by_role = {role: 0 for role in ROLES}
+    start = time.perf_counter()
+    with quiet():
+        for item in workload:
+            result = pipeline.ask(item["role"], item["query"])
+            latencies.append(result["latency"])
+            for stage in STAGES:
+                if stage in result["stages"]:
+                    stages[stage].append(result["stages"][stage])
+            allowed_by_role[item["role"]] += len(result["allowed_docs"])
+            blocked_by_role[item["role"]] += result["blocked_count"]
+    duration = time.perf_counter() - start
+
+    # Separater Durchlauf mit tracemalloc (verlangsamt die Ausführung, daher nicht in der Latenzmessung)
+    tracemalloc.start()
+    with quiet():
+        for item in workload[:memory_sample]:
+            pipeline.ask(item["role"], item["query"] + " (memory)")
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def rate(allowed, blocked):
+        total = allowed + blocked
+        return round(blocked / total, 4) if total else 0.0
+
+    return {
+        "queries": len(workload),
+        "seconds": round(duration, 3),
+        "throughput_qps": round(len(workload) / duration, 2),
+        "latency_ms": summarize(latencies),
+        "stages_ms": {stage: summarize(values) for stage, values in stages.items()},
+        "blocking_rate": rate(sum(allowed_by_role.values()), sum(blocked_by_role.values())),
+        "blocking_rate_by_role": {role: rate(allowed_by_role[role], blocked_by_role[role]) for role in ROLES},
+        "py_alloc_peak_mb": round(py_peak / (1024 * 1024), 2),
+        "rss_peak_mb": rss_peak_mb(),
+    }
+
+
+async def _run_load(pipeline, workload, levels, requests_per_user):
+    # Ein Event-Loop für alle Stufen (asynchrone Clients sind an ihren Loop gebunden)
+    results = []
+    for users in levels:
+        latencies = []
+
+        async def user(user_id):
+            for i in range(requests_per_user):
+                item = workload[(user_id * requests_per_user + i) % len(workload)]
+                start = time.perf_counter()
+                await pipeline.aask(item["role"], f"{item['query']} (Last {users}/{user_id}/{i})")
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(user_id) for user_id in range(users)))
+        duration = time.perf_counter() - start
+        results.append({
+            "users": users,
+            "requests": len(latencies),
+            "seconds": round(duration, 3),
+            "throughput_qps": round(len(latencies) / duration, 2),
+            "latency_ms": summarize(latencies),
+        })
+    return results
+
+
+def bench_concurrent_load(pipeline, workload, levels, requests_per_user, chat_latency):
+    from app.rag.providers import EchoChatProvider
+
+    # Simulierte LLM-Wartezeit, damit sich gleichzeitige Anfragen überlappen können
+    original = pipeline.chat_provider
+    pipeline.chat_provider = EchoChatProvider(latency=chat_latency)
+    try:
+        with quiet():
+            return asyncio.run(_run_load(pipeline, workload, levels, requests_per_user))
+    finally:
+        pipeline.chat_provider = original
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(text):
+    """'public=0.4,internal=0.3,...' -> dict"""
+    mix = {}
+    for part in text.split(","):
+        name, value = part.split("=")
+        mix[name.strip()] = float(value)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark-Suite der RAG+RBAC-Pipeline (offline)")
+    parser.add_argument("--sizes", default="1000,10000", help="Korpusgrößen, z. B. 1000,10000,100000")
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help="Verteilung der Klassifizierungen")
+    parser.add_argument("--queries-per-role", type=int, default=100)
+    parser.add_argument("--memory-sample", type=int, default=30, help="Anfragen im tracemalloc-Durchlauf")
+    parser.add_argument("--concurrency", default="1,10,50", help="Gleichzeitige Benutzer im Lasttest")
+    parser.add_argument("--requests-per-user", type=int, default=5)
+    parser.add_argument("--load-chat-latency", type=float, default=0.1, help="Simulierte LLM-Latenz im Lasttest (s)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--keep-workdir", action="store_true")
+    parser.add_argument("--cold-start-child", help=argparse.SUPPRESS)
+    parser.add_argument("--child-role", help=argparse.SUPPRESS)
+    parser.add_argument("--child-query", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start_child:
+        cold_start_child(args.cold_start_child, args.child_role, args.child_query)
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    mix = parse_mix(args.mix)
+    workdir = tempfile.mkdtemp(prefix="rag_bench_")
+
+    # Die Konfiguration muss vor dem Import von Pipeline und build_index gesetzt werden;
+    # sie wird auch an den Kaltstart-Prozess vererbt.
+    os.environ.update({
+        "EMBEDDING_PROVIDER": "local",
+        "CHAT_PROVIDER": "local",
+        "LOCAL_CHAT_LATENCY": "0",
+        "LOCAL_EMBEDDING_LATENCY": "0",
+        "EMBEDDING_CACHE_PATH": "",
+        "ANSWER_CACHE_ENABLED": "false",
+        "CHROMA_PATH": os.path.join(workdir, "default_chroma"),
+        "INDEX_MANIFEST_PATH": os.path.join(workdir, "index_manifest.json"),
+        "LOG_FILE": os.path.join(workdir, "audit_log.jsonl"),
+        "RBAC_POLICY_POLL_SECONDS": "0",
+        # BM25-Index wird beim Start der Pipeline aus der jeweiligen Collection aufgebaut
+        "LEXICAL_INDEX_PATH": "",
+    })
+    from app.rag.pipeline import RbacRagPipeline
+    from app.logging.audit import shutdown_audit_log
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                "sizes": sizes, "mix": mix, "queries_per_role": args.queries_per_role,
+                "concurrency": levels, "requests_per_user": args.requests_per_user,
+                "load_chat_latency": args.load_chat_latency,
+            },
+        },
+        "corpora": {},
+    }
+    workload = generate_workload(args.queries_per_role)
+
+    try:
+        for size in sizes:
+            print(f"\n📚 Korpus mit {size:,} Dokumenten")
+            chroma_path = os.path.join(workdir, f"chroma_{size}")
+            documents = generate_corpus(size, mix)
+            result = {}
+
+            print("  ⏱️ Indexaufbau...")
+            result["index_build"] = bench_index_build(chroma_path, documents)
+            print("  ⏱️ Kaltstart...")
+            result["cold_start"] = bench_cold_start(chroma_path, workload)
+
+            with quiet():
+                pipeline = RbacRagPipeline(use_answer_cache=False, chroma_path=chroma_path, collection_name=COLLECTION)
+            print(f"  ⏱️ Warme Anfragen ({len(workload)})...")
+            result["warm_queries"] = bench_warm_queries(pipeline, workload, args.memory_sample)
+            print(f"  ⏱️ Last ({args.concurrency} Benutzer)...")
+            result["concurrent_load"] = bench_concurrent_load(
+                pipeline, workload, levels, args.requests_per_user, args.load_chat_latency
+            )
+            report["corpora"][str(size)] = result
+            print_summary(size, result)
+    finally:
+        shutdown_audit_log()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Ergebnisse gespeichert: {args.output}")
+
+
+def print_summary(size, result):
+    warm = result["warm_queries"]
+    print("  " + "-" * 66)
+    print(f"  Index: {result['index_build']['docs_per_second']:,.0f} Docs/s | "
+          f"Kaltstart: {result['cold_start']['process_seconds']:.2f} s | "
+          f"Warm: {warm['throughput_qps']:.1f} req/s | Blocking-Rate: {warm['blocking_rate'] * 100:.1f}%")
+    print(f"  {'Stufe':<15} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'p99 (ms)':>9}")
+    for stage, stats in [("gesamt", warm["latency_ms"])] + list(warm["stages_ms"].items()):
+        if stats:
+            print(f"  {stage:<15} | {stats['p50']:>9.2f} | {stats['p95']:>9.2f} | {stats['p99']:>9.2f}")
+    for level in result["concurrent_load"]:
+        print(f"  Last {level['users']:>3} Benutzer: {level['throughput_qps']:>7.1f} req/s | p95 {level['latency_ms']['p95']:.1f} ms")
+    print(f"  Speicher: Python-Peak {warm['py_alloc_peak_mb']} MB | RSS-Peak {warm['rss_peak_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
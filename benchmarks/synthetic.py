@@ -0,0 +1,87 @@
+"""
+Synthetische Korpora und Anfrage-Workloads für die Benchmark-Suite.
+
+Alle Daten werden aus einem festen Seed erzeugt und sind damit zwischen
+Commits reproduzierbar. Die Dokumente haben dasselbe Format wie
+`data/docs/documents.json` (id, content, metadata.classification).
+"""
+import random
+from typing import List, Dict, Any
+
+# Standard-Verteilung der Klassifizierungen (Anteile, Summe = 1)
+DEFAULT_MIX = {"public": 0.4, "internal": 0.3, "confidential": 0.2, "secret": 0.1}
+
+ROLES = ["Mitarbeiter", "Vorgesetzter", "Geschaeftsfuehrung"]
+
+# Themen mit typischem Vokabular (Deutsch, wie die echte Wissensbasis)
+TOPICS = {
+    "Urlaub": ["Urlaubsantrag", "Resturlaub", "Sonderurlaub", "Arbeitstage", "Genehmigung", "Kalenderjahr"],
+    "Reisekosten": ["Reisekostenabrechnung", "Hotel", "Bahnfahrt", "Spesen", "Belege", "Pauschale"],
+    "IT-Sicherheit": ["Passwort", "VPN", "Phishing", "Laptop", "Verschlüsselung", "Zugangsdaten"],
+    "Finanzen": ["Quartalszahlen", "Umsatz", "Budget", "Investition", "Liquidität", "Prognose"],
+    "Strategie": ["Übernahme", "Expansion", "Standort", "Restrukturierung", "Vorstand", "Markt"],
+    "Personal": ["Gehaltsband", "Beförderung", "Einstellung", "Kündigung", "Sozialplan", "Bonus"],
+    "Produktion": ["Werk", "Maschinenpark", "Schicht", "Auslastung", "Qualität", "Lieferkette"],
+    "Kantine": ["Speiseplan", "Öffnungszeiten", "Essenszuschuss", "Vegetarisch", "Cafeteria", "Menü"],
+}
+FILLER = [
+    "gemäß", "Richtlinie", "Abteilung", "Mitarbeiter", "Regelung", "Verfahren", "gilt", "ab",
+    "sofort", "für", "alle", "Standorte", "und", "wird", "durch", "die", "Leitung", "geprüft",
+]
+
+
+def _parse_mix(mix: Dict[str, float]) -> tuple:
+    classes = list(mix)
+    weights = [mix[c] for c in classes]
+    if any(w < 0 for w in weights) or sum(weights) <= 0:
+        raise ValueError(f"Ungültige Klassifizierungs-Verteilung: {mix}")
+    return classes, weights
+
+
+def generate_corpus(size: int, mix: Dict[str, float] = DEFAULT_MIX, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Erzeugt `size` Dokumente mit der angegebenen Verteilung der Klassifizierungen.
+
+    Args:
+        size (int): Anzahl Dokumente.
+        mix (Dict[str, float]): Anteile je Klassifizierung (werden normiert).
+        seed (int): Seed des Zufallsgenerators.
+
+    Returns:
+        List[Dict[str, Any]]: Dokumente im Format von `documents.json`.
+    """
+    rng = random.Random(seed)
+    classes, weights = _parse_mix(mix)
+    topics = list(TOPICS)
+    documents = []
+    for i in range(size):
+        topic = rng.choice(topics)
+        words = rng.sample(TOPICS[topic], 3) + rng.choices(FILLER, k=rng.randint(20, 60))
+        rng.shuffle(words)
+        documents.append({
+            "id": f"syn_{i:06d}",
+            "content": f"{topic}: " + " ".join(words) + ".",
+            "metadata": {
+                "source": f"Synthetisch/{topic}",
+                "classification": rng.choices(classes, weights)[0]
+            }
+        })
+    return documents
+
+
+def generate_workload(queries_per_role: int, roles: List[str] = ROLES, seed: int = 7) -> List[Dict[str, str]]:
+    """
+    Erzeugt eine gemischte Anfrage-Folge mit `queries_per_role` Fragen je Rolle.
+
+    Returns:
+        List[Dict[str, str]]: Einträge mit 'role' und 'query' (Rollen abwechselnd).
+    """
+    rng = random.Random(seed)
+    topics = list(TOPICS)
+    workload = []
+    for i in range(queries_per_role):
+        for role in roles:
+            topic = rng.choice(topics)
+            first, second = rng.sample(TOPICS[topic], 2)
+            workload.append({"role": role, "query": f"Was gilt beim Thema {topic} für {first} und {second}? (#{i})"})
+    return workload
@@ -1,32 +1,240 @@
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import chromadb
-from openai import OpenAI
 import dotenv
 
+from app.rag.embedding_cache import EmbeddingCache
+from app.rag.manifest import load_manifest, save_manifest, document_entry
+from app.rag.lexical import BM25Index, LEXICAL_INDEX_PATH
+from app.rag.vector_store import FlatVectorStore, partition_names, sync_partitions, VECTOR_STORE, FLAT_INDEX_PATH
+from app.rag.chunking import chunk_documents, chunking_signature, parse_chunk_id
+from app.rag.providers import create_embedding_provider
+
 # 1. Konfiguration laden
 dotenv.load_dotenv()
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CHROMA_PATH = os.getenv("CHROMA_PATH", "./data/chromadb")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 COLLECTION_NAME = "company_kb"
 
-# Clients initialisieren
-client_openai = OpenAI(api_key=OPENAI_API_KEY)
+# Parameter der Batch-Indexierung
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))      # Texte pro Embedding-Request
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))     # Parallele Embedding-Requests
+CHROMA_WRITE_BATCH = int(os.getenv("CHROMA_WRITE_BATCH", "512"))  # Dokumente pro Chroma-Upsert
+
+# 'incremental': nur neue/geänderte Dokumente verarbeiten, Collection bleibt durchgehend abfragbar.
+# 'full': Collection löschen und vollständig neu aufbauen.
+INDEX_MODE = os.getenv("INDEX_MODE", "incremental")
+
+# Clients initialisieren (Embedding-Anbieter: OpenAI oder lokal, siehe EMBEDDING_PROVIDER)
+embedding_provider = create_embedding_provider(EMBEDDING_MODEL)
 client_chroma = chromadb.PersistentClient(path=CHROMA_PATH)
+# Lokaler Embedding-Cache: unveränderte Dokumente werden beim Neuaufbau nicht erneut vektorisiert
+embedding_cache = EmbeddingCache()
+
+def embed_remote(texts):
+    """Erzeugt Vektoren für mehrere (normalisierte) Texte mittels des Embedding-Anbieters."""
+    return embedding_provider.embed(texts)
 
 def get_embedding(text):
-    """Erzeugt einen Vektor für einen gegebenen Text mittels OpenAI API."""
-    text = text.replace("\n", " ") # Zeilenumbrüche entfernen für bessere Vektoren
-    response = client_openai.embeddings.create(
-        input=[text],
-        model=EMBEDDING_MODEL
+    """Erzeugt einen Vektor für einen gegebenen Text (aus dem Cache oder mittels Embedding-Anbieter)."""
+    # Der Cache entfernt u. a. Zeilenumbrüche für bessere Vektoren
+    return embedding_cache.get_or_compute(embedding_provider.model, [text], embed_remote)[0]
+
+def iter_batches(items, size):
+    """Zerlegt eine Liste in aufeinanderfolgende Teillisten der Länge `size`."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def embed_batch(batch):
+    """Vektorisiert einen Batch von Dokumenten mit einem einzigen API-Aufruf (Cache-Treffer entfallen)."""
+    return embedding_cache.get_or_compute(embedding_provider.model, [doc["content"] for doc in batch], embed_remote)
+
+def index_documents(
+    collection,
+    documents,
+    batch_size=EMBED_BATCH_SIZE,
+    concurrency=EMBED_CONCURRENCY,
+    write_batch_size=CHROMA_WRITE_BATCH
+):
+    """
+    Vektorisiert Dokumente (bzw. Chunks, siehe app/rag/chunking.py) in Batches und
+    schreibt sie gebündelt in ChromaDB.
+
+    Bis zu `concurrency` Embedding-Requests laufen parallel; fertige Batches werden
+    gesammelt und in Blöcken von `write_batch_size` per `upsert` gespeichert.
+    Fortschritt und Durchsatz (Dokumente/s) werden laufend ausgegeben.
+
+    Returns:
+        dict: Anzahl indexierter Dokumente, Dauer in Sekunden und Durchsatz.
+    """
+    total = len(documents)
+    write_batch_size = min(write_batch_size, client_chroma.get_max_batch_size())
+    pending_write = {"ids": [], "documents": [], "embeddings": [], "metadatas": []}
+    done = 0
+    start_time = time.perf_counter()
+
+    def flush():
+        if not pending_write["ids"]:
+            return
+        collection.upsert(**pending_write)
+        for values in pending_write.values():
+            values.clear()
+
+    batches = iter(iter_batches(documents, batch_size))
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        # Begrenzte Anzahl gleichzeitig laufender Batches (Backpressure für den Speicher)
+        for batch in batches:
+            in_flight[executor.submit(embed_batch, batch)] = batch
+            if len(in_flight) >= concurrency * 2:
+                break
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                batch = in_flight.pop(future)
+                vectors = future.result()
+
+                for doc, vector in zip(batch, vectors):
+                    pending_write["ids"].append(doc["id"])          # Eindeutige ID
+                    pending_write["documents"].append(doc["content"])  # Der Text
+                    pending_write["embeddings"].append(vector)      # Der Vektor
+                    pending_write["metadatas"].append(doc["metadata"])  # Die Metadaten (für RBAC wichtig!)
+                if len(pending_write["ids"]) >= write_batch_size:
+                    flush()
+
+                done += len(batch)
+                elapsed = time.perf_counter() - start_time
+                print(f"  [{done}/{total}] {done / total * 100:5.1f}% | {done / elapsed:8.1f} Docs/s")
+
+                next_batch = next(batches, None)
+                if next_batch is not None:
+                    in_flight[executor.submit(embed_batch, next_batch)] = next_batch
+        flush()
+
+    duration = time.perf_counter() - start_time
+    throughput = total / duration if duration > 0 else 0.0
+    print(f"Durchsatz: {throughput:.1f} Docs/s ({total} Dokumente in {duration:.2f}s)")
+    return {"documents": total, "seconds": duration, "docs_per_second": throughput}
+
+def delete_stale_chunks(collection, parent_ids, keep_ids=()):
+    """
+    Löscht alle Chunks der angegebenen Dokumente, die nicht in `keep_ids` enthalten sind
+    (z. B. weil ein geändertes Dokument nun in weniger Chunks zerfällt).
+
+    Returns:
+        int: Anzahl gelöschter Einträge.
+    """
+    keep_ids = set(keep_ids)
+    write_batch_size = min(CHROMA_WRITE_BATCH, client_chroma.get_max_batch_size())
+    deleted = 0
+    for batch in iter_batches(sorted(parent_ids), write_batch_size):
+        existing = collection.get(where={"parent_id": {"$in": batch}}, include=[])["ids"]
+        # Einträge ohne 'parent_id' (Index vor Einführung des Chunkings) tragen die Dokument-ID
+        existing += collection.get(ids=batch, include=[])["ids"]
+        stale = sorted(set(existing) - keep_ids)
+        for stale_batch in iter_batches(stale, write_batch_size):
+            collection.delete(ids=stale_batch)
+        deleted += len(stale)
+    return deleted
+
+def sync_index(collection, documents, manifest):
+    """
+    Gleicht die Collection inkrementell mit `documents.json` ab.
+
+    - Neue oder inhaltlich geänderte Dokumente werden in Chunks zerlegt, vektorisiert und
+      per upsert gespeichert; nicht mehr benötigte Chunks werden anschließend gelöscht.
+    - Reine Metadaten-Änderungen (z. B. Umklassifizierung 'internal' -> 'confidential')
+      werden ohne Embedding-Aufruf per update auf alle Chunks übertragen.
+    - Entfernte Dokumente werden samt ihrer Chunks gelöscht.
+
+    Die Collection wird dabei nie gelöscht und bleibt während des Abgleichs abfragbar.
+    """
+    previous = manifest["documents"]
+    current = {doc["id"]: document_entry(doc) for doc in documents}
+
+    if previous:
+        known_ids = set(previous)
+    else:
+        # Ohne Manifest (z. B. Index vor Einführung der inkrementellen Indexierung)
+        # wird der Bestand der Collection als Referenz für Löschungen genutzt.
+        known_ids = {parse_chunk_id(doc_id)[0] for doc_id in collection.get(include=[])["ids"]}
+
+    changed_docs = []
+    metadata_only_docs = []
+    for doc in documents:
+        old_entry = previous.get(doc["id"])
+        new_entry = current[doc["id"]]
+        if old_entry is None or old_entry["content_hash"] != new_entry["content_hash"]:
+            changed_docs.append(doc)
+        elif old_entry["metadata_hash"] != new_entry["metadata_hash"]:
+            metadata_only_docs.append(doc)
+    removed_ids = sorted(known_ids - set(current))
+
+    print(
+        f"Abgleich: {len(changed_docs)} neu/geändert | {len(metadata_only_docs)} nur Metadaten | "
+        f"{len(removed_ids)} entfernt | {len(documents) - len(changed_docs) - len(metadata_only_docs)} unverändert"
     )
-    return response.data[0].embedding
 
-def build_index():
-    print(f"--- Starte Indexierung ---")
+    # Reihenfolge: erst hinzufügen/aktualisieren, dann löschen, damit Anfragen
+    # während des Abgleichs stets Ergebnisse liefern.
+    if changed_docs:
+        changed_chunks = chunk_documents(changed_docs)
+        index_documents(collection, changed_chunks)
+        stale = delete_stale_chunks(
+            collection, [doc["id"] for doc in changed_docs], [chunk["id"] for chunk in changed_chunks]
+        )
+        if stale:
+            print(f"  {stale} veraltete Chunks entfernt.")
+
+    write_batch_size = min(CHROMA_WRITE_BATCH, client_chroma.get_max_batch_size())
+    for batch in iter_batches(chunk_documents(metadata_only_docs), write_batch_size):
+        collection.update(
+            ids=[chunk["id"] for chunk in batch],
+            metadatas=[chunk["metadata"] for chunk in batch]
+        )
+    for doc in metadata_only_docs:
+        print(f"  Metadaten aktualisiert: {doc['id']} ({doc['metadata'].get('classification')})")
+
+    if removed_ids:
+        delete_stale_chunks(collection, removed_ids)
+        print(f"  {len(removed_ids)} Dokumente entfernt.")
+
+    return current
+
+def stored_dimension(name=COLLECTION_NAME):
+    """Dimension der gespeicherten Vektoren (None, falls die Collection fehlt oder leer ist)."""
+    try:
+        sample = client_chroma.get_collection(name=name).get(limit=1, include=["embeddings"])
+    except Exception:
+        return None
+    if sample["embeddings"] is None or not len(sample["embeddings"]):
+        return None
+    return len(sample["embeddings"][0])
+
+def build_index(mode=INDEX_MODE):
+    manifest = load_manifest()
+    if mode == "incremental" and not manifest["documents"]:
+        # Ohne Manifest ist das Modell des Bestands unbekannt; eine andere Vektordimension
+        # (z. B. durch EMBEDDING_DIMENSIONS) würde ChromaDB beim upsert ablehnen.
+        dimension = stored_dimension()
+        if dimension is not None and dimension != len(get_embedding("Dimension")):
+            print(f"ℹ️ Vektordimension des Bestands ({dimension}) passt nicht zu {embedding_provider.model}, baue Index vollständig neu auf.")
+            mode = "full"
+    if mode == "incremental" and manifest["documents"] and manifest.get("embedding_model") != embedding_provider.model:
+        # Vektoren verschiedener Modelle sind nicht vergleichbar -> vollständiger Neuaufbau
+        # (unveränderte Texte kommen dabei aus dem Embedding-Cache, sofern vorhanden)
+        print(f"ℹ️ Embedding-Modell geändert ({manifest.get('embedding_model')} -> {embedding_provider.model}), baue Index vollständig neu auf.")
+        mode = "full"
+    if mode == "incremental" and manifest["documents"] and manifest.get("chunking") != chunking_signature():
+        # Chunk-Grenzen und -IDs hängen von der Konfiguration ab -> vollständiger Neuaufbau
+        print(f"ℹ️ Chunking geändert ({manifest.get('chunking')} -> {chunking_signature()}), baue Index vollständig neu auf.")
+        mode = "full"
+
+    print(f"--- Starte Indexierung (Modus: {mode}) ---")
     
     # 2. Daten laden
     doc_path = os.path.join("data", "docs", "documents.json")
@@ -34,34 +242,59 @@ def build_index():
         documents = json.load(f)
     
     print(f"Lade {len(documents)} Dokumente aus {doc_path}...")
+    print(
+        f"Batch-Größe: {EMBED_BATCH_SIZE} | Parallele Requests: {EMBED_CONCURRENCY} | "
+        f"Chroma-Schreibblock: {CHROMA_WRITE_BATCH} | Chunking: {chunking_signature()}"
+    )
 
-    # 3. Chroma Collection erstellen (löschen falls existent, um sauber neu zu bauen)
-    try:
-        client_chroma.delete_collection(name=COLLECTION_NAME)
-        print(f"Alte Collection '{COLLECTION_NAME}' gelöscht.")
-    except Exception:
-        pass # Collection existierte noch nicht
-    
-    collection = client_chroma.create_collection(name=COLLECTION_NAME)
+    if mode == "full":
+        # 3. Chroma Collection erstellen (löschen falls existent, um sauber neu zu bauen)
+        try:
+            client_chroma.delete_collection(name=COLLECTION_NAME)
+            print(f"Alte Collection '{COLLECTION_NAME}' gelöscht.")
+        except Exception:
+            pass # Collection existierte noch nicht
 
-    # 4. Embeddings erzeugen und speichern
-    for doc in documents:
-        content = doc["content"]
-        meta = doc["metadata"]
-        doc_id = doc["id"]
-
-        print(f"Verarbeite: {doc_id} ({meta['classification']})...")
-        
-        # Vektor holen
-        vector = get_embedding(content)
-
-        # In DB speichern
-        collection.add(
-            documents=[content],       # Der Text
-            embeddings=[vector],       # Der Vektor
-            metadatas=[meta],          # Die Metadaten (für RBAC wichtig!)
-            ids=[doc_id]               # Eindeutige ID
+        collection = client_chroma.create_collection(name=COLLECTION_NAME)
+
+        # 4. Embeddings in Batches erzeugen und gebündelt speichern
+        chunks = chunk_documents(documents)
+        print(f"{len(chunks)} Chunks aus {len(documents)} Dokumenten.")
+        index_documents(collection, chunks)
+        manifest_documents = {doc["id"]: document_entry(doc) for doc in documents}
+    elif mode == "incremental":
+        # 3./4. Bestehende Collection weiterverwenden und nur Änderungen übernehmen
+        collection = client_chroma.get_or_create_collection(name=COLLECTION_NAME)
+        manifest_documents = sync_index(collection, documents, manifest)
+    else:
+        raise ValueError(f"Unbekannter INDEX_MODE: '{mode}'. Erlaubt: 'incremental', 'full'")
+
+    version = save_manifest(manifest_documents, embedding_model=embedding_provider.model, chunking=chunking_signature())
+    print(f"Index-Version: {version}")
+
+    # Lexikalischer BM25-Index für die hybride Suche (gleiche Version wie der Vektorindex)
+    if LEXICAL_INDEX_PATH:
+        # Gleiche Einheiten wie im Vektorindex, damit die Treffer fusioniert werden können
+        BM25Index.build(chunk_documents(documents), version).save(LEXICAL_INDEX_PATH)
+        print(f"BM25-Index gespeichert in {LEXICAL_INDEX_PATH}")
+
+    # Flat-Index (Export der Collection) für das Vektor-Backend 'flat'
+    if VECTOR_STORE == "flat" and FLAT_INDEX_PATH:
+        flat_index = FlatVectorStore.from_collection(collection, version)
+        flat_index.save(FLAT_INDEX_PATH)
+        print(
+            f"Flat-Index gespeichert in {FLAT_INDEX_PATH} ({len(flat_index)} Vektoren | "
+            f"Quantisierung: {flat_index.quantization} | Suchmatrix: {flat_index.index_nbytes / 1024 ** 2:.1f} MB)"
+        )
+
+    # Partitionen je Klassifizierung für das Vektor-Backend 'partitioned'. Bestehende Partitionen
+    # werden immer abgeglichen, damit sie keine veralteten Klassifizierungen behalten.
+    if VECTOR_STORE == "partitioned" or partition_names(client_chroma, COLLECTION_NAME):
+        counts = sync_partitions(
+            client_chroma, collection, COLLECTION_NAME, rebuild=(mode == "full"),
+            write_batch_size=CHROMA_WRITE_BATCH, version=version
         )
+        print("Partitionen aktualisiert: " + ", ".join(f"{c} ({n})" for c, n in counts.items()))
     
     print(f"✅ Indexierung abgeschlossen. Datenbank gespeichert in {CHROMA_PATH}")
 
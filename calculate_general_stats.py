@@ -1,8 +1,10 @@
 import json
 import os
-import glob
 import csv
 
+from app.logging.reader import iter_records
+from app.logging.rotation import find_log_files
+
 # --- KONFIGURATION ---
 DOCS_FILE = "data/docs/documents.json"
 LOG_DIR = "raw_logs"
@@ -86,23 +88,17 @@ def analyze_logs():
         "fallback_count": 0
     }
 
-    files = glob.glob(os.path.join(LOG_DIR, "*.jsonl")) + glob.glob(os.path.join(LOG_DIR, "*.json"))
+    files = find_log_files(LOG_DIR)  # inkl. rotierter, komprimierter Segmente
     stats["files_count"] = len(files)
 
-    for filepath in files:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                if not line.strip(): continue
-                try:
-                    entry = json.loads(line)
-                    stats["total_queries"] += 1
-                    
-                    response = entry.get('response_preview', entry.get('response_content', "")).lower()
-                    for phrase in FALLBACK_PHRASES:
-                        if phrase in response:
-                            stats["fallback_count"] += 1
-                            break
-                except: continue
+    for record in iter_records(files):
+        stats["total_queries"] += 1
+
+        response = record.response_preview.lower()
+        for phrase in FALLBACK_PHRASES:
+            if phrase in response:
+                stats["fallback_count"] += 1
+                break
     return stats
 
 def print_report(total_docs, doc_counts, access_stats, log_stats):
@@ -1,8 +1,8 @@
-import json
 import csv
 import os
-import glob
-from datetime import datetime
+
+from app.logging.reader import iter_records
+from app.logging.rotation import find_log_files
 
 # --- KONFIGURATION ---
 LOG_DIR = "raw_logs"
@@ -27,7 +27,7 @@ def export_logs():
         return
 
     # Alle Log-Dateien finden
-    files = glob.glob(os.path.join(LOG_DIR, "*.jsonl")) + glob.glob(os.path.join(LOG_DIR, "*.json"))
+    files = find_log_files(LOG_DIR)  # inkl. rotierter, komprimierter Segmente
     
     print(f"📂 Lese {len(files)} Log-Dateien aus '{LOG_DIR}'...")
     
@@ -51,59 +51,23 @@ def export_logs():
         
         row_count = 0
         
-        # 2. Dateien durchgehen
-        for filepath in files:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if not line.strip(): continue
-                    
-                    try:
-                        data = json.loads(line)
-                        
-                        # --- DATEN EXTRAHIEREN ---
-                        
-                        # Basisdaten
-                        timestamp = data.get('timestamp', '')[:19] # Kürzen auf YYYY-MM-DD HH:MM:SS
-                        role = data.get('role', 'Unknown')
-                        query = clean_text(data.get('query', ''))
-                        
-                        # Antwort bereinigen (Wichtig für CSV!)
-                        # Versuche response_preview, fallback auf response_content
-                        raw_response = data.get('response_preview', data.get('response_content', ''))
-                        response = clean_text(raw_response)
-                        
-                        # Metriken (Nested Dictionary handling)
-                        metrics = data.get('metrics', {})
-                        allowed_count = metrics.get('allowed_docs_count', 0)
-                        blocked_count = metrics.get('blocked_docs_count', 0)
-                        latency = metrics.get('latency_seconds', 0.0)
-                        
-                        # Doc-IDs (Liste in String umwandeln: "doc_01, doc_02")
-                        doc_ids_list = data.get('allowed_doc_ids', [])
-                        if not doc_ids_list and 'allowed_docs' in data:
-                             # Fallback für alte Logs
-                             doc_ids_list = [d.get('id') for d in data['allowed_docs'] if 'id' in d]
-                        
-                        doc_ids_str = ", ".join(doc_ids_list)
-                        
-                        # --- ZEILE SCHREIBEN ---
-                        row = [
-                            timestamp,
-                            role,
-                            query,
-                            response,
-                            allowed_count,
-                            blocked_count,
-                            str(latency).replace('.', ','), # Excel mag Komma statt Punkt bei Zahlen
-                            doc_ids_str
-                        ]
-                        
-                        writer.writerow(row)
-                        row_count += 1
-                        
-                    except json.JSONDecodeError:
-                        continue
-                        
+        # 2. Einträge streamen (Datei für Datei, Zeile für Zeile)
+        for record in iter_records(files):
+            # --- ZEILE SCHREIBEN ---
+            row = [
+                record.timestamp[:19], # Kürzen auf YYYY-MM-DD HH:MM:SS
+                record.role,
+                clean_text(record.query),
+                clean_text(record.response_preview),
+                record.allowed_docs_count,
+                record.blocked_docs_count,
+                str(record.latency_seconds).replace('.', ','), # Excel mag Komma statt Punkt bei Zahlen
+                ", ".join(record.allowed_doc_ids) # Liste in String umwandeln: "doc_01, doc_02"
+            ]
+
+            writer.writerow(row)
+            row_count += 1
+
     print(f"✅ Export erfolgreich!")
     print(f"📄 Datei erstellt: {OUTPUT_FILE}")
     print(f"📊 Anzahl Datensätze: {row_count}")
@@ -17,6 +17,7 @@ except ImportError:
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.rag.pipeline import RbacRagPipeline
+from app.logging.rotation import load_segment_index
 
 # --- KONFIGURATION DER BENUTZEROBERFLÄCHE ---
 st.set_page_config(
@@ -38,8 +39,12 @@ def get_pipeline():
     """
     Initialisiert die RAG-Pipeline einmalig und hält sie im Speicher (Cache).
     Dies verhindert das zeitaufwendige Neuladen der Vektordatenbank bei jeder Interaktion.
+    Clients, Policy und HNSW-Index werden vorab geladen, damit die erste Frage nicht
+    die Startkosten trägt.
     """
-    return RbacRagPipeline()
+    pipeline = RbacRagPipeline()
+    pipeline.warmup()
+    return pipeline
 
 try:
     pipeline = get_pipeline()
@@ -78,16 +83,20 @@ with st.sidebar:
     log_file_path = os.getenv("LOG_FILE", "audit_log.jsonl")
     
     if os.path.exists(log_file_path):
-        with open(log_file_path, "r", encoding="utf-8") as f:
-            file_content = f.read()
-        
-        st.download_button(
-            label="📥 Audit-Log exportieren",
-            data=file_content,
-            file_name="audit_log.jsonl",
-            mime="application/json",
-            help="Lädt die gesammelten Interaktionsdaten für die quantitative Auswertung herunter."
-        )
+        # Exportiert wird das aktive Segment; dessen Größe ist durch die Log-Rotation
+        # begrenzt (AUDIT_ROTATE_BYTES). Ältere Segmente liegen komprimiert daneben.
+        with open(log_file_path, "rb") as f:
+            st.download_button(
+                label="📥 Audit-Log exportieren",
+                data=f,
+                file_name="audit_log.jsonl",
+                mime="application/json",
+                help="Lädt die gesammelten Interaktionsdaten für die quantitative Auswertung herunter."
+            )
+
+        segments = load_segment_index(log_file_path)["segments"]
+        if segments:
+            st.caption(f"{len(segments)} ältere Log-Segmente (komprimiert) seit {segments[0]['start'][:10]}.")
     else:
         st.caption("Keine Protokolldaten verfügbar.")
 
@@ -146,42 +155,50 @@ else:
 
         # Antwort generieren
         with st.chat_message("assistant"):
-            with st.spinner("Analyse der Zugriffsberechtigungen und Generierung..."):
-                try:
-                    # Aufruf der Pipeline-Logik
-                    result = pipeline.ask(
-                        user_role=st.session_state["role"], 
+            try:
+                # Aufruf der Pipeline-Logik im Streaming-Modus: Die Antwort wird
+                # Token für Token angezeigt, das letzte Ereignis enthält die Metadaten.
+                result = {}
+
+                def token_stream():
+                    for event in pipeline.ask_stream(
+                        user_role=st.session_state["role"],
                         query=prompt
-                    )
-                    
-                    response_text = result["answer"]
-                    
-                    # Aufbereitung der Debug-Informationen für die Transparenz
-                    # Dies hilft bei der qualitativen Analyse des Tests
-                    blocked = result['blocked_count']
-                    allowed = len(result['allowed_docs'])
-                    total = blocked + allowed
-                    
-                    debug_info = (
-                        f"Latenz: {result.get('latency', 0):.2f}s\n"
-                        f"Dokumente (Retrieval): {total}\n"
-                        f"Zugriff erlaubt: {allowed}\n"
-                        f"Durch RBAC gefiltert: {blocked}"
-                    )
-
-                    st.markdown(response_text)
-                    
-                    with st.expander("System-Interna"):
-                        st.text(debug_info)
-                        if blocked > 0:
-                            st.warning(f"Hinweis: {blocked} Dokumente wurden aufgrund fehlender Berechtigungen ausgeblendet.")
-
-                    # Antwort zur Historie hinzufügen
-                    st.session_state["messages"].append({
-                        "role": "assistant", 
-                        "content": response_text,
-                        "debug_info": debug_info
-                    })
-                    
-                except Exception as e:
-                    st.error(f"Fehler bei der Verarbeitung: {e}")
\ No newline at end of file
+                    ):
+                        if isinstance(event, dict):
+                            result.update(event)
+                        else:
+                            yield event
+
+                response_text = st.write_stream(token_stream())
+
+                # Aufbereitung der Debug-Informationen für die Transparenz
+                # Dies hilft bei der qualitativen Analyse des Tests
+                blocked = result['blocked_count']
+                allowed = len(result['allowed_docs'])
+                total = blocked + allowed
+                ttft = result.get('ttft')
+                ttft_text = f"{ttft:.2f}s" if ttft is not None else "-"
+
+                debug_info = (
+                    f"Latenz: {result.get('latency', 0):.2f}s\n"
+                    f"Zeit bis erstes Token: {ttft_text}\n"
+                    f"Dokumente (Retrieval): {total}\n"
+                    f"Zugriff erlaubt: {allowed}\n"
+                    f"Durch RBAC gefiltert: {blocked}"
+                )
+
+                with st.expander("System-Interna"):
+                    st.text(debug_info)
+                    if blocked > 0:
+                        st.warning(f"Hinweis: {blocked} Dokumente wurden aufgrund fehlender Berechtigungen ausgeblendet.")
+
+                # Antwort zur Historie hinzufügen
+                st.session_state["messages"].append({
+                    "role": "assistant", 
+                    "content": response_text,
+                    "debug_info": debug_info
+                })
+                
+            except Exception as e:
+                st.error(f"Fehler bei der Verarbeitung: {e}")
\ No newline at end of file
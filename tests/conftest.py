@@ -0,0 +1,30 @@
+"""
+Gemeinsame Testkonfiguration: Die Tests laufen vollständig offline.
+
+Die Umgebungsvariablen werden gesetzt, bevor ein Modul aus `app` importiert wird
+(die Module lesen ihre Konfiguration beim Import). Lokale Anbieter ersetzen
+OpenAI, Caches, Audit-Log und Index-Dateien liegen in einem temporären Ordner,
+damit kein Test Dateien unter data/ oder im Projekt-Root verändert.
+"""
+import os
+import tempfile
+
+_TEST_DIR = tempfile.mkdtemp(prefix="rag_tests_")
+
+os.environ.update({
+    "EMBEDDING_PROVIDER": "local",
+    "CHAT_PROVIDER": "local",
+    "LOCAL_EMBEDDING_DIM": "256",
+    "EMBEDDING_DIMENSIONS": "0",
+    "EMBEDDING_CACHE_PATH": "",
+    "ANSWER_CACHE_ENABLED": "false",
+    "LEXICAL_INDEX_PATH": "",
+    "FLAT_INDEX_PATH": "",
+    "VECTOR_STORE": "chroma",
+    "CHROMA_PATH": os.path.join(_TEST_DIR, "chromadb"),
+    "INDEX_MANIFEST_PATH": os.path.join(_TEST_DIR, "index_manifest.json"),
+    "LOG_FILE": os.path.join(_TEST_DIR, "audit_log.jsonl"),
+    "RBAC_POLICY_POLL_SECONDS": "0",
+    # Token-Zählung per Näherung: gleiche Chunk-Grenzen mit und ohne tiktoken
+    "TOKEN_COUNTER": "approx",
+})
@@ -0,0 +1,114 @@
+"""
+Tests des rollen- und policy-bewussten Antwort-Caches.
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.rag import answer_cache
+from app.rag.answer_cache import AnswerCache
+
+QUERY = "Wie viele Urlaubstage habe ich?"
+VECTOR = [1.0, 0.0, 0.0]
+BASE = dict(user_role="Mitarbeiter", allowed_doc_ids=["doc_1", "doc_2"], index_version="idx-1", policy_version="pol-1")
+
+
+def context(**changes):
+    return AnswerCache.context_key(**{**BASE, **changes})
+
+
+def rotated(degrees):
+    """Einheitsvektor mit dem gegebenen Winkel zu VECTOR (Kosinus = cos(Winkel))."""
+    angle = np.radians(degrees)
+    return [float(np.cos(angle)), float(np.sin(angle)), 0.0]
+
+
+@pytest.fixture
+def cache():
+    cache = AnswerCache(max_entries=10, ttl_seconds=0, similarity_threshold=0.95)
+    cache.store(context(), QUERY, VECTOR, "Antwort", {"total_tokens": 42})
+    return cache
+
+
+def test_exact_hit_in_same_context(cache):
+    hit = cache.lookup(context(), "  Wie viele\nUrlaubstage   habe ich? ", None)
+    assert hit == {"answer": "Antwort", "token_usage": {"total_tokens": 42}, "match": "exact", "similarity": 1.0}
+    # Reihenfolge der Dokument-IDs spielt keine Rolle
+    assert cache.lookup(context(allowed_doc_ids=["doc_2", "doc_1"]), QUERY, VECTOR)["match"] == "exact"
+    # Groß-/Kleinschreibung wird nicht normalisiert; ohne Embedding kein Treffer
+    assert cache.lookup(context(), QUERY.lower(), None) is None
+
+
+@pytest.mark.parametrize("changes", [
+    {"user_role": "Vorgesetzter"},
+    {"allowed_doc_ids": ["doc_1"]},
+    {"allowed_doc_ids": ["doc_1", "doc_2", "doc_3"]},
+    {"policy_version": "pol-2"},
+    {"index_version": "idx-2"},
+    {"index_version": None},
+])
+def test_changed_context_misses(cache, changes):
+    assert cache.lookup(context(**changes), QUERY, VECTOR) is None
+    assert cache.stats()["misses"] == 1
+    # Der ursprüngliche Kontext trifft weiterhin
+    assert cache.lookup(context(), QUERY, VECTOR)["match"] == "exact"
+
+
+def test_similarity_threshold(cache):
+    close = cache.lookup(context(), "Wie viele freie Tage habe ich?", rotated(10))  # cos 10° ≈ 0.985
+    assert close["match"] == "semantic"
+    assert close["similarity"] == pytest.approx(np.cos(np.radians(10)), abs=1e-6)
+
+    assert cache.lookup(context(), "Wie viele freie Tage habe ich?", rotated(25)) is None  # cos 25° ≈ 0.906
+    assert cache.lookup(context(), "Wie viele freie Tage habe ich?", None) is None  # ohne Embedding nur exakt
+
+    # Semantische Treffer gelten nur im selben Kontext
+    assert cache.lookup(context(user_role="Vorgesetzter"), "Wie viele freie Tage habe ich?", rotated(10)) is None
+
+    stats = cache.stats()
+    assert (stats["hits_semantic"], stats["misses"]) == (1, 3)
+
+
+def test_similarity_uses_cosine_not_raw_dot_product():
+    cache = AnswerCache(ttl_seconds=0, similarity_threshold=0.95)
+    cache.store(context(), QUERY, [3.0, 0.0, 0.0], "Antwort")
+    assert cache.lookup(context(), "Andere Frage", [0.5, 0.0, 0.0])["similarity"] == pytest.approx(1.0)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    # Nur die Uhr des Cache-Moduls ersetzen, nicht das globale time-Modul
+    monkeypatch.setattr(answer_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = AnswerCache(ttl_seconds=60, similarity_threshold=0.95)
+    cache.store(context(), QUERY, VECTOR, "Antwort")
+
+    now[0] += 59
+    assert cache.lookup(context(), QUERY, VECTOR)["match"] == "exact"
+    assert cache.lookup(context(), "Wie viele freie Tage habe ich?", rotated(5))["match"] == "semantic"
+
+    now[0] += 2
+    assert cache.lookup(context(), QUERY, VECTOR) is None
+    assert cache.stats()["entries"] == 0
+
+    cache.store(context(), QUERY, VECTOR, "Antwort")
+    now[0] += 61
+    # Auch die Ähnlichkeitssuche verwirft abgelaufene Einträge
+    assert cache.lookup(context(), "Wie viele freie Tage habe ich?", rotated(5)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_and_clear():
+    cache = AnswerCache(max_entries=2, ttl_seconds=0)
+    for n in range(3):
+        cache.store(context(), f"Frage {n}", None, f"Antwort {n}")
+    assert cache.lookup(context(), "Frage 0", None) is None
+    assert cache.lookup(context(), "Frage 2", None)["answer"] == "Antwort 2"
+    assert cache.stats()["evictions"] == 1
+
+    cache.clear("pol-2")
+    assert cache.stats()["entries"] == 0
+    assert cache.lookup(context(), "Frage 2", None) is None
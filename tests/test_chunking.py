@@ -0,0 +1,103 @@
+"""
+Tests der Zerlegung langer Dokumente in Chunks und der Chunk-IDs.
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+import pytest
+
+from app.rag.chunking import chunk_document, chunk_documents, chunk_id, parse_chunk_id
+from app.rag.context import merge_chunks
+from app.rag.tokens import count_tokens
+
+SENTENCES = " ".join(f"Satz Nummer {n} beschreibt den Standort Werk {n} ausführlich." for n in range(40))
+WORDS = " ".join(f"wort{n}" for n in range(300))
+
+
+def document(doc_id, content, classification="confidential"):
+    return {"id": doc_id, "content": content, "metadata": {"classification": classification, "department": "HR"}}
+
+
+@pytest.mark.parametrize("doc_id", ["doc_03", "doc#c3", "doc#c3#c1", "a#cb", "#c", "doc#c", "x#c0"])
+@pytest.mark.parametrize("strategy", ["sentences", "tokens"])
+def test_chunk_ids_round_trip(doc_id, strategy):
+    chunks = chunk_document(document(doc_id, SENTENCES), strategy=strategy, size=40, overlap=8)
+    assert len(chunks) > 1
+    for index, chunk in enumerate(chunks):
+        assert chunk["id"] == chunk_id(doc_id, index)
+        assert parse_chunk_id(chunk["id"]) == (doc_id, index)
+
+
+@pytest.mark.parametrize("doc_id", ["doc_03", "doc#c3", "doc#c3#c1", "a#cb", "#c", "doc#c", "x#c0"])
+def test_unsplit_document_ids_round_trip(doc_id):
+    [chunk] = chunk_document(document(doc_id, "Kurzer Text."), size=40, overlap=8)
+    assert parse_chunk_id(chunk["id"]) == (doc_id, 0)
+    assert chunk["metadata"]["parent_id"] == doc_id
+    if parse_chunk_id(doc_id) == (doc_id, 0):
+        assert chunk["id"] == doc_id  # gewöhnliche IDs bleiben unverändert
+
+
+def test_ids_that_look_like_chunks_do_not_collide():
+    # 'x' zerfällt in Chunks ('x#c0', ...), 'x#c0' ist ein eigenes, kurzes Dokument
+    chunks = chunk_documents([document("x", SENTENCES), document("x#c0", "Kurzer Text.")], size=40, overlap=8)
+    ids = [chunk["id"] for chunk in chunks]
+    assert len(ids) == len(set(ids))
+
+    merged = {doc.doc_id: doc for doc in merge_chunks(ids, [chunk["content"] for chunk in chunks])}
+    assert set(merged) == {"x", "x#c0"}
+    assert merged["x#c0"].content == "Kurzer Text."
+
+
+def test_short_document_is_kept_unchanged():
+    doc = document("doc_01", "Nur ein kurzer Satz.")
+    [chunk] = chunk_document(doc, size=40, overlap=8)
+    assert chunk == {
+        "id": "doc_01",
+        "content": "Nur ein kurzer Satz.",
+        "metadata": {"classification": "confidential", "department": "HR", "parent_id": "doc_01",
+                     "chunk_index": 0, "chunk_count": 1},
+    }
+    assert chunk_document(document("doc_02", SENTENCES), strategy="none")[0]["content"] == SENTENCES
+
+
+@pytest.mark.parametrize("strategy, content", [("sentences", SENTENCES), ("tokens", WORDS), ("sentences", WORDS)])
+def test_chunks_respect_size_and_inherit_metadata(strategy, content):
+    chunks = chunk_document(document("doc_05", content), strategy=strategy, size=40, overlap=8)
+
+    assert len(chunks) > 1
+    for index, chunk in enumerate(chunks):
+        assert count_tokens(chunk["content"]) <= 40
+        assert chunk["content"] and chunk["content"] in content
+        assert chunk["metadata"] == {
+            "classification": "confidential", "department": "HR", "parent_id": "doc_05",
+            "chunk_index": index, "chunk_count": len(chunks),
+        }
+
+
+def test_sentence_chunks_end_at_sentence_boundaries():
+    chunks = chunk_document(document("doc_06", SENTENCES), strategy="sentences", size=40, overlap=8)
+    assert all(chunk["content"].endswith(".") for chunk in chunks)
+
+
+@pytest.mark.parametrize("strategy, content", [("sentences", SENTENCES), ("tokens", WORDS)])
+def test_chunks_overlap_and_cover_the_document(strategy, content):
+    chunks = chunk_document(document("doc_07", content), strategy=strategy, size=40, overlap=8)
+
+    # Jeder Chunk beginnt innerhalb des Vorgängers; zusammengesetzt ergibt sich der Originaltext
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current["content"].split()[0] in previous["content"]
+    [merged] = merge_chunks([chunk["id"] for chunk in chunks], [chunk["content"] for chunk in chunks])
+    assert merged.doc_id == "doc_07"
+    assert merged.content == content
+
+
+def test_chunk_documents_flattens_and_validates():
+    docs = [document("doc_a", "Kurz."), document("doc_b", WORDS)]
+    chunks = chunk_documents(docs, strategy="tokens", size=40, overlap=8)
+    assert chunks[0]["id"] == "doc_a"
+    assert [parse_chunk_id(chunk["id"])[0] for chunk in chunks[1:]] == ["doc_b"] * (len(chunks) - 1)
+
+    with pytest.raises(ValueError):
+        chunk_documents(docs, strategy="absätze")
+    with pytest.raises(ValueError):
+        chunk_documents(docs, size=32, overlap=32)
@@ -0,0 +1,194 @@
+"""
+Tests des spaltenorientierten Audit-Stores (Verdichtung, Partition Pruning, Roh-Nachladen).
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+import gzip
+import json
+import os
+
+import pytest
+
+from app.logging.columnar import (
+    COMPACTED_MANIFEST, UNDATED_PARTITION, compact_segments, compacted_segments,
+    load_audit_frame, read_columnar, store_path
+)
+from app.logging.reader import iter_records
+
+COLUMNS = ["timestamp", "query", "response_preview", "allowed_docs_count", "blocked_docs_count",
+           "latency_seconds", "stage_generation"]
+
+
+def make_entry(timestamp, role, n):
+    return {
+        "timestamp": timestamp,
+        "role": role,
+        "query": f"Frage {n}",
+        "response_preview": f"Antwort {n}",
+        "metrics": {
+            "allowed_docs_count": n % 3,
+            "blocked_docs_count": n % 2,
+            "latency_seconds": n / 10,
+            "stages": {"generation": n / 100},
+        },
+    }
+
+
+SEGMENTS = {
+    "audit_log.20250101T080000.jsonl.gz": [
+        make_entry("2025-01-01T08:00:00", "Mitarbeiter", 1),
+        make_entry("2025-01-01T09:00:00", "Vorgesetzter", 2),
+        make_entry("2025-01-01T10:00:00", "Mitarbeiter", 3),
+    ],
+    "audit_log.20250102T080000.jsonl.gz": [
+        make_entry("2025-01-02T08:00:00", "Geschaeftsfuehrung", 4),
+        make_entry("2025-01-02T09:00:00", "Mitarbeiter", 5),
+        make_entry("kein-Zeitstempel", "Vorgesetzter", 6),
+    ],
+    "audit_log.20250103T080000.jsonl.gz": [
+        make_entry("2025-01-03T08:00:00", "Vorgesetzter", 7),
+    ],
+}
+
+
+def write_segment(log_dir, name, entries):
+    with gzip.open(os.path.join(log_dir, name), "wt", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    for name, entries in SEGMENTS.items():
+        write_segment(str(tmp_path), name, entries)
+    return str(tmp_path)
+
+
+def rows(frame):
+    """Vergleichbare Zeilen (Rolle, Frage, Kennzahlen), unabhängig von der Reihenfolge."""
+    return sorted(
+        (row.role, row.query, row.response_preview, int(row.allowed_docs_count),
+         int(row.blocked_docs_count), round(float(row.latency_seconds), 6))
+        for row in frame.itertuples()
+    )
+
+
+def record_rows(records):
+    return sorted(
+        (r.role, r.query, r.response_preview, r.allowed_docs_count, r.blocked_docs_count,
+         round(r.latency_seconds, 6))
+        for r in records
+    )
+
+
+@pytest.mark.parametrize("fmt", ["npz", "parquet"])
+def test_compacted_store_matches_iter_records(log_dir, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    assert compact_segments(log_dir, fmt=fmt) == len(SEGMENTS)
+
+    frame = read_columnar(log_dir, COLUMNS)
+    records = list(iter_records(log_dir))
+    assert len(frame) == len(records) == sum(len(entries) for entries in SEGMENTS.values())
+    assert rows(frame) == record_rows(records)
+
+    stages = dict(zip(frame["query"], frame["stage_generation"]))
+    assert stages == {r.query: pytest.approx(r.stages["generation"]) for r in records}
+
+
+def test_compaction_is_idempotent(log_dir):
+    assert compact_segments(log_dir, fmt="npz") == len(SEGMENTS)
+    first = rows(read_columnar(log_dir, COLUMNS))
+
+    assert compact_segments(log_dir, fmt="npz") == 0
+    assert rows(read_columnar(log_dir, COLUMNS)) == first
+
+
+def test_manifest_lists_compacted_segments(log_dir):
+    compact_segments(log_dir, fmt="npz")
+
+    with open(os.path.join(store_path(log_dir), COMPACTED_MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["segments"] == compacted_segments(log_dir)
+    assert {name: info["entries"] for name, info in manifest["segments"].items()} == {
+        name: len(entries) for name, entries in SEGMENTS.items()
+    }
+    assert all(info["format"] == "npz" for info in manifest["segments"].values())
+
+
+def test_undated_entries_get_their_own_partition(log_dir):
+    compact_segments(log_dir, fmt="npz")
+
+    assert os.path.isdir(os.path.join(store_path(log_dir), f"date={UNDATED_PARTITION}"))
+    frame = read_columnar(log_dir, COLUMNS)
+    undated = frame[frame["date"].isna()]
+    assert list(undated["query"]) == ["Frage 6"]
+
+
+@pytest.mark.parametrize("date_from, date_to, roles, expected", [
+    ("2025-01-02", None, None, ["Frage 4", "Frage 5", "Frage 7"]),
+    (None, "2025-01-01", None, ["Frage 1", "Frage 2", "Frage 3"]),
+    ("2025-01-02", "2025-01-02", None, ["Frage 4", "Frage 5"]),
+    (None, None, ["Mitarbeiter"], ["Frage 1", "Frage 3", "Frage 5"]),
+    (None, None, ["Vorgesetzter"], ["Frage 2", "Frage 6", "Frage 7"]),
+    ("2025-01-01", "2025-01-03", ["Vorgesetzter"], ["Frage 2", "Frage 7"]),
+    (None, None, [], []),
+])
+def test_filters_prune_partitions(log_dir, date_from, date_to, roles, expected):
+    compact_segments(log_dir, fmt="npz")
+
+    stored = read_columnar(log_dir, COLUMNS, date_from=date_from, date_to=date_to, roles=roles)
+    assert sorted(stored["query"]) == expected
+
+
+@pytest.mark.parametrize("date_from, date_to, roles", [
+    ("2025-01-02", None, None),
+    (None, "2025-01-01", ["Mitarbeiter"]),
+    (None, None, ["Vorgesetzter"]),
+    (None, None, None),
+])
+def test_raw_and_compacted_reads_agree(tmp_path, date_from, date_to, roles):
+    raw_dir, compacted_dir = str(tmp_path / "raw"), str(tmp_path / "compacted")
+    for directory in (raw_dir, compacted_dir):
+        os.makedirs(directory)
+        for name, entries in SEGMENTS.items():
+            write_segment(directory, name, entries)
+    compact_segments(compacted_dir, fmt="npz")
+
+    raw = load_audit_frame(raw_dir, COLUMNS, date_from=date_from, date_to=date_to, roles=roles)
+    stored = load_audit_frame(compacted_dir, COLUMNS, date_from=date_from, date_to=date_to, roles=roles)
+    assert rows(raw) == rows(stored)
+    assert not os.path.exists(store_path(raw_dir))  # Lesen legt keinen Store an
+
+
+def test_role_only_selection_keeps_row_count(log_dir):
+    compact_segments(log_dir, fmt="npz")
+
+    frame = read_columnar(log_dir, ["role"])
+    assert len(frame) == sum(len(entries) for entries in SEGMENTS.values())
+    assert list(frame.columns) == ["date", "role"]
+
+
+def test_pending_raw_files_are_merged(log_dir):
+    compact_segments(log_dir, fmt="npz")
+    # Ein neues, noch nicht verdichtetes Segment und die aktive Datei
+    write_segment(log_dir, "audit_log.20250104T080000.jsonl.gz", [make_entry("2025-01-04T08:00:00", "Mitarbeiter", 8)])
+    with open(os.path.join(log_dir, "audit_log.jsonl"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(make_entry("2025-01-05T08:00:00", "Vorgesetzter", 9)) + "\n")
+        f.write(json.dumps(make_entry("", "Mitarbeiter", 10)) + "\n")
+
+    frame = load_audit_frame(log_dir, COLUMNS)
+    assert rows(frame) == record_rows(iter_records(log_dir))
+    assert "audit_log.20250104T080000.jsonl.gz" not in compacted_segments(log_dir)
+
+    dated = load_audit_frame(log_dir, COLUMNS, date_from="2025-01-03", roles=["Mitarbeiter", "Vorgesetzter"])
+    assert sorted(dated["query"]) == ["Frage 7", "Frage 8", "Frage 9"]
+    assert sorted(load_audit_frame(log_dir, COLUMNS, roles=["Mitarbeiter"])["query"]) == [
+        "Frage 1", "Frage 10", "Frage 3", "Frage 5", "Frage 8"
+    ]
+
+    # compact=True übernimmt nur das neue Segment; die aktive Datei bleibt roh
+    assert rows(load_audit_frame(log_dir, COLUMNS, compact=True)) == rows(frame)
+    assert "audit_log.20250104T080000.jsonl.gz" in compacted_segments(log_dir)
+    assert "audit_log.jsonl" not in compacted_segments(log_dir)
@@ -0,0 +1,120 @@
+"""
+Tests der Kontext-Zusammenstellung unter einem Token-Budget.
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+import pytest
+
+from app.rag.chunking import chunk_document
+from app.rag.context import (
+    CHUNK_GAP_MARKER, CONTEXT_MIN_TRUNCATION_TOKENS, CONTEXT_SEPARATOR, assemble_context, merge_chunks
+)
+from app.rag.tokens import count_tokens
+
+LONG = " ".join(f"Absatz {n} über die Planung von Projekt Omega im Werk {n}." for n in range(30))
+
+
+def chunks_of(doc_id, content, size=40, overlap=8):
+    chunks = chunk_document({"id": doc_id, "content": content, "metadata": {}}, strategy="sentences", size=size, overlap=overlap)
+    return [chunk["id"] for chunk in chunks], [chunk["content"] for chunk in chunks]
+
+
+def context_tokens(documents):
+    return count_tokens(CONTEXT_SEPARATOR.join(document.content for document in documents))
+
+
+def test_merges_chunks_per_document_in_text_order():
+    ids, contents = chunks_of("doc_long", LONG)
+    # Treffer in Relevanz-Reihenfolge, vermischt mit einem anderen Dokument
+    order = [2, 0, 1] + list(range(3, len(ids)))
+    chunk_ids = [ids[i] for i in order] + ["doc_short"]
+    texts = [contents[i] for i in order] + ["Kurzer Text."]
+    scores = [0.9, 0.5, 0.4] + [0.3] * (len(ids) - 3) + [0.7]
+
+    documents = assemble_context(chunk_ids, texts, budget=10_000, scores=scores)
+
+    assert [document.doc_id for document in documents] == ["doc_long", "doc_short"]
+    long_doc = documents[0]
+    assert long_doc.content == LONG  # Überlappungen entfernt
+    assert long_doc.chunk_ids == ids
+    assert long_doc.score == 0.9
+    assert long_doc.tokens == count_tokens(LONG)
+    assert not long_doc.truncated
+
+
+def test_non_adjacent_chunks_are_marked_as_gap():
+    ids, contents = chunks_of("doc_long", LONG)
+    [document] = merge_chunks([ids[3], ids[0]], [contents[3], contents[0]], [0.8, 0.6])
+    assert document.chunk_ids == [ids[0], ids[3]]
+    assert document.content == contents[0] + CHUNK_GAP_MARKER + contents[3]
+
+
+def test_without_scores_the_order_decides():
+    documents = assemble_context(["b", "a", "c"], ["Text B.", "Text A.", "Text C."], budget=1000)
+    assert [document.doc_id for document in documents] == ["b", "a", "c"]
+
+
+@pytest.mark.parametrize("budget", [30, 60, 90, 150, 400])
+def test_context_stays_within_budget(budget):
+    ids, contents = chunks_of("doc_long", LONG)
+    chunk_ids = ids + ["doc_a", "doc_b"]
+    texts = contents + ["Erstes kurzes Dokument über Urlaub.", "Zweites kurzes Dokument über die Kantine."]
+    scores = [0.5] * len(ids) + [0.9, 0.8]
+
+    documents = assemble_context(chunk_ids, texts, budget=budget, scores=scores)
+
+    assert context_tokens(documents) <= budget
+    assert sum(document.tokens for document in documents) + count_tokens(CONTEXT_SEPARATOR) * (len(documents) - 1) <= budget
+    # Kurze, relevantere Dokumente zuerst und vollständig
+    assert [document.doc_id for document in documents][:2] == ["doc_a", "doc_b"]
+    assert not any(document.truncated for document in documents[:2])
+
+
+def test_partial_document_keeps_best_fitting_chunks():
+    ids, contents = chunks_of("doc_long", LONG)
+    scores = [0.1] * len(ids)
+    scores[4], scores[7] = 0.9, 0.8
+    merged = contents[4] + CHUNK_GAP_MARKER + contents[7]
+
+    [document] = assemble_context(ids, contents, budget=count_tokens(merged), scores=scores)
+
+    assert document.chunk_ids == [ids[4], ids[7]]
+    assert document.content == merged
+    assert not document.truncated
+
+
+def test_gap_marker_counts_against_the_budget():
+    ids, contents = chunks_of("doc_long", LONG)
+    scores = [0.1] * len(ids)
+    scores[4], scores[7] = 0.9, 0.8
+    # Beide Chunks passen einzeln zusammen ins Budget, mit Lückenmarker nicht mehr
+    budget = count_tokens(contents[4] + CHUNK_GAP_MARKER + contents[7]) - 1
+    assert count_tokens(contents[4]) + count_tokens(contents[7]) <= budget
+
+    [document] = assemble_context(ids, contents, budget=budget, scores=scores)
+
+    assert document.chunk_ids == [ids[4]]
+    assert document.tokens <= budget
+
+
+def test_truncates_single_oversized_chunk():
+    text = " ".join(["Wort"] * 500)
+    budget = CONTEXT_MIN_TRUNCATION_TOKENS + 10
+
+    [document] = assemble_context(["doc_big"], [text], budget=budget)
+
+    assert document.truncated
+    assert 0 < document.tokens <= budget
+    assert text.startswith(document.content)
+
+
+def test_remainder_below_minimum_is_not_filled():
+    first = " ".join(["Alpha"] * 100)
+    second = " ".join(["Beta"] * 500)
+    budget = count_tokens(first) + count_tokens(CONTEXT_SEPARATOR) + CONTEXT_MIN_TRUNCATION_TOKENS - 1
+
+    documents = assemble_context(["doc_1", "doc_2"], [first, second], budget=budget)
+
+    assert [document.doc_id for document in documents] == ["doc_1"]
+    assert assemble_context(["doc_1"], [first], budget=0) == []
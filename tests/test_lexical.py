@@ -0,0 +1,131 @@
+"""
+Tests der BM25-Suche, der Reciprocal Rank Fusion und des lexikalischen Schnellpfads.
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+import contextlib
+import io
+
+import pytest
+
+from app.rag import pipeline as pipeline_module
+from app.rag.lexical import BM25Index, LexicalHit, reciprocal_rank_fusion
+from app.rag.pipeline import RbacRagPipeline
+
+DOCUMENTS = [
+    {"id": "doc_public", "content": "Kantine Speiseplan Kantine Öffnungszeiten", "metadata": {"classification": "public"}},
+    {"id": "doc_internal", "content": "Urlaubsantrag Urlaubstage Kantine", "metadata": {"classification": "internal"}},
+    {"id": "doc_secret", "content": "Projekt Omega Übernahme TechNovum Omega Omega", "metadata": {"classification": "secret"}},
+    {"id": "doc_confidential", "content": "Projekt Omega Budget Gehälter", "metadata": {"classification": "confidential"}},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return BM25Index.build(DOCUMENTS)
+
+
+def test_search_ranks_by_bm25(index):
+    hits = index.search("Projekt Omega", k=5)
+    assert [hit.id for hit in hits] == ["doc_secret", "doc_confidential"]
+    assert hits[0].score > hits[1].score > 0
+    assert hits[0].classification == "secret"
+    assert index.search("Kantine", k=1)[0].id == "doc_public"
+    assert index.search("die und oder", k=5) == []  # nur Stoppwörter
+
+
+def test_allowed_classifications_zero_out_disallowed_docs(index):
+    unrestricted = {hit.id: hit.score for hit in index.search("Omega Kantine", k=10)}
+    hits = index.search("Omega Kantine", k=10, allowed_classifications=["public", "internal"])
+
+    assert [hit.id for hit in hits] == ["doc_public", "doc_internal"]
+    assert all(hit.classification in ("public", "internal") for hit in hits)
+    # Erlaubte Dokumente behalten ihren Score unverändert
+    assert {hit.id: hit.score for hit in hits} == {doc_id: unrestricted[doc_id] for doc_id in ("doc_public", "doc_internal")}
+
+    assert index.search("Omega", k=10, allowed_classifications=["public", "internal"]) == []
+    assert index.search("Omega", k=10, allowed_classifications=[]) == []
+    assert index.search("Omega", k=10, allowed_classifications=["unbekannt"]) == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "lexical_index.json")
+    index = BM25Index.build(DOCUMENTS, version="v1")
+    index.save(path)
+    loaded = BM25Index.load(path)
+
+    assert loaded.version == "v1"
+    allowed = ["public", "internal", "confidential"]
+    for query in ("Projekt Omega", "Kantine", "Urlaubstage"):
+        assert loaded.search(query, k=5, allowed_classifications=allowed) == index.search(query, k=5, allowed_classifications=allowed)
+    assert BM25Index.load(str(tmp_path / "fehlt.json")) is None
+
+
+def test_reciprocal_rank_fusion_ordering():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]], k=60)
+
+    assert [doc_id for doc_id, _ in fused] == ["a", "c", "b", "d"]
+    scores = dict(fused)
+    assert scores["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert scores["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert scores["b"] == pytest.approx(1 / 62)
+    assert scores["d"] == pytest.approx(1 / 63)
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    # Ein Dokument auf Platz 2 in beiden Listen schlägt einen einzelnen ersten Platz
+    fused = reciprocal_rank_fusion([["x", "both"], ["y", "both"]], k=60)
+    assert fused[0][0] == "both"
+
+
+def make_pipeline(filter_mode, index):
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = RbacRagPipeline(filter_mode=filter_mode, use_answer_cache=False, retrieval_mode="hybrid")
+    pipeline.lexical_index = index
+    pipeline.lexical_fast_path = True
+    return pipeline
+
+
+def decisive_hit(score=pipeline_module.LEXICAL_MIN_SCORE * 2):
+    return [LexicalHit("doc_secret", score, "Projekt Omega", "secret")]
+
+
+def test_is_decisive_only_in_prefilter_mode(index):
+    prefilter = make_pipeline("prefilter", index)
+    postfilter = make_pipeline("postfilter", index)
+    hits = decisive_hit()
+
+    assert prefilter.is_decisive(hits)
+    assert not postfilter.is_decisive(hits)
+    # Der Modus der Anfrage hat Vorrang vor dem der Pipeline
+    assert not prefilter.is_decisive(hits, filter_mode="postfilter")
+    assert postfilter.is_decisive(hits, filter_mode="prefilter")
+
+
+def test_is_decisive_thresholds(index):
+    pipeline = make_pipeline("prefilter", index)
+    top = pipeline_module.LEXICAL_MIN_SCORE * 2
+    ratio = pipeline_module.LEXICAL_DECISIVE_RATIO
+
+    assert not pipeline.is_decisive(None)
+    assert not pipeline.is_decisive([])
+    assert not pipeline.is_decisive(decisive_hit(pipeline_module.LEXICAL_MIN_SCORE / 2))
+    second = LexicalHit("doc_confidential", top / ratio, "Projekt Omega", "confidential")
+    assert pipeline.is_decisive(decisive_hit(top) + [second])
+    closer = second._replace(score=top / ratio * 1.01)
+    assert not pipeline.is_decisive(decisive_hit(top) + [closer])
+
+    pipeline.lexical_fast_path = False
+    assert not pipeline.is_decisive(decisive_hit(top))
+
+
+@pytest.mark.parametrize("role", ["Mitarbeiter", "Vorgesetzter"])
+def test_lexical_search_filters_only_in_prefilter_mode(index, role):
+    prefilter_hits = make_pipeline("prefilter", index).lexical_search(role, "Projekt Omega Kantine")
+    postfilter_hits = make_pipeline("postfilter", index).lexical_search(role, "Projekt Omega Kantine")
+
+    assert "doc_secret" not in [hit.id for hit in prefilter_hits]
+    # Im Nachfilter-Modus liefert BM25 alle Treffer; `_apply_rbac` filtert danach
+    assert "doc_secret" in [hit.id for hit in postfilter_hits]
@@ -0,0 +1,132 @@
+"""
+Ende-zu-Ende-Tests der Pipeline mit den lokalen Anbietern (ohne Netzwerk).
+
+Die Wissensbasis aus data/docs/documents.json wird mit den Hashing-Embeddings in
+eine temporäre ChromaDB geschrieben (EMBEDDING_PROVIDER=local, CHAT_PROVIDER=local,
+siehe conftest.py).
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+import io
+import json
+import os
+import contextlib
+
+import numpy as np
+import pytest
+
+from app.rag.pipeline import RbacRagPipeline, COLLECTION_NAME
+from app.rag.prompts import CONTEXT_START, CONTEXT_END
+from app.rag.providers import (
+    EchoChatProvider, HashingEmbeddingProvider, LOCAL_EMBEDDING_DIM, create_embedding_provider
+)
+from app.security.rbac import get_allowed_classifications
+
+DOCUMENTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "docs", "documents.json")
+
+QUERIES = [
+    "Was plant die Geschäftsführung für 2025 und gibt es Übernahmen?",
+    "Welche Standorte sollen geschlossen werden?",
+    "Wie hoch sind die Gehälter der Geschäftsführung?",
+    "Wie viele Urlaubstage habe ich?",
+    "Wie ist der Status von Projekt Omega?",
+]
+
+
+@pytest.fixture(scope="module")
+def documents():
+    with open(DOCUMENTS_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def chroma_path(tmp_path_factory, documents):
+    """Temporäre ChromaDB mit der Wissensbasis, vektorisiert durch den lokalen Anbieter."""
+    import chromadb
+
+    path = str(tmp_path_factory.mktemp("chromadb"))
+    provider = create_embedding_provider("unused")
+    collection = chromadb.PersistentClient(path=path).create_collection(name=COLLECTION_NAME)
+    collection.add(
+        ids=[doc["id"] for doc in documents],
+        documents=[doc["content"] for doc in documents],
+        metadatas=[doc["metadata"] for doc in documents],
+        embeddings=provider.embed([doc["content"] for doc in documents]),
+    )
+    return path
+
+
+def make_pipeline(chroma_path, filter_mode="postfilter"):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return RbacRagPipeline(filter_mode=filter_mode, use_answer_cache=False, chroma_path=chroma_path)
+
+
+def ask(pipeline, role, query):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return pipeline.ask(role, query)
+
+
+def test_local_providers_are_configured(chroma_path):
+    pipeline = make_pipeline(chroma_path)
+    assert isinstance(pipeline.embedding_provider, HashingEmbeddingProvider)
+    assert isinstance(pipeline.chat_provider, EchoChatProvider)
+    assert pipeline.embedding_provider.model == f"local-hashing-{LOCAL_EMBEDDING_DIM}"
+
+
+def test_embeddings_are_deterministic_with_configured_dimension():
+    texts = ["Wie viele Urlaubstage habe ich?", "Projekt Omega", ""]
+    first = create_embedding_provider("unused").embed(texts)
+    second = HashingEmbeddingProvider(dim=LOCAL_EMBEDDING_DIM).embed(texts)
+
+    assert first == second
+    assert all(len(vector) == LOCAL_EMBEDDING_DIM for vector in first)
+    assert np.linalg.norm(first[0]) == pytest.approx(1.0, abs=1e-5)
+    assert not any(first[2])  # leerer Text -> Nullvektor
+    assert first[0] != first[1]
+
+
+def test_echo_answer_reflects_context_message(chroma_path):
+    pipeline = make_pipeline(chroma_path)
+    sent = []
+    complete = pipeline.chat_provider.complete
+    pipeline.chat_provider.complete = lambda messages: sent.append(messages) or complete(messages)
+    query = "Wie viele Urlaubstage habe ich?"
+    result = ask(pipeline, "Geschaeftsfuehrung", query)
+
+    assert result["allowed_docs"] and len(sent) == 1
+    messages = sent[0]
+    # Kontext steht in einer eigenen Nachricht zwischen statischem Präfix und Frage
+    assert [m["role"] for m in messages] == ["system", "system", "user"]
+    assert CONTEXT_START not in messages[0]["content"]
+    context = messages[1]["content"]
+    assert context.startswith(CONTEXT_START) and context.endswith(CONTEXT_END)
+
+    expected = context[len(CONTEXT_START):-len(CONTEXT_END)].strip()[:200]
+    assert result["answer"] == f"Antwort auf: {query} | Kontext: {expected}"
+    assert result["allowed_docs"][0][:50] in result["answer"]
+
+
+@pytest.mark.parametrize("filter_mode", ["prefilter", "postfilter"])
+@pytest.mark.parametrize("role", ["Mitarbeiter", "Vorgesetzter"])
+def test_restricted_role_never_receives_blocked_content(chroma_path, documents, filter_mode, role):
+    pipeline = make_pipeline(chroma_path, filter_mode)
+    allowed = set(get_allowed_classifications(role))
+    forbidden = [doc["content"] for doc in documents if doc["metadata"]["classification"] not in allowed]
+    assert forbidden
+
+    blocked_total = 0
+    for query in QUERIES:
+        result = ask(pipeline, role, query)
+        blocked_total += result["blocked_count"]
+        for text in result["allowed_docs"]:
+            assert not any(text in content or content in text for content in forbidden), (query, text[:60])
+        for content in forbidden:
+            assert content[:60] not in result["answer"]
+
+    if filter_mode == "prefilter":
+        # Der Vorfilter lässt gesperrte Dokumente gar nicht erst in die Suche
+        assert blocked_total == 0
+    else:
+        # Die Fragen zielen auf gesperrte Inhalte; der Nachfilter muss sie verworfen haben
+        assert blocked_total > 0
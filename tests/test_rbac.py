@@ -0,0 +1,89 @@
+"""
+Tests der kompilierten RBAC-Entscheidungstabelle gegen den Casbin-Enforcer.
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+import casbin
+import pytest
+
+from app.security import rbac
+
+HIERARCHY_MODEL = """
+[request_definition]
+r = sub, obj, act
+
+[policy_definition]
+p = sub, obj, act
+
+[role_definition]
+g = _, _
+
+[policy_effect]
+e = some(where (p.eft == allow))
+
+[matchers]
+m = g(r.sub, p.sub) && r.obj == p.obj && r.act == p.act
+"""
+
+HIERARCHY_POLICY = """p, Mitarbeiter, public, read
+p, Mitarbeiter, internal, read
+p, Vorgesetzter, confidential, read
+p, Geschaeftsfuehrung, secret, read
+p, Revision, internal, write
+g, Vorgesetzter, Mitarbeiter
+g, Geschaeftsfuehrung, Vorgesetzter
+"""
+
+
+@pytest.fixture(scope="module")
+def live_enforcer():
+    """Lädt die Projekt-Policy ohne Hintergrundüberwachung."""
+    rbac.reload_policy()
+    return rbac.enforcer
+
+
+@pytest.mark.parametrize("role, classification, expected", [
+    ("Mitarbeiter", "public", True),
+    ("Mitarbeiter", "internal", True),
+    ("Mitarbeiter", "secret", False),            # Zugriffsschutz
+    ("Vorgesetzter", "confidential", True),
+    ("Vorgesetzter", "secret", False),           # Hierarchische Abgrenzung
+    ("Geschaeftsfuehrung", "secret", True),      # Vollzugriff
+    ("Geschaeftsfuehrung", "unknown", False),    # Unbekanntes Label
+    ("Geschaeftsfuehrung", "", False),           # Fehlendes Label (Default Deny)
+    ("Unbekannt", "public", False),              # Unbekannte Rolle
+])
+def test_check_access(live_enforcer, role, classification, expected):
+    assert rbac.check_access(role, classification) is expected
+
+
+def test_decision_table_matches_enforcer(live_enforcer):
+    roles = sorted(set(live_enforcer.get_all_subjects()) | {"Unbekannt", ""})
+    classifications = sorted(set(live_enforcer.get_all_objects()) | {"unknown", ""})
+    for role in roles:
+        expected = [bool(c) and live_enforcer.enforce(role, c, "read") for c in classifications]
+        assert [rbac.check_access(role, c) for c in classifications] == expected, role
+        assert rbac.check_access_many(role, classifications) == expected, role
+        assert rbac.get_allowed_classifications(role) == sorted(
+            c for c, allowed in zip(classifications, expected) if allowed
+        ), role
+
+
+def test_decision_table_follows_role_hierarchy(tmp_path):
+    model_path = tmp_path / "model.conf"
+    policy_path = tmp_path / "policy.csv"
+    model_path.write_text(HIERARCHY_MODEL, encoding="utf-8")
+    policy_path.write_text(HIERARCHY_POLICY, encoding="utf-8")
+    source = casbin.Enforcer(str(model_path), str(policy_path))
+
+    table = rbac._compile_decision_table(source)
+
+    assert table["Mitarbeiter"] == {"public", "internal"}
+    assert table["Vorgesetzter"] == {"public", "internal", "confidential"}
+    assert table["Geschaeftsfuehrung"] == {"public", "internal", "confidential", "secret"}
+    # Nur 'read' zählt; eine Rolle ohne Leserecht taucht nicht auf.
+    assert "Revision" not in table
+    for role in ("Mitarbeiter", "Vorgesetzter", "Geschaeftsfuehrung", "Revision"):
+        for classification in ("public", "internal", "confidential", "secret"):
+            assert (classification in table.get(role, ())) == source.enforce(role, classification, "read")
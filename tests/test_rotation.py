@@ -0,0 +1,141 @@
+"""
+Tests der Rotation des Audit-Logs (Größe, Tageswechsel) und des Segment-Index.
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+import contextlib
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.logging.audit import AuditWriter
+from app.logging.reader import iter_records
+from app.logging.rotation import (
+    INDEX_SUFFIX, find_log_files, load_segment_index, rotate_segment, segment_index_path
+)
+
+
+def line(n, timestamp=None):
+    entry = {"timestamp": (timestamp or datetime.now()).isoformat(), "role": "Mitarbeiter", "query": f"Frage {n}"}
+    return json.dumps(entry) + "\n"
+
+
+def read_gz(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.readlines()
+
+
+def make_writer(log_path, **kwargs):
+    options = dict(batch_size=1, flush_interval=0.01, rotate_bytes=0, rotate_daily=False, compression="gzip")
+    options.update(kwargs)
+    return AuditWriter(log_path, **options)
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "audit_log.jsonl")
+
+
+def test_rotates_by_size_into_gzip_segments(log_path):
+    writer = make_writer(log_path, rotate_bytes=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(3):
+            assert writer.submit(line(n))
+            assert writer.flush(timeout=5)
+        writer.close()
+
+    # Vor jedem Batch wird die (nicht leere) aktive Datei abgeschlossen
+    assert writer.stats()["rotations"] == 2
+    # Reihenfolge laut Segment-Index (Suffixe gleicher Sekunde sortieren nicht chronologisch)
+    directory = os.path.dirname(log_path)
+    segments = [os.path.join(directory, segment["file"]) for segment in load_segment_index(log_path)["segments"]]
+    assert sorted(segments) == [path for path in find_log_files(directory) if path.endswith(".jsonl.gz")]
+    assert len(segments) == 2
+    assert [json.loads(l)["query"] for path in segments for l in read_gz(path)] == ["Frage 0", "Frage 1"]
+    with open(log_path, "r", encoding="utf-8") as f:
+        assert [json.loads(l)["query"] for l in f] == ["Frage 2"]
+    assert not [name for name in os.listdir(directory) if name.endswith(".jsonl") and name != "audit_log.jsonl"]
+
+
+def test_rotates_on_new_day(log_path):
+    yesterday = datetime.now() - timedelta(days=1)
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(line(0, yesterday))
+        f.write(line(1, yesterday + timedelta(seconds=1)))
+
+    writer = make_writer(log_path, rotate_daily=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert writer.submit(line(2))
+        assert writer.flush(timeout=5)
+        writer.close()
+
+    index = load_segment_index(log_path)
+    assert len(index["segments"]) == 1
+    segment = index["segments"][0]
+    assert segment["file"] == f"audit_log.{yesterday:%Y%m%dT%H%M%S}.jsonl.gz"
+    assert datetime.fromisoformat(segment["start"]) == yesterday
+    assert [json.loads(l)["query"] for l in read_gz(os.path.join(os.path.dirname(log_path), segment["file"]))] == [
+        "Frage 0", "Frage 1"
+    ]
+    with open(log_path, "r", encoding="utf-8") as f:
+        assert [json.loads(l)["query"] for l in f] == ["Frage 2"]
+
+
+def test_no_rotation_within_limits(log_path):
+    writer = make_writer(log_path, rotate_bytes=10 * 1024 * 1024, rotate_daily=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert writer.submit_many([line(n) for n in range(5)])
+        assert writer.flush(timeout=5)
+        writer.close()
+
+    assert writer.stats()["rotations"] == 0
+    assert load_segment_index(log_path) == {"segments": []}
+    assert find_log_files(os.path.dirname(log_path)) == [log_path]
+
+
+def test_segment_index_records_each_rotation(log_path):
+    start = datetime(2025, 1, 1, 8, 0, 0)
+    paths = []
+    for n in range(3):
+        with open(log_path, "w", encoding="utf-8") as f:
+            for i in range(n + 1):
+                f.write(line(i, start))
+        # Gleiche Startsekunde: Segmente erhalten ein laufendes Suffix statt sich zu überschreiben
+        paths.append(rotate_segment(log_path, start, start + timedelta(minutes=n), "gzip"))
+
+    names = [os.path.basename(path) for path in paths]
+    assert names == [
+        "audit_log.20250101T080000.jsonl.gz",
+        "audit_log.20250101T080000-1.jsonl.gz",
+        "audit_log.20250101T080000-2.jsonl.gz",
+    ]
+    assert not os.path.exists(log_path)
+
+    index = load_segment_index(log_path)
+    assert [segment["file"] for segment in index["segments"]] == names
+    for n, (segment, path) in enumerate(zip(index["segments"], paths)):
+        assert segment["start"] == start.isoformat()
+        assert segment["end"] == (start + timedelta(minutes=n)).isoformat()
+        assert segment["entries"] == n + 1 == len(read_gz(path))
+        assert segment["bytes"] == os.path.getsize(path)
+        assert segment["compression"] == "gzip"
+
+
+def test_find_log_files_skips_segment_index(log_path):
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(line(0, datetime(2025, 1, 1)))
+    segment = rotate_segment(log_path, datetime(2025, 1, 1), datetime(2025, 1, 1), "gzip")
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(line(1))
+
+    index_path = segment_index_path(log_path)
+    assert index_path.endswith("audit_log" + INDEX_SUFFIX) and os.path.exists(index_path)
+
+    directory = os.path.dirname(log_path)
+    assert find_log_files(directory) == sorted([log_path, segment])
+    assert [record.query for record in iter_records(directory)] == ["Frage 0", "Frage 1"]
@@ -0,0 +1,244 @@
+"""
+Tests der Vektor-Backends gegen eine Brute-Force-Referenz in NumPy.
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest tests
+"""
+import contextlib
+import io
+import os
+
+import numpy as np
+import pytest
+
+from app.rag.vector_store import FlatVectorStore, PartitionedVectorStore, quantize
+
+CLASSIFICATIONS = ["public", "internal", "confidential", "secret"]
+COUNT, DIM = 60, 16
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(COUNT, DIM)).astype(np.float32)
+    ids = [f"doc_{i}" for i in range(COUNT)]
+    metadatas = [{"classification": CLASSIFICATIONS[i % len(CLASSIFICATIONS)]} for i in range(COUNT)]
+    metadatas[-1] = {}  # ohne Klassifizierung -> 'internal'
+    queries = rng.normal(size=(5, DIM)).astype(np.float32)
+    return ids, vectors, metadatas, queries
+
+
+def build(corpus, **kwargs):
+    ids, vectors, metadatas, _ = corpus
+    return FlatVectorStore.build(ids, vectors, [f"Text {i}" for i in ids], metadatas, **kwargs)
+
+
+def reference(corpus, k, allowed=None):
+    """Top-K je Anfrage per Kosinus-Ähnlichkeit über alle (erlaubten) Einträge."""
+    ids, vectors, metadatas, queries = corpus
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ unit.T
+    rows = [
+        i for i, metadata in enumerate(metadatas)
+        if allowed is None or metadata.get("classification", "internal") in allowed
+    ]
+    result_ids, result_distances = [], []
+    for row_scores in scores:
+        order = sorted(rows, key=lambda i: -row_scores[i])[:k]
+        result_ids.append([ids[i] for i in order])
+        result_distances.append([1.0 - float(row_scores[i]) for i in order])
+    return result_ids, result_distances
+
+
+@pytest.mark.parametrize("allowed", [None, ["public"], ["public", "internal"], ["secret", "unbekannt"], []])
+def test_flat_query_matches_brute_force(corpus, allowed):
+    store = build(corpus, quantization="none")
+    result = store.query(corpus[3], 5, allowed)
+    expected_ids, expected_distances = reference(corpus, 5, allowed)
+
+    assert result["ids"] == expected_ids
+    for distances, expected in zip(result["distances"], expected_distances):
+        assert distances == pytest.approx(expected, abs=1e-5)
+    for metadatas in result["metadatas"]:
+        assert all(allowed is None or m.get("classification", "internal") in allowed for m in metadatas)
+    assert result["documents"] == [[f"Text {doc_id}" for doc_id in ids] for ids in expected_ids]
+
+
+def test_flat_prefilter_mask(corpus):
+    store = build(corpus, quantization="none")
+    assert store._mask(None) is None
+    mask = store._mask(["public", "internal"])
+    expected = [m.get("classification", "internal") in ("public", "internal") for m in corpus[2]]
+    assert mask.tolist() == expected
+    assert not store._mask(["unbekannt"]).any()
+
+
+@pytest.mark.parametrize("allowed", [None, ["secret"], ["confidential", "secret"]])
+def test_flat_k_is_clamped_to_available_entries(corpus, allowed):
+    store = build(corpus, quantization="none")
+    available = sum(allowed is None or m.get("classification", "internal") in allowed for m in corpus[2])
+    assert available < COUNT * 2
+    result = store.query(corpus[3], COUNT * 2, allowed)
+
+    assert all(len(ids) == available for ids in result["ids"])
+    assert result["ids"] == reference(corpus, COUNT * 2, allowed)[0]
+    # Erlaubte Einträge werden nie durch ausgeblendete (-inf) aufgefüllt
+    assert all(len(set(ids)) == len(ids) for ids in result["ids"])
+
+
+def test_flat_query_without_entries(corpus):
+    store = build(corpus, quantization="none")
+    assert store.query(corpus[3][:2], 5, ["unbekannt"]) == {
+        "ids": [[], []], "documents": [[], []], "metadatas": [[], []], "distances": [[], []]
+    }
+    empty = FlatVectorStore.build([], [], [], [], quantization="none")
+    assert empty.query(corpus[3][:1], 5)["ids"] == [[]]
+
+
+def test_flat_save_load_round_trip(corpus, tmp_path):
+    store = build(corpus, quantization="none", version="v1")
+    path = str(tmp_path / "flat_index")
+    store.save(path)
+    loaded = FlatVectorStore.load(path)
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert (loaded.version, loaded.ids, loaded.class_names) == ("v1", store.ids, store.class_names)
+    for allowed in (None, ["public", "secret"]):
+        assert loaded.query(corpus[3], 5, allowed) == store.query(corpus[3], 5, allowed)
+
+
+def test_flat_load_rejects_partially_written_index(corpus, tmp_path):
+    path = str(tmp_path / "flat_index")
+    build(corpus, quantization="none").save(path)
+    # Neue Matrix bereits ersetzt, store.json noch vom alten Stand (andere Anzahl)
+    with open(os.path.join(path, "vectors.npy"), "wb") as f:
+        np.save(f, np.zeros((COUNT - 1, DIM), dtype=np.float32))
+
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        assert FlatVectorStore.load(path) is None
+    assert "unvollständig" in output.getvalue()
+    assert FlatVectorStore.load(str(tmp_path / "fehlt")) is None
+    assert FlatVectorStore.load("") is None
+
+
+def partitioned(corpus):
+    ids, vectors, metadatas, _ = corpus
+    partitions = {}
+    for classification in CLASSIFICATIONS:
+        rows = [i for i, m in enumerate(metadatas) if m.get("classification", "internal") == classification]
+        partitions[classification] = FlatVectorStore.build(
+            [ids[i] for i in rows], vectors[rows], [f"Text {ids[i]}" for i in rows], [metadatas[i] for i in rows],
+            quantization="none"
+        )
+    return PartitionedVectorStore(partitions, version="v1")
+
+
+@pytest.mark.parametrize("allowed", [None, ["public"], ["internal", "secret"], ["secret", "secret"], ["unbekannt"]])
+def test_partitioned_query_merges_partitions(corpus, allowed):
+    store = partitioned(corpus)
+    result = store.query(corpus[3], 5, allowed)
+    expected_ids, expected_distances = reference(corpus, 5, allowed)
+
+    assert store.space == "cosine"
+    assert result["ids"] == expected_ids
+    for distances, expected in zip(result["distances"], expected_distances):
+        assert distances == pytest.approx(expected, abs=1e-5)
+        assert distances == sorted(distances)
+    assert result["documents"] == [[f"Text {doc_id}" for doc_id in ids] for ids in expected_ids]
+
+
+@pytest.mark.parametrize("quantization", ["none", "float16", "int8"])
+def test_quantize_round_trip(corpus, quantization):
+    unit = build(corpus, quantization="none").vectors
+    codes, scales = quantize(unit, quantization)
+
+    if quantization == "none":
+        assert codes is None and scales is None
+        return
+    assert codes.dtype == (np.float16 if quantization == "float16" else np.int8)
+    restored = codes.astype(np.float32) * (scales[:, None] if scales is not None else 1.0)
+    if quantization == "int8":
+        assert scales.dtype == np.float32 and scales.shape == (COUNT,)
+        assert np.abs(codes).max(axis=1).tolist() == [127] * COUNT
+        # Rundungsfehler höchstens eine halbe Stufe je Komponente
+        assert np.all(np.abs(restored - unit) <= scales[:, None] / 2 + 1e-7)
+    else:
+        assert np.allclose(restored, unit, atol=1e-3)
+
+
+def test_quantize_rejects_unknown_mode(corpus):
+    with pytest.raises(ValueError):
+        quantize(corpus[1], "int4")
+
+
+@pytest.mark.parametrize("quantization, atol", [("float16", 1e-3), ("int8", 2e-2)])
+@pytest.mark.parametrize("allowed", [None, ["public", "internal"]])
+def test_quantized_query_without_rescoring_approximates_float32(corpus, quantization, atol, allowed):
+    store = build(corpus, quantization=quantization)
+    store.rescore_factor = 0
+    result = store.query(corpus[3], 10, allowed)
+    expected_ids, _ = reference(corpus, 10, allowed)
+    exact = [dict(zip(ids, distances)) for ids, distances in zip(*reference(corpus, COUNT, allowed))]
+
+    assert store.index_nbytes < build(corpus, quantization="none").index_nbytes
+    for ids, distances, expected, lookup in zip(result["ids"], result["distances"], expected_ids, exact):
+        # Angenäherte Distanzen, aber nahezu dieselben Nachbarn
+        assert distances == pytest.approx([lookup[doc_id] for doc_id in ids], abs=atol)
+        assert len(set(ids) & set(expected)) >= 8
+    for metadatas in result["metadatas"]:
+        assert all(allowed is None or m.get("classification", "internal") in allowed for m in metadatas)
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+@pytest.mark.parametrize("allowed", [None, ["secret"]])
+def test_rescoring_restores_float32_ranking(corpus, quantization, allowed):
+    store = build(corpus, quantization=quantization)
+    # Alle Einträge als Kandidaten: die Nachbewertung muss exakt die float32-Suche ergeben
+    store.rescore_factor = COUNT
+    result = store.query(corpus[3], 5, allowed)
+    expected_ids, expected_distances = reference(corpus, 5, allowed)
+
+    assert result["ids"] == expected_ids
+    for distances, expected in zip(result["distances"], expected_distances):
+        assert distances == pytest.approx(expected, abs=1e-5)
+
+    store.rescore_factor = 4
+    rescored = store.query(corpus[3], 5, allowed)
+    exact = build(corpus, quantization="none").query(corpus[3], COUNT, allowed)
+    for ids, distances, all_ids, all_distances in zip(rescored["ids"], rescored["distances"], exact["ids"], exact["distances"]):
+        lookup = dict(zip(all_ids, all_distances))
+        assert distances == pytest.approx([lookup[doc_id] for doc_id in ids], abs=1e-5)
+        assert distances == sorted(distances)
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_quantized_save_load_round_trip(corpus, quantization, tmp_path):
+    path = str(tmp_path / "flat_index")
+    build(corpus, quantization="int8").save(path)
+    store = build(corpus, quantization=quantization)
+    store.rescore_factor = 2
+    store.save(path)
+    loaded = FlatVectorStore.load(path)
+    loaded.rescore_factor = 2
+
+    assert loaded.quantization == quantization
+    assert isinstance(loaded.codes, np.memmap)
+    # Skalierungen eines früheren int8-Index dürfen nicht liegen bleiben
+    assert os.path.exists(os.path.join(path, "scales.npy")) == (quantization == "int8")
+    for allowed in (None, ["confidential"]):
+        assert loaded.query(corpus[3], 5, allowed) == store.query(corpus[3], 5, allowed)
+
+
+def test_read_rows_from_disk_matches_memory(corpus, tmp_path):
+    path = str(tmp_path / "flat_index")
+    store = build(corpus, quantization="int8")
+    store.save(path)
+    loaded = FlatVectorStore.load(path)
+    indices = np.array([5, 0, COUNT - 1, 5, 17])
+
+    rows = loaded._read_rows(indices)
+    assert loaded._vectors_fd is not None  # per pread gelesen, nicht über die Memory-Map
+    assert rows.dtype == np.float32 and rows.shape == (len(indices), DIM)
+    assert np.array_equal(rows, store.vectors[indices])
+    assert np.array_equal(store._read_rows(indices), store.vectors[indices])  # im Speicher: direkte Indizierung
+    assert loaded._read_rows(np.array([], dtype=np.int64)).shape == (0, DIM)